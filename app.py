@@ -1,7 +1,5 @@
 import streamlit as st
 from urllib.parse import urlparse, urljoin
-from bs4 import BeautifulSoup
-import requests
 from collections import Counter
 import pandas as pd
 import plotly.graph_objects as go
@@ -9,20 +7,26 @@ import plotly.express as px
 import time
 import string
 import nltk
-from nltk.corpus import stopwords
-import re
 from datetime import datetime
 import json
+import hashlib
 import ssl
-try:
-    from textstat import flesch_reading_ease
-    TEXTSTAT_AVAILABLE = True
-except ImportError:
-    TEXTSTAT_AVAILABLE = False
-    def flesch_reading_ease(text):
-        return 0
-import concurrent.futures
+import asyncio
+import aiohttp
 from io import StringIO
+from caches import derived_store, link_status_cache, metadata_cache, raw_store, site_info_cache
+from concurrency import MAX_CONCURRENCY, MIN_CONCURRENCY, ConcurrencyController
+from keyword_match import KeywordMatcher
+from ngrams import PHRASE_SKETCH_MAX_ENTRIES, HeavyHitters
+from parsing import parse_in_thread, parse_stage
+from scoring import (SCORE_WEIGHTS, calculate_seo_score, feature_frame, features_to_frame, known_flag,
+                     page_recommendations, score_breakdown, score_features, score_frame)
+from text_stats import TextStats, get_text_stats
+from tfidf import candidate_terms, document_index, get_stop_words, top_tfidf_terms
+from html_extract import PARSER_BACKEND, FeatureCollector, StreamingScanner
+from http_client import (GLOBAL_STATS, CircuitOpenError, HostRoundRobin, breaker_states, fetch, fetch_stream, head_status,
+                         iter_sync, probe_image_sizes, run_sync, set_crawl_delay, track_connections, track_retries)
+from urlnorm import normalize_url
 
 # Download NLTK data
 try:
@@ -34,6 +38,8 @@ except:
 # Initialize session state for history
 if 'analysis_history' not in st.session_state:
     st.session_state.analysis_history = []
+    # Rule inputs of each history entry, so the history can be rescored without refetching
+    st.session_state.history_features = []
 if 'bulk_results' not in st.session_state:
     st.session_state.bulk_results = []
 
@@ -44,585 +50,509 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Cache for better performance
-@st.cache_data(ttl=3600)
-def get_metadata(url):
-    """Enhanced metadata extraction with comprehensive SEO analysis"""
+def lookup_failed(status):
+    """Whether a site file request got no definite answer: no response (None), 429 or a server error"""
+    return status is None or status == 429 or status >= 500
+
+async def fetch_robots_txt(base_url):
+    """Return (exists, text) for the site's robots.txt; exists is None if the lookup failed"""
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        }
-        start_time = time.time()
-        response = requests.get(url, headers=headers, timeout=15, allow_redirects=True)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Basic metadata
-        title_tag = soup.find("title")
-        meta_tags = soup.find_all("meta")
-        
-        # Extract all meta information
-        meta_info = {}
-        for meta in meta_tags:
-            if meta is None:
-                continue
-            try:
-                name = (meta.get('name', '') if hasattr(meta, 'get') else '').lower() or (meta.get('property', '') if hasattr(meta, 'get') else '').lower()
-                content = meta.get('content', '') if hasattr(meta, 'get') else ''
-                if name and content:
-                    meta_info[name] = content
-            except (AttributeError, TypeError):
-                continue
-        
-        # Open Graph tags
-        og_tags = {}
-        for meta in meta_tags:
-            if meta is None or not hasattr(meta, 'get'):
-                continue
-            try:
-                property_attr = meta.get('property', '')
-                if property_attr.startswith('og:'):
-                    og_tags[property_attr] = meta.get('content', '')
-            except (AttributeError, TypeError):
-                continue
-        
-        # Headings analysis
-        headings = {
-            'h1': [h.get_text(strip=True) for h in soup.find_all('h1')],
-            'h2': [h.get_text(strip=True) for h in soup.find_all('h2')],
-            'h3': [h.get_text(strip=True) for h in soup.find_all('h3')],
-        }
-        
-        # Images analysis
-        images = soup.find_all('img')
-        images_with_alt = sum(1 for img in images if img and hasattr(img, 'get') and img.get('alt'))
-        images_without_alt = len(images) - images_with_alt
-        
-        # Links analysis
-        links = soup.find_all('a', href=True)
-        internal_links = []
-        external_links = []
-        base_url = f"{urlparse(url).scheme}://{urlparse(url).netloc}"
-        
-        for link in links:
-            if link is None or not hasattr(link, 'get'):
-                continue
-            try:
-                href = link.get('href', '')
-                if href:
-                    absolute_url = urljoin(base_url, href)
-                    if urlparse(absolute_url).netloc == urlparse(url).netloc:
-                        internal_links.append(absolute_url)
-                    else:
-                        external_links.append(absolute_url)
-            except (AttributeError, TypeError, ValueError):
-                continue
-        
-        # Schema markup detection
-        schema_scripts = soup.find_all('script', type='application/ld+json')
-        has_schema = len(schema_scripts) > 0
-        
-        # Canonical URL
-        canonical = soup.find('link', rel='canonical')
-        canonical_url = None
-        if canonical and hasattr(canonical, 'get'):
-            try:
-                canonical_url = canonical.get('href')
-            except (AttributeError, TypeError):
-                canonical_url = None
-        
-        # Robots meta
-        robots_meta = meta_info.get('robots', '')
-        
-        # Get text content
-        for script in soup(["script", "style", "nav", "header", "footer"]):
-            script.decompose()
-        text_content = soup.get_text(separator=' ', strip=True)
-        
-        # Viewport meta (mobile-friendly check)
-        viewport = soup.find('meta', attrs={'name': 'viewport'})
-        is_mobile_friendly = viewport is not None
-        
-        # Twitter Card tags
-        twitter_tags = {}
-        for meta in meta_tags:
-            if meta is None or not hasattr(meta, 'get'):
-                continue
-            try:
-                name = meta.get('name', '')
-                if name.startswith('twitter:'):
-                    twitter_tags[name] = meta.get('content', '')
-            except (AttributeError, TypeError):
-                continue
-        
-        # Language detection
-        html_lang = soup.find('html', attrs={'lang': True})
-        page_language = None
-        if html_lang and hasattr(html_lang, 'get'):
-            try:
-                page_language = html_lang.get('lang')
-            except (AttributeError, TypeError):
-                page_language = None
-        
-        # SSL/HTTPS check
-        is_https = urlparse(url).scheme == 'https'
-        
-        # Image optimization analysis
-        image_sizes = []
-        large_images = 0
-        for img in images:
-            if img is None or not hasattr(img, 'get'):
-                continue
-            try:
-                src = img.get('src', '')
-                if src:
-                    try:
-                        img_url = urljoin(base_url, src)
-                        img_response = requests.head(img_url, headers=headers, timeout=5, allow_redirects=True)
-                        if 'content-length' in img_response.headers:
-                            size_kb = int(img_response.headers['content-length']) / 1024
-                            image_sizes.append(size_kb)
-                            if size_kb > 500:  # Images larger than 500KB
-                                large_images += 1
-                    except:
-                        pass
-            except (AttributeError, TypeError):
-                continue
-        
-        # Robots.txt check
-        robots_txt_url = urljoin(base_url, '/robots.txt')
-        robots_txt_exists = False
-        robots_txt_content = None
-        try:
-            robots_response = requests.get(robots_txt_url, headers=headers, timeout=5)
-            if robots_response.status_code == 200:
-                robots_txt_exists = True
-                robots_txt_content = robots_response.text[:500]  # First 500 chars
-        except:
-            pass
-        
-        # Sitemap detection
-        sitemap_url = urljoin(base_url, '/sitemap.xml')
-        sitemap_exists = False
-        try:
-            sitemap_response = requests.head(sitemap_url, headers=headers, timeout=5)
-            if sitemap_response.status_code == 200:
-                sitemap_exists = True
-        except:
-            pass
-        
+        robots_response = await fetch(urljoin(base_url, '/robots.txt'), timeout=5)
+    except Exception:
+        return None, None
+    if robots_response.status == 200:
+        return True, robots_response.text
+    if lookup_failed(robots_response.status):
+        return None, None
+    return False, None
+
+def parse_crawl_delay(robots_txt):
+    """Crawl-delay in seconds that robots.txt sets for all user agents (the * group), or None"""
+    applies = False
+    in_agents = False
+    for line in robots_txt.splitlines():
+        field, _, value = line.split('#', 1)[0].partition(':')
+        field = field.strip().lower()
+        value = value.strip()
+        if field == 'user-agent':
+            # Consecutive User-agent lines open one group
+            if not in_agents:
+                applies = False
+            in_agents = True
+            applies = applies or value == '*'
+        elif field:
+            in_agents = False
+            if field == 'crawl-delay' and applies:
+                try:
+                    delay = float(value)
+                except ValueError:
+                    return None
+                return delay if delay > 0 else None
+    return None
+
+async def fetch_sitemap_exists(base_url):
+    """Check whether /sitemap.xml answers a HEAD request with 200 (None if the lookup failed)"""
+    status = await head_status(urljoin(base_url, '/sitemap.xml'))
+    return None if lookup_failed(status) else status == 200
+
+async def fetch_site_info(base_url):
+    """Fetch robots.txt and probe sitemap.xml for a site, and apply its Crawl-delay to the fetch engine
+    
+    A file whose lookup failed is recorded as None (unknown) rather than
+    missing, and ``lookup_failed`` tells site_info_cache to retry it soon.
+    """
+    (robots_txt_exists, robots_txt), sitemap_exists = await asyncio.gather(
+        fetch_robots_txt(base_url),
+        fetch_sitemap_exists(base_url),
+    )
+    crawl_delay = parse_crawl_delay(robots_txt) if robots_txt else None
+    if crawl_delay:
+        set_crawl_delay(base_url, crawl_delay)
+    return {
+        "robots_txt_exists": robots_txt_exists,
+        "robots_txt_content": robots_txt[:500] if robots_txt else None,  # First 500 chars
+        "sitemap_exists": sitemap_exists,
         # Check for sitemap in robots.txt
-        sitemap_in_robots = False
-        if robots_txt_content:
-            sitemap_in_robots = 'sitemap' in robots_txt_content.lower()
-        
-        # Broken links check (sample)
-        broken_links = 0
-        checked_links = 0
-        sample_links = list(set(internal_links + external_links))[:10]  # Check first 10 unique links
-        for link in sample_links:
-            try:
-                checked_links += 1
-                link_response = requests.head(link, headers=headers, timeout=5, allow_redirects=True)
-                if link_response.status_code >= 400:
-                    broken_links += 1
-            except:
-                broken_links += 1
-        
-        # Readability score
-        readability_score = 0
+        "sitemap_in_robots": bool(robots_txt) and 'sitemap' in robots_txt.lower(),
+        "crawl_delay": crawl_delay,
+        "lookup_failed": robots_txt_exists is None or sitemap_exists is None,
+    }
+
+async def get_site_info(base_url):
+    """robots.txt / sitemap info for a site, loaded once per SITE_INFO_TTL (SITE_INFO_FAILED_TTL if a lookup failed)"""
+    return await site_info_cache.get_or_load(base_url.lower(), lambda: fetch_site_info(base_url))
+
+# Link checks: per-request timeout, and the deadline for a page's whole sample (seconds)
+LINK_CHECK_TIMEOUT = 5
+LINK_CHECK_DEADLINE = 10
+
+async def check_link_status(link, deadline):
+    """HEAD status of a link (0 if the request failed) and whether it was answered from link_status_cache
+    
+    Concurrent checks of one link, e.g. the same nav link on pages analyzed
+    together, wait for a single request. The status is None, and nothing is
+    cached, when the link was not requested: its host's circuit breaker is
+    open, or the check was still waiting at the time.monotonic() deadline
+    (link HEADs are spaced by the host's rate limit and Crawl-delay too).
+    A request that failed (0) is only cached for LINK_FAILED_TTL.
+    """
+    async def load():
+        request = asyncio.ensure_future(
+            fetch(link, method='HEAD', timeout=LINK_CHECK_TIMEOUT, retries=0, probe=True)
+        )
+        done, _ = await asyncio.wait([request], timeout=max(0.0, deadline - time.monotonic()))
+        if not done:
+            request.cancel()
+            return None
         try:
-            if text_content and TEXTSTAT_AVAILABLE:
-                readability_score = flesch_reading_ease(text_content[:5000])  # First 5000 chars
-        except:
-            pass
-        
-        end_time = time.time()
-        analysis_time = end_time - start_time
-        
-        return {
-            "url": url,
-            "title": title_tag.text.strip() if title_tag else None,
-            "title_length": len(title_tag.text.strip()) if title_tag else 0,
-            "meta_description": meta_info.get('description', ''),
-            "meta_description_length": len(meta_info.get('description', '')),
-            "meta_keywords": meta_info.get('keywords', ''),
-            "og_tags": og_tags,
-            "twitter_tags": twitter_tags,
-            "headings": headings,
-            "images_total": len(images),
-            "images_with_alt": images_with_alt,
-            "images_without_alt": images_without_alt,
-            "large_images": large_images,
-            "internal_links_count": len(set(internal_links)),
-            "external_links_count": len(set(external_links)),
-            "broken_links": broken_links,
-            "checked_links": checked_links,
-            "has_schema": has_schema,
-            "schema_count": len(schema_scripts),
-            "canonical_url": canonical_url,
-            "robots_meta": robots_meta,
-            "robots_txt_exists": robots_txt_exists,
-            "robots_txt_content": robots_txt_content,
-            "sitemap_exists": sitemap_exists,
-            "sitemap_in_robots": sitemap_in_robots,
-            "is_mobile_friendly": is_mobile_friendly,
-            "is_https": is_https,
-            "page_language": page_language,
-            "readability_score": readability_score,
-            "text_content": text_content,
-            "response_time": analysis_time,
-            "status_code": response.status_code,
-            "content_length": len(response.content),
-            "timestamp": datetime.now().isoformat()
-        }
-        
-    except requests.exceptions.Timeout:
-        st.error("Request timed out. The website took too long to respond.")
-        return None
-    except requests.exceptions.RequestException as e:
-        st.error(f"An error occurred while fetching the webpage: {str(e)}")
-        return None
-    except Exception as e:
-        st.error(f"An unexpected error occurred: {str(e)}")
-        return None
+            return request.result().status
+        except CircuitOpenError:
+            return None
+        except Exception:
+            return 0
+    return await link_status_cache.get_or_load_shared(normalize_url(link), load)
 
-def calculate_seo_score(metadata):
-    """Calculate overall SEO score based on various factors"""
-    if not metadata or not isinstance(metadata, dict):
-        return 0
+async def check_links(links, deadline=LINK_CHECK_DEADLINE):
+    """HEAD a sample of links concurrently and return (broken, checked, cache hits, unchecked)
     
-    score = 0
-    max_score = 100
+    Links that could not be checked (open circuit breaker, or still waiting
+    after deadline seconds) count neither as checked nor as broken.
+    """
+    deadline = time.monotonic() + deadline
+    statuses = await asyncio.gather(*(check_link_status(link, deadline) for link in links))
+    results = [(status, cached) for status, cached in statuses if status is not None]
+    broken_links = sum(1 for status, _ in results if not status or status >= 400)
+    cache_hits = sum(1 for _, cached in results if cached)
+    return broken_links, len(results), cache_hits, len(links) - len(results)
+
+# Bump whenever parse_page output changes so the derived tier is recomputed
+ANALYZER_VERSION = 8
+
+def derived_cache_key(url, body):
+    """Derived-tier key: analyzer version, parser backend, site origin (links/HTTPS depend on it) and content hash"""
+    parsed = urlparse(url)
+    digest = hashlib.sha256(body).hexdigest()
+    return f"v{ANALYZER_VERSION}:{PARSER_BACKEND}:{parsed.scheme.lower()}://{parsed.netloc.lower()}:{digest}"
+
+def index_document(body, derived):
+    """Add a page's keyword candidates to the document-frequency index, once per distinct body"""
+    text_stats = derived[0].get('text_stats')
+    if text_stats and text_stats['word_count']:
+        document_index.add_document(hashlib.sha256(body).hexdigest(), candidate_terms(text_stats['frequencies']))
+
+async def derived_analysis(url, body, parse=parse_in_thread):
+    """parse_page output for this content, from the derived tier when possible.
     
-    # Title (15 points)
-    if metadata.get('title'):
-        title_len = metadata.get('title_length', 0)
-        if 30 <= title_len <= 60:
-            score += 15
-        elif 20 <= title_len < 30 or 60 < title_len <= 70:
-            score += 10
-        elif title_len > 0:
-            score += 5
-    else:
-        score += 0
+    parse is the async (url, body) callable that runs parse_page on a miss:
+    a worker thread by default, the process-pool stage for bulk runs.
+    """
+    key = derived_cache_key(url, body)
+    derived = await asyncio.to_thread(derived_store.get, key)
+    if derived is None:
+        derived = await parse(url, body)
+        await asyncio.to_thread(derived_store.set, key, derived)
+    return derived
+
+def assemble_metadata(url, raw, derived, from_cache=False):
+    """Combine a raw fetch record with its derived analysis into the metadata dict"""
+    features = derived[0]
+    probes = raw['probes']
+    return {
+        "url": url,
+        **features,
+        "large_images": sum(1 for size_kb in probes['image_sizes'] if size_kb > 500),  # Images larger than 500KB
+        "broken_links": probes['broken_links'],
+        "checked_links": probes['checked_links'],
+        # Probes cut short by their deadline or an open circuit breaker (older records have none)
+        "unchecked_links": probes.get('unchecked_links', 0),
+        "unprobed_images": probes.get('unprobed_images', 0),
+        "link_cache_hits": probes['link_cache_hits'],
+        **probes['site_info'],
+        "response_time": raw['timings']['total'],
+        "fetch_time": raw['timings']['page'],
+        "status_code": raw['status'],
+        "content_length": len(raw['body']),
+        "connections_opened": raw['connections']['connections_opened'],
+        "connections_reused": raw['connections']['connections_reused'],
+        "timestamp": raw['fetched_at'],
+        "from_cache": from_cache,
+    }
+
+async def analyze_page(url, parse=parse_in_thread, refresh=False):
+    """Analyze a page, reusing the raw-fetch and derived-analysis cache tiers when possible.
     
-    # Meta Description (15 points)
-    desc_len = metadata.get('meta_description_length', 0)
-    if 120 <= desc_len <= 160:
-        score += 15
-    elif 100 <= desc_len < 120 or 160 < desc_len <= 180:
-        score += 10
-    elif desc_len > 0:
-        score += 5
+    A raw-tier hit needs no network I/O at all; the derived tier is only
+    recomputed when the page content or ANALYZER_VERSION changed. refresh
+    skips the raw tier and fetches the page again.
+    """
+    key = normalize_url(url)
+    raw = None if refresh else await asyncio.to_thread(raw_store.get, key)
+    if raw is not None:
+        derived = await derived_analysis(url, raw['body'], parse)
+        await asyncio.to_thread(index_document, raw['body'], derived)
+        return assemble_metadata(url, raw, derived, from_cache=True)
+    raw, derived = await fetch_page_record(url, parse)
+    await asyncio.to_thread(raw_store.set, key, raw)
+    await asyncio.to_thread(index_document, raw['body'], derived)
+    return assemble_metadata(url, raw, derived)
+
+async def fetch_page_record(url, parse=parse_in_thread):
+    """Fetch a page and its sub-resources; images and links are probed as concurrent tasks.
     
-    # Headings (15 points)
-    headings = metadata.get('headings', {})
-    h1_count = len(headings.get('h1', []))
-    if h1_count == 1:
-        score += 15
-    elif h1_count > 1:
-        score += 5
-    if len(headings.get('h2', [])) > 0:
-        score += 5
+    robots.txt comes first (once per site) so its Crawl-delay applies from the first page request.
+    """
+    conn_stats = track_connections()
+    start_time = time.time()
+    base_url = f"{urlparse(url).scheme}://{urlparse(url).netloc}"
+    site_info = await get_site_info(base_url)
+    response = await fetch(url, timeout=15, raise_for_status=True)
     
-    # Images with Alt (10 points)
-    images_total = metadata.get('images_total', 0)
-    if images_total > 0:
-        images_with_alt = metadata.get('images_with_alt', 0)
-        alt_ratio = images_with_alt / images_total
-        score += int(10 * alt_ratio)
+    # Parsing is CPU-bound, keep it off the event loop
+    derived = await derived_analysis(url, response.body, parse)
+    features, image_urls, sample_links = derived
     
-    # Mobile Friendly (10 points)
-    if metadata.get('is_mobile_friendly', False):
-        score += 10
+    probed_images, checked = await asyncio.gather(
+        probe_image_sizes(image_urls),
+        check_links(sample_links),
+    )
+    image_sizes, unprobed_images = probed_images
+    broken_links, checked_links, link_cache_hits, unchecked_links = checked
     
-    # Schema Markup (10 points)
-    if metadata.get('has_schema', False):
-        score += 10
+    end_time = time.time()
+    raw = {
+        "final_url": response.url,
+        "status": response.status,
+        "headers": response.headers,
+        "body": response.body,
+        "timings": {"page": response.elapsed, "total": end_time - start_time},
+        "fetched_at": datetime.now().isoformat(),
+        "connections": conn_stats.as_dict(),
+        "probes": {
+            "image_sizes": image_sizes,
+            "broken_links": broken_links,
+            "checked_links": checked_links,
+            "unchecked_links": unchecked_links,
+            "unprobed_images": unprobed_images,
+            "link_cache_hits": link_cache_hits,
+            "site_info": site_info,
+        },
+    }
+    return raw, derived
+
+# Quick audit modes: stop reading at </head>, or also count headings/images/links in the body
+QUICK_AUDIT_HEAD = 'head'
+QUICK_AUDIT_OUTLINE = 'outline'
+
+# Rule inputs each mode does not read; their rules are left out of its score and recommendations
+QUICK_AUDIT_UNSCANNED = {
+    QUICK_AUDIT_HEAD: (
+        "h1_count", "h2_count", "images_total", "images_with_alt", "images_without_alt", "has_schema",
+        "internal_links_count", "word_count", "readability_score", "checked_links", "broken_links", "large_images",
+    ),
+    QUICK_AUDIT_OUTLINE: ("word_count", "readability_score", "checked_links", "broken_links", "large_images"),
+}
+
+NOT_SCANNED = "⚡ Not scanned in quick audit"
+# Full Report rows and the rule inputs they show, so a quick audit can mark the ones it did not read
+REPORT_INPUTS = {
+    "H1 Count": ("h1_count",), "H2 Count": ("h2_count",), "H3 Count": ("h2_count",),
+    "Total Images": ("images_total",), "Images with Alt": ("images_with_alt",),
+    "Images without Alt": ("images_without_alt",), "Large Images": ("large_images",),
+    "Internal Links": ("internal_links_count",), "External Links": ("internal_links_count",),
+    "Broken Links": ("checked_links",), "Schema Markup": ("has_schema",),
+    "Readability Score": ("readability_score",), "Reading Grade (Flesch-Kincaid)": ("readability_score",),
+    "Word Count": ("word_count",),
+}
+
+def not_scanned(metadata, *features):
+    """Whether a quick audit left any of these rule inputs unread (see QUICK_AUDIT_UNSCANNED)"""
+    unscanned = metadata.get('unscanned', ())
+    return any(feature in unscanned for feature in features)
+
+async def quick_audit_page(url, mode=QUICK_AUDIT_HEAD):
+    """Audit a page from a streamed read of its head, without downloading or parsing the whole document.
     
-    # Canonical URL (5 points)
-    if metadata.get('canonical_url'):
-        score += 5
+    Images and links are not probed and there is no page text, so word count
+    and readability are left empty. robots.txt and sitemap are still checked.
+    The features the mode did not read are listed under ``unscanned``.
+    """
+    conn_stats = track_connections()
+    start_time = time.time()
+    base_url = f"{urlparse(url).scheme}://{urlparse(url).netloc}"
+    site_info = await get_site_info(base_url)
+    scanner = StreamingScanner(FeatureCollector(url), scan_body=mode == QUICK_AUDIT_OUTLINE)
     
-    # Internal Links (5 points)
-    internal_links = metadata.get('internal_links_count', 0)
-    if internal_links > 0:
-        score += min(5, internal_links // 5)
+    async def feed(chunk, charset):
+        # Tokenizing a large page would stall every other fetch on the engine loop
+        return await asyncio.to_thread(scanner.feed_bytes, chunk, charset)
     
-    # Content Length (10 points)
-    text_content = metadata.get('text_content', '')
-    word_count = len(text_content.split()) if text_content else 0
-    if word_count >= 300:
-        score += 10
-    elif word_count >= 200:
-        score += 7
-    elif word_count >= 100:
-        score += 4
+    response = await fetch_stream(url, feed, timeout=15, raise_for_status=True)
+    features, _, _ = await asyncio.to_thread(scanner.result)
+    features["text_stats"] = TextStats(features['text_content']).as_dict()
     
-    return min(score, max_score)
+    bytes_read = len(response.body)
+    content_length = response.content_length
+    if content_length is None and response.complete:
+        content_length = bytes_read
+    end_time = time.time()
+    return {
+        "url": url,
+        **features,
+        "readability_score": 0,
+        "large_images": 0,
+        "broken_links": 0,
+        "checked_links": 0,
+        "unchecked_links": 0,
+        "unprobed_images": 0,
+        "link_cache_hits": 0,
+        **site_info,
+        "response_time": end_time - start_time,
+        "fetch_time": response.elapsed,
+        "status_code": response.status,
+        "content_length": content_length if content_length is not None else bytes_read,
+        "quick_audit": mode,
+        "unscanned": QUICK_AUDIT_UNSCANNED[mode],
+        "bytes_read": bytes_read,
+        # Unknown when the read stopped early and the server sent no Content-Length
+        "bytes_saved": content_length - bytes_read if content_length is not None else None,
+        "connections_opened": conn_stats.opened,
+        "connections_reused": conn_stats.reused,
+        "timestamp": datetime.now().isoformat(),
+        "from_cache": False,
+    }
 
-def extract_keywords_tfidf(text_content, top_n=20):
-    """Extract keywords using frequency analysis"""
-    words = text_content.lower().split()
-    stop_words = set(stopwords.words('english'))
-    symbols_to_exclude = set(string.punctuation)
+def get_metadata(url, quick_audit=None, refresh=False):
+    """Enhanced metadata extraction with comprehensive SEO analysis
     
-    filtered_words = [
-        word for word in words
-        if word.lower() not in stop_words 
-        and not any(char in symbols_to_exclude for char in word)
-        and len(word) > 2
-        and word.isalpha()
-    ]
-    
-    word_counter = Counter(filtered_words)
-    return word_counter.most_common(top_n)
+    quick_audit (QUICK_AUDIT_HEAD or QUICK_AUDIT_OUTLINE) runs the streamed
+    head-only audit instead of the full analysis. refresh ignores cached
+    results for this URL and fetches it again.
+    """
+    # Cache for better performance
+    key = f"v{ANALYZER_VERSION}:{quick_audit or 'full'}:{normalize_url(url)}"
+    metadata = None if refresh else metadata_cache.get(key)
+    if metadata is not None:
+        return metadata
+    try:
+        if quick_audit:
+            metadata = run_sync(quick_audit_page(url, quick_audit))
+        else:
+            metadata = run_sync(analyze_page(url, refresh=refresh))
+    except asyncio.TimeoutError:
+        st.error("Request timed out. The website took too long to respond.")
+        return None
+    except aiohttp.ClientError as e:
+        st.error(f"An error occurred while fetching the webpage: {str(e)}")
+        return None
+    except Exception as e:
+        st.error(f"An unexpected error occurred: {str(e)}")
+        return None
+    metadata_cache.set(key, metadata)
+    return metadata
+
+def extract_keywords_tfidf(text_stats, top_n=20):
+    """Top keywords of a page by TF-IDF against every page analyzed so far"""
+    return top_tfidf_terms(
+        [candidate_terms(text_stats['frequencies'])], [text_stats['word_count']], document_index, top_n
+    )[0]
 
-def analyze_keywords(text_content):
+def analyze_keywords(text_stats):
     """Enhanced keyword analysis"""
-    words = text_content.split()
-    total_words = len(words)
-    word_counter = Counter(words)
-    most_common_words = word_counter.most_common()
+    total_words = text_stats['word_count']
+    most_common_words = Counter(text_stats['frequencies']).most_common()
     return total_words, most_common_words
 
 def generate_recommendations(metadata, seo_score):
     """Generate actionable SEO recommendations"""
-    if metadata is None or not isinstance(metadata, dict):
-        return [], []
-    
-    recommendations = []
-    priority = []
-    
-    # Title recommendations
-    if not metadata.get('title'):
-        recommendations.append({
-            "category": "Critical",
-            "issue": "Missing Title Tag",
-            "recommendation": "Add a descriptive title tag (30-60 characters) that includes your primary keyword.",
-            "impact": "High"
-        })
-        priority.append("Critical")
-    else:
-        title_length = metadata.get('title_length', 0)
-        if title_length < 30:
-            recommendations.append({
-                "category": "Important",
-                "issue": "Title Too Short",
-                "recommendation": f"Expand your title tag from {title_length} to 30-60 characters for better SEO.",
-                "impact": "Medium"
-            })
-            priority.append("Important")
-        elif title_length > 60:
-            recommendations.append({
-                "category": "Important",
-                "issue": "Title Too Long",
-                "recommendation": f"Shorten your title tag from {title_length} to 30-60 characters to avoid truncation.",
-                "impact": "Medium"
-            })
-            priority.append("Important")
-    
-    # Meta description recommendations
-    if not metadata.get('meta_description'):
-        recommendations.append({
-            "category": "Critical",
-            "issue": "Missing Meta Description",
-            "recommendation": "Add a compelling meta description (120-160 characters) to improve click-through rates.",
-            "impact": "High"
-        })
-        priority.append("Critical")
-    else:
-        desc_length = metadata.get('meta_description_length', 0)
-        if desc_length < 120:
-            recommendations.append({
-                "category": "Important",
-                "issue": "Meta Description Too Short",
-                "recommendation": f"Expand your meta description from {desc_length} to 120-160 characters.",
-                "impact": "Medium"
-            })
-            priority.append("Important")
-    
-    # H1 recommendations
-    headings = metadata.get('headings', {})
-    h1_count = len(headings.get('h1', []))
-    if h1_count == 0:
-        recommendations.append({
-            "category": "Critical",
-            "issue": "No H1 Tag",
-            "recommendation": "Add exactly one H1 tag with your primary keyword to improve SEO structure.",
-            "impact": "High"
-        })
-        priority.append("Critical")
-    elif h1_count > 1:
-        recommendations.append({
-            "category": "Important",
-            "issue": "Multiple H1 Tags",
-            "recommendation": f"Reduce H1 tags from {h1_count} to 1. Use H2-H6 for subheadings.",
-            "impact": "Medium"
-        })
-        priority.append("Important")
-    
-    # Image alt text recommendations
-    images_total = metadata.get('images_total', 0)
-    if images_total > 0:
-        images_with_alt = metadata.get('images_with_alt', 0)
-        alt_ratio = images_with_alt / images_total
-        if alt_ratio < 0.8:
-            recommendations.append({
-                "category": "Important",
-                "issue": "Missing Alt Text on Images",
-                "recommendation": f"Add alt text to {metadata.get('images_without_alt', 0)} images for better accessibility and SEO.",
-                "impact": "Medium"
-            })
-            priority.append("Important")
-    
-    # Mobile friendliness
-    if not metadata.get('is_mobile_friendly', False):
-        recommendations.append({
-            "category": "Critical",
-            "issue": "Not Mobile-Friendly",
-            "recommendation": "Add a viewport meta tag to make your site mobile-responsive.",
-            "impact": "High"
-        })
-        priority.append("Critical")
-    
-    # HTTPS
-    if not metadata.get('is_https', False):
-        recommendations.append({
-            "category": "Critical",
-            "issue": "Not Using HTTPS",
-            "recommendation": "Migrate to HTTPS to improve security and SEO rankings.",
-            "impact": "High"
-        })
-        priority.append("Critical")
-    
-    # Schema markup
-    if not metadata.get('has_schema', False):
-        recommendations.append({
-            "category": "Recommended",
-            "issue": "No Schema Markup",
-            "recommendation": "Add structured data (JSON-LD) to help search engines understand your content.",
-            "impact": "Low"
-        })
-        priority.append("Recommended")
-    
-    # Canonical URL
-    if not metadata.get('canonical_url'):
-        recommendations.append({
-            "category": "Recommended",
-            "issue": "No Canonical URL",
-            "recommendation": "Add a canonical URL to prevent duplicate content issues.",
-            "impact": "Low"
-        })
-        priority.append("Recommended")
-    
-    # Content length
-    text_content = metadata.get('text_content', '')
-    word_count = len(text_content.split()) if text_content else 0
-    if word_count < 300:
-        recommendations.append({
-            "category": "Important",
-            "issue": "Low Content Length",
-            "recommendation": f"Increase content from {word_count} to at least 300 words for better SEO.",
-            "impact": "Medium"
-        })
-        priority.append("Important")
-    
-    # Robots.txt
-    if not metadata.get('robots_txt_exists', False):
-        recommendations.append({
-            "category": "Recommended",
-            "issue": "No robots.txt File",
-            "recommendation": "Create a robots.txt file to guide search engine crawlers.",
-            "impact": "Low"
-        })
-        priority.append("Recommended")
+    recommendations = page_recommendations(metadata)
+    priority = [recommendation["category"] for recommendation in recommendations]
+    return recommendations, priority
+
+# Minimum seconds between redraws of the live bulk results table
+BULK_TABLE_REFRESH = 1.0
+
+def dedupe_urls(urls):
+    """Drop URLs whose normalized form was already seen, keeping the first spelling"""
+    seen = set()
+    unique_urls = []
+    for url in urls:
+        key = normalize_url(url)
+        if key not in seen:
+            seen.add(key)
+            unique_urls.append(url)
+    return unique_urls
+
+def is_overload_error(error):
+    """Whether a failed page points at too much load (timeouts, dropped connections, 429/5xx) rather than a bad URL"""
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status == 429 or error.status >= 500
+    return isinstance(error, (asyncio.TimeoutError, aiohttp.ClientConnectionError))
+
+def parse_queue_load():
+    """Fill ratio of the parse queue: 1.0 means the parser processes are the bottleneck"""
+    return parse_stage.queued() / parse_stage.queue_size
+
+async def analyze_bulk_urls_async(urls, quick_audit=None, controller=None):
+    """Analyze multiple URLs as concurrent tasks on the fetch engine loop, yielding each scored result as it completes.
     
-    # Sitemap
-    if not metadata.get('sitemap_exists', False):
-        recommendations.append({
-            "category": "Recommended",
-            "issue": "No Sitemap.xml",
-            "recommendation": "Create a sitemap.xml file to help search engines index your pages.",
-            "impact": "Low"
-        })
-        priority.append("Recommended")
+    The number of pages in flight is set by controller, an adaptive
+    ConcurrencyController (a default one if not given). Pages are started
+    round-robin across hosts, skipping hosts that are at their connection
+    or rate limit, so one large or slow site does not hold up the rest.
+    """
+    if controller is None:
+        controller = ConcurrencyController(cpu_load=parse_queue_load)
+    unique_urls = dedupe_urls(urls)
+    finished = asyncio.Queue()
+    tasks = []
     
-    # Broken links
-    checked_links = metadata.get('checked_links', 0)
-    if checked_links > 0:
-        broken_links = metadata.get('broken_links', 0)
-        broken_ratio = broken_links / checked_links
-        if broken_ratio > 0.1:
-            recommendations.append({
-                "category": "Important",
-                "issue": "Broken Links Detected",
-                "recommendation": f"Fix {broken_links} broken links found in sample check.",
-                "impact": "Medium"
-            })
-            priority.append("Important")
+    async def analyze_one(url):
+        # Runs in its own task, so retries of this page's requests (sub-resources included) are counted here
+        retry_stats = track_retries()
+        try:
+            if quick_audit:
+                metadata = await quick_audit_page(url, quick_audit)
+            else:
+                # Fetching stays on the loop; parsing goes to the process pool
+                metadata = await analyze_page(url, parse_stage.parse)
+            if metadata and isinstance(metadata, dict):
+                metadata['seo_score'] = calculate_seo_score(metadata)
+                # The page request's own time: rate-limit and Crawl-delay waits, probes and parsing
+                # are not server load. Cache hits say nothing about how loaded the sites are
+                controller.record(None if metadata.get('from_cache') else metadata['fetch_time'])
+                return {**metadata, **retry_stats.as_dict()}
+            controller.record()
+            return {
+                "url": url,
+                "error": "Failed to retrieve metadata",
+                "seo_score": 0,
+                **retry_stats.as_dict()
+            }
+        except Exception as e:
+            # Fast failures of an open circuit breaker are not load; the slow ones that tripped it were
+            controller.record(overloaded=is_overload_error(e))
+            return {
+                "url": url,
+                "error": str(e) or type(e).__name__,
+                "seo_score": 0,
+                **retry_stats.as_dict()
+            }
     
-    # Large images
-    large_images = metadata.get('large_images', 0)
-    if large_images > 0:
-        recommendations.append({
-            "category": "Recommended",
-            "issue": "Large Images Detected",
-            "recommendation": f"Optimize {large_images} large images (>500KB) to improve page speed.",
-            "impact": "Low"
-        })
-        priority.append("Recommended")
+    async def run(url):
+        try:
+            result = await analyze_one(url)
+        finally:
+            await controller.release()
+        finished.put_nowait(result)
     
-    # Open Graph tags
-    if not metadata.get('og_tags'):
-        recommendations.append({
-            "category": "Recommended",
-            "issue": "No Open Graph Tags",
-            "recommendation": "Add Open Graph tags to improve social media sharing appearance.",
-            "impact": "Low"
-        })
-        priority.append("Recommended")
+    async def dispatch():
+        scheduler = HostRoundRobin(unique_urls)
+        while len(scheduler):
+            await controller.acquire()
+            tasks.append(asyncio.ensure_future(run(await scheduler.next())))
     
-    # Readability
-    readability_score = metadata.get('readability_score', 0)
-    if readability_score > 0 and readability_score < 30:
-        recommendations.append({
-            "category": "Recommended",
-            "issue": "Low Readability Score",
-            "recommendation": f"Improve content readability (current: {readability_score:.1f}). Use simpler language and shorter sentences.",
-            "impact": "Low"
-        })
-        priority.append("Recommended")
+    def dispatch_done(task):
+        # Without this a failed dispatcher would leave the loop below waiting for pages that never start
+        if not task.cancelled() and task.exception() is not None:
+            finished.put_nowait(task.exception())
     
-    return recommendations, priority
+    dispatcher = asyncio.ensure_future(dispatch())
+    dispatcher.add_done_callback(dispatch_done)
+    try:
+        for _ in unique_urls:
+            result = await finished.get()
+            if isinstance(result, BaseException):
+                raise result
+            yield result
+    finally:
+        # Stopped early (e.g. the Streamlit run was interrupted): drop the pages still pending
+        dispatcher.cancel()
+        for task in tasks:
+            task.cancel()
 
-def analyze_bulk_urls(urls):
-    """Analyze multiple URLs in parallel"""
-    results = []
-    with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-        future_to_url = {executor.submit(get_metadata, url): url for url in urls}
-        for future in concurrent.futures.as_completed(future_to_url):
-            url = future_to_url[future]
-            try:
-                metadata = future.result()
-                if metadata and isinstance(metadata, dict):
-                    metadata['seo_score'] = calculate_seo_score(metadata)
-                    results.append(metadata)
-                else:
-                    results.append({
-                        "url": url,
-                        "error": "Failed to retrieve metadata",
-                        "seo_score": 0
-                    })
-            except Exception as e:
-                results.append({
-                    "url": url,
-                    "error": str(e),
-                    "seo_score": 0
-                })
-    return results
+def analyze_bulk_urls(urls, quick_audit=None, controller=None):
+    """Analyze multiple URLs in parallel, yielding each result as soon as it is ready"""
+    return iter_sync(analyze_bulk_urls_async(urls, quick_audit, controller))
+
+def format_duration(seconds):
+    """Compact h/m/s rendering of a duration, e.g. 1h 02m or 3m 05s"""
+    seconds = int(round(seconds))
+    if seconds >= 3600:
+        return f"{seconds // 3600}h {seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m {seconds % 60:02d}s"
+    return f"{seconds}s"
+
+def bulk_row(result):
+    """Results table row of one analyzed page"""
+    title = result.get('title', 'N/A') or 'N/A'
+    return {
+        "URL": result.get('url', 'N/A'),
+        "SEO Score": result.get('seo_score', 0),
+        "Title": title[:50] if isinstance(title, str) else 'N/A',
+        "Status": result.get('status_code', 'N/A'),
+        "Response Time": f"{result.get('response_time', 0):.2f}s",
+        "Word Count": get_text_stats(result)['word_count'],
+        "Retries": result.get('retries', 0),
+    }
+
+def custom_score_weights(key):
+    """Score weights edited in an expander, or None while they are the defaults"""
+    with st.expander("⚖️ Rescore with custom weights"):
+        st.caption("Pages are rescored from their stored rule inputs in one vectorized pass, without refetching.")
+        columns = st.columns(3)
+        weights = {
+            name: columns[position % 3].number_input(
+                name.replace('_', ' ').capitalize(),
+                # A zero divisor would make the per-point rules meaningless
+                min_value=1 if name.endswith('_per_point') else 0,
+                value=default,
+                step=1,
+                key=f"{key}_weight_{name}",
+            )
+            for position, (name, default) in enumerate(SCORE_WEIGHTS.items())
+        }
+    return weights if weights != SCORE_WEIGHTS else None
 
 # Main App
 st.markdown("""
@@ -647,14 +577,50 @@ with st.sidebar:
         help="Choose how you want to analyze websites"
     )
     
+    # Quick audit: stream only the <head> instead of downloading and parsing the whole page
+    quick_audit = None
+    if st.checkbox("⚡ Quick audit (head only)", help="Read each page only up to </head>. "
+                   "Much faster on large pages, but skips content, image and link checks."):
+        quick_audit = QUICK_AUDIT_HEAD
+        if st.checkbox("Count headings, images and links", help="Keep scanning the body for "
+                       "heading, image and link counts, without building a document tree"):
+            quick_audit = QUICK_AUDIT_OUTLINE
+    
     st.markdown("---")
     st.info("Enter a website URL to analyze its SEO performance and get actionable insights.")
     
     # History management
     if st.button("🗑️ Clear History"):
         st.session_state.analysis_history = []
+        st.session_state.history_features = []
         st.session_state.bulk_results = []
+        st.session_state.bulk_concurrency = []
+        st.session_state.bulk_phrases = None
         st.success("History cleared!")
+    
+    # Persistent analysis cache
+    raw_stats = raw_store.stats()
+    derived_stats = derived_store.stats()
+    st.caption(f"💾 Analysis cache: {raw_stats['entries']} fetched pages ({raw_stats['bytes'] / 1024 / 1024:.1f} MB), "
+               f"{derived_stats['entries']} analyses ({derived_stats['bytes'] / 1024 / 1024:.1f} MB) on disk")
+    memory_stats = metadata_cache.stats()
+    st.caption(f"🧠 Memory cache: {memory_stats['entries']} pages, "
+               f"{memory_stats['bytes'] / 1024 / 1024:.1f}/{memory_stats['max_bytes'] / 1024 / 1024:.0f} MB · "
+               f"{memory_stats['hits']} hits, {memory_stats['misses']} misses, {memory_stats['evictions']} evictions")
+    st.caption(f"📚 Keyword index: document frequencies from {document_index.document_count():,} pages")
+    st.caption(f"🔗 Link status cache: {len(link_status_cache):,} links · {link_status_cache.hit_rate():.0%} hit rate "
+               f"({link_status_cache.hits:,} hits, {link_status_cache.misses:,} misses)")
+    st.caption(f"🔌 Connections since start: {GLOBAL_STATS.requests:,} requests over "
+               f"{GLOBAL_STATS.opened:,} opened connections ({GLOBAL_STATS.reused:,} reused, keep-alive)")
+    st.caption(f"🧩 HTML parser: {PARSER_BACKEND} (set SEO_PARSER_BACKEND to change)")
+    if st.button("🧹 Clear Analysis Cache"):
+        raw_store.clear()
+        derived_store.clear()
+        metadata_cache.clear()
+        st.success("Analysis cache cleared!")
+    if st.button("🗑️ Reset Keyword Index"):
+        document_index.clear()
+        st.success("Keyword index reset: TF-IDF weights start over from the next analyzed page")
 
 # Main content area based on mode
 if analysis_mode == "Single URL":
@@ -664,6 +630,10 @@ if analysis_mode == "Single URL":
         url = st.text_input("Enter website URL:", placeholder="https://www.example.com", label_visibility="collapsed")
     with col2:
         analyze_btn = st.button("🔍 Analyze", type="primary", use_container_width=True)
+    refresh_cached = st.checkbox(
+        "Re-fetch the page (ignore cached results)",
+        help="Cached analyses are reused for up to an hour; tick this after changing the page"
+    )
     
     url_input = url
     analyze_clicked = analyze_btn
@@ -675,53 +645,204 @@ elif analysis_mode == "Bulk Analysis":
         placeholder="https://www.example1.com\nhttps://www.example2.com\nhttps://www.example3.com",
         height=150
     )
+    tracked_keywords_text = st.text_input(
+        "Keywords to track (optional, comma-separated):",
+        placeholder="running shoes, trail, waterproof",
+        help="Whole-word occurrences of each keyword are counted on every page"
+    )
+    min_concurrency, max_concurrency = st.slider(
+        "Pages in flight (min-max):",
+        min_value=1,
+        max_value=500,
+        value=(MIN_CONCURRENCY, MAX_CONCURRENCY),
+        help="The run adapts concurrency within these bounds: it ramps up while sites answer quickly "
+             "and backs off on slow responses, errors or busy CPUs"
+    )
     analyze_btn = st.button("🔍 Analyze All", type="primary", use_container_width=True)
     
     url_input = None
     analyze_clicked = analyze_btn
     if analyze_btn and urls_text:
         urls = [url.strip() for url in urls_text.split('\n') if url.strip()]
+        unique_urls = dedupe_urls(urls)
+        if len(unique_urls) < len(urls):
+            st.info(f"ℹ️ Skipping {len(urls) - len(unique_urls)} duplicate URL(s) that normalize to the same page.")
+        urls = unique_urls
         if urls:
-            with st.spinner(f"🔄 Analyzing {len(urls)} URLs... This may take a while."):
-                bulk_results = analyze_bulk_urls(urls)
-                st.session_state.bulk_results = bulk_results
+            # Results are stored in the session as they arrive, not when the whole batch is done
+            bulk_results = []
+            st.session_state.bulk_results = bulk_results
+            st.session_state.bulk_total = len(urls)
+            st.session_state.bulk_quick_audit = quick_audit
+            # Site-wide phrase counts, and in how many pages each phrase occurs, merged from the page sketches
+            site_phrases = HeavyHitters(PHRASE_SKETCH_MAX_ENTRIES)
+            phrase_pages = HeavyHitters(PHRASE_SKETCH_MAX_ENTRIES)
+            st.session_state.bulk_phrases = (site_phrases, phrase_pages)
+            progress_bar = st.progress(0.0, text=f"🔄 Analyzing {len(urls)} URLs...")
+            live_table = st.empty()
+            live_rows = []
+            failed = 0
+            controller = ConcurrencyController(min_concurrency, max_concurrency, cpu_load=parse_queue_load)
+            started = last_refresh = time.perf_counter()
+            for done, result in enumerate(analyze_bulk_urls(urls, quick_audit, controller), 1):
+                # Merged here and dropped, so the session does not keep a full sketch per page
+                page_phrases = result.pop('phrase_sketch', None)
+                if page_phrases:
+                    site_phrases.merge(page_phrases)
+                    phrase_pages.update((phrase, 1) for phrase in page_phrases["counts"])
+                bulk_results.append(result)
+                if 'error' in result:
+                    failed += 1
+                else:
+                    live_rows.append(bulk_row(result))
+                now = time.perf_counter()
+                rate = done / max(now - started, 1e-6)
+                progress_bar.progress(
+                    done / len(urls),
+                    text=f"🔄 {done}/{len(urls)} URLs ({failed} failed) · {rate:.1f} URLs/s · "
+                         f"ETA {format_duration((len(urls) - done) / rate)} · concurrency {controller.limit} "
+                         f"({controller.throughput():.1f} URLs/s now) · {parse_stage.queued()} waiting to parse"
+                )
+                st.session_state.bulk_concurrency = controller.history
+                if live_rows and now - last_refresh >= BULK_TABLE_REFRESH:
+                    live_table.dataframe(pd.DataFrame(live_rows), use_container_width=True)
+                    last_refresh = now
+            progress_bar.empty()
+            live_table.empty()
+            st.caption(f"⏱️ {len(urls)} URLs in {format_duration(time.perf_counter() - started)}")
+    
+    # Results of the last run, kept in the session so they survive reruns (and a run cut short)
+    bulk_results = st.session_state.bulk_results
+    if bulk_results:
+        bulk_total = st.session_state.get('bulk_total', len(bulk_results))
+        if len(bulk_results) < bulk_total:
+            st.warning(f"⚠️ The last run was interrupted: showing {len(bulk_results)} of {bulk_total} URLs.")
+        else:
+            st.success(f"✅ Analyzed {len(bulk_results)} URLs!")
+        bulk_quick_audit = st.session_state.get('bulk_quick_audit')
+        
+        # How the adaptive concurrency limit moved during the run
+        concurrency_history = st.session_state.get('bulk_concurrency')
+        if concurrency_history and len(concurrency_history) > 1:
+            concurrency_df = pd.DataFrame(concurrency_history, columns=["Seconds", "Concurrency", "URLs/s"])
+            st.caption(f"🎛️ Concurrency: ended at {concurrency_df['Concurrency'].iloc[-1]} pages in flight "
+                       f"(peak {concurrency_df['Concurrency'].max()}), up to {concurrency_df['URLs/s'].max():.1f} URLs/s")
+            with st.expander("Concurrency over time"):
+                fig = px.line(concurrency_df, x="Seconds", y=["Concurrency", "URLs/s"], markers=True)
+                st.plotly_chart(fig, use_container_width=True)
+        if bulk_quick_audit:
+            total_saved = sum(r.get('bytes_saved') or 0 for r in bulk_results)
+            st.caption(f"⚡ Quick audit skipped {total_saved / 1024 / 1024:,.2f} MB of page bodies. "
+                       "Scores leave out the checks it skipped, so compare them only with other quick audits.")
+        
+        # Link status cache effectiveness for this run
+        links_checked = sum(r.get('checked_links', 0) for r in bulk_results)
+        links_cached = sum(r.get('link_cache_hits', 0) for r in bulk_results)
+        links_unchecked = sum(r.get('unchecked_links', 0) for r in bulk_results)
+        images_unprobed = sum(r.get('unprobed_images', 0) for r in bulk_results)
+        if links_unchecked or images_unprobed:
+            st.caption(f"⏳ Cut short by deadlines or open circuit breakers: {links_unchecked} link check(s), "
+                       f"{images_unprobed} image probe(s)")
+        if links_checked:
+            st.caption(f"🔗 Link checks answered from cache: {links_cached}/{links_checked} "
+                       f"({links_cached / links_checked * 100:.1f}% hit rate)")
+        
+        # Retries, circuit breaker trips and the URLs that failed
+        total_retries = sum(r.get('retries', 0) for r in bulk_results)
+        total_trips = sum(r.get('breaker_trips', 0) for r in bulk_results)
+        total_failed_fast = sum(1 for r in bulk_results if r.get('failed_fast') and 'error' in r)
+        if total_retries or total_trips:
+            st.caption(f"🔁 {total_retries} retried request(s) · ⛔ {total_trips} circuit breaker trip(s), "
+                       f"{total_failed_fast} URL(s) failed fast on an open breaker")
+        failed_results = [r for r in bulk_results if r and 'error' in r]
+        if failed_results:
+            with st.expander(f"❌ Failed URLs ({len(failed_results)})"):
+                st.dataframe(pd.DataFrame([
+                    {
+                        "URL": r['url'],
+                        "Error": r['error'],
+                        "Retries": r.get('retries', 0),
+                        "Failed Fast": bool(r.get('failed_fast')),
+                    }
+                    for r in failed_results
+                ]), use_container_width=True)
+                open_breakers = {host: state for host, (state, _) in breaker_states().items() if state != 'closed'}
+                if open_breakers:
+                    st.caption("Circuit breakers not yet closed: " +
+                               ', '.join(f"{host} ({state})" for host, state in open_breakers.items()))
+        
+        # One matcher for all pages; each page is scanned once for every keyword
+        keyword_matcher = KeywordMatcher(tracked_keywords_text.split(',')) if tracked_keywords_text.strip() else None
+        
+        # Top TF-IDF keywords of every page, scored in one batch
+        scored_results = [r for r in bulk_results if r and 'error' not in r]
+        page_keywords = top_tfidf_terms(
+            [candidate_terms(get_text_stats(r)['frequencies']) for r in scored_results],
+            [get_text_stats(r)['word_count'] for r in scored_results],
+            document_index,
+            top_n=5,
+        )
+        top_keywords_by_url = {r['url']: keywords for r, keywords in zip(scored_results, page_keywords)}
+        
+        # Display bulk results
+        bulk_data = []
+        for result in bulk_results:
+            if result and 'error' not in result:
+                bulk_data.append({
+                    **bulk_row(result),
+                    "Top Keywords": ', '.join(term for term, _ in top_keywords_by_url.get(result.get('url'), [])),
+                    "Connections Opened": result.get('connections_opened', 0),
+                    "Connections Reused": result.get('connections_reused', 0)
+                })
+                if bulk_quick_audit:
+                    bytes_saved = result.get('bytes_saved')
+                    bulk_data[-1]["KB Read"] = round(result.get('bytes_read', 0) / 1024, 1)
+                    bulk_data[-1]["KB Saved"] = round(bytes_saved / 1024, 1) if bytes_saved is not None else None
+                if keyword_matcher is not None:
+                    for keyword, count in keyword_matcher.count(result.get('text_content', '')).items():
+                        bulk_data[-1][f"“{keyword}”"] = count
+        
+        if bulk_data:
+            bulk_df = pd.DataFrame(bulk_data)
+            weights = custom_score_weights("bulk")
+            if weights is not None:
+                # bulk_data has one row per scored result, in the same order
+                bulk_df.insert(2, "Rescored", score_frame(feature_frame(scored_results), weights))
+            st.dataframe(bulk_df, use_container_width=True)
             
-            if bulk_results:
-                st.success(f"✅ Analyzed {len(bulk_results)} URLs!")
-                
-                # Display bulk results
-                bulk_data = []
-                for result in bulk_results:
-                    if result and 'error' not in result:
-                        title = result.get('title', 'N/A') or 'N/A'
-                        bulk_data.append({
-                            "URL": result.get('url', 'N/A'),
-                            "SEO Score": result.get('seo_score', 0),
-                            "Title": title[:50] if isinstance(title, str) else 'N/A',
-                            "Status": result.get('status_code', 'N/A'),
-                            "Response Time": f"{result.get('response_time', 0):.2f}s",
-                            "Word Count": len(result.get('text_content', '').split()) if result.get('text_content') else 0
-                        })
-                
-                if bulk_data:
-                    bulk_df = pd.DataFrame(bulk_data)
-                    st.dataframe(bulk_df, use_container_width=True)
-                    
-                    # Visualization
-                    fig = px.bar(bulk_df, x='URL', y='SEO Score', 
-                               title='SEO Scores Comparison',
-                               color='SEO Score',
-                               color_continuous_scale='RdYlGn')
-                    st.plotly_chart(fig, use_container_width=True)
-                    
-                    # Download bulk results
-                    csv = bulk_df.to_csv(index=False)
-                    st.download_button(
-                        label="📥 Download Bulk Results as CSV",
-                        data=csv,
-                        file_name=f"bulk_seo_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                        mime="text/csv"
-                    )
+            # Visualization
+            fig = px.bar(bulk_df, x='URL', y='SEO Score', 
+                       title='SEO Scores Comparison',
+                       color='SEO Score',
+                       color_continuous_scale='RdYlGn')
+            st.plotly_chart(fig, use_container_width=True)
+            
+            # Site-wide phrases from every page's full phrase sketch, merged while the run streamed in
+            site_phrases, phrase_pages = st.session_state.get('bulk_phrases') or (None, None)
+            top_site_phrases = site_phrases.top(20) if site_phrases is not None else []
+            if top_site_phrases:
+                st.subheader("Site-wide Top Phrases")
+                site_phrases_df = pd.DataFrame([
+                    {
+                        "Phrase": phrase,
+                        "Count": count,
+                        "Pages": phrase_pages.counts.get(phrase, 0),
+                    }
+                    for phrase, count in top_site_phrases
+                ])
+                st.dataframe(site_phrases_df, use_container_width=True)
+                if site_phrases.error or phrase_pages.error:
+                    st.caption(f"Counts are lower bounds: the bounded sketches may undercount a phrase by up to "
+                               f"{site_phrases.error} occurrences and {phrase_pages.error} pages")
+            
+            # Download bulk results
+            csv = bulk_df.to_csv(index=False)
+            st.download_button(
+                label="📥 Download Bulk Results as CSV",
+                data=csv,
+                file_name=f"bulk_seo_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                mime="text/csv"
+            )
 
 elif analysis_mode == "Compare URLs":
     st.subheader("⚖️ URL Comparison")
@@ -760,8 +881,6 @@ elif analysis_mode == "Compare URLs":
             # Comparison metrics
             headings1 = safe_get(metadata1, 'headings', {})
             headings2 = safe_get(metadata2, 'headings', {})
-            text_content1 = safe_get(metadata1, 'text_content', '')
-            text_content2 = safe_get(metadata2, 'text_content', '')
             
             comparison_data = {
                 "Metric": ["SEO Score", "Title Length", "Meta Description Length", 
@@ -776,7 +895,7 @@ elif analysis_mode == "Compare URLs":
                     safe_get(metadata1, 'internal_links_count', 0),
                     safe_get(metadata1, 'external_links_count', 0),
                     f"{safe_get(metadata1, 'response_time', 0):.2f}s",
-                    len(text_content1.split()) if text_content1 else 0
+                    get_text_stats(metadata1)['word_count']
                 ],
                 url2: [
                     f"{score2}/100",
@@ -787,7 +906,7 @@ elif analysis_mode == "Compare URLs":
                     safe_get(metadata2, 'internal_links_count', 0),
                     safe_get(metadata2, 'external_links_count', 0),
                     f"{safe_get(metadata2, 'response_time', 0):.2f}s",
-                    len(text_content2.split()) if text_content2 else 0
+                    get_text_stats(metadata2)['word_count']
                 ]
             }
             
@@ -809,6 +928,9 @@ elif analysis_mode == "History":
     st.subheader("📜 Analysis History")
     if st.session_state.analysis_history:
         history_df = pd.DataFrame(st.session_state.analysis_history)
+        weights = custom_score_weights("history")
+        if weights is not None:
+            history_df.insert(2, "Rescored", score_frame(features_to_frame(st.session_state.history_features), weights))
         st.dataframe(history_df, use_container_width=True)
         
         if st.button("📥 Export History as CSV"):
@@ -832,10 +954,18 @@ if analysis_mode == "Single URL" and (url_input or analyze_clicked):
                 st.warning("⚠️ Please enter a valid URL starting with http:// or https://")
             else:
                 with st.spinner("🔄 Analyzing website... This may take a few seconds."):
-                    metadata = get_metadata(url_input)
+                    # Only the click re-fetches; later reruns of the script reuse that result
+                    metadata = get_metadata(url_input, quick_audit, refresh=refresh_cached and analyze_clicked)
                 
                 if metadata and isinstance(metadata, dict):
                     st.success('✅ Analysis Complete!')
+                    if metadata.get('from_cache'):
+                        st.caption(f"♻️ Served from the analysis cache (analyzed {metadata.get('timestamp', 'earlier')[:19].replace('T', ' ')})")
+                    if metadata.get('quick_audit'):
+                        bytes_saved = metadata.get('bytes_saved')
+                        saved = f"{bytes_saved / 1024:,.1f} KB saved" if bytes_saved is not None else "size of the rest unknown"
+                        st.caption(f"⚡ Quick audit: read {metadata.get('bytes_read', 0) / 1024:,.1f} KB of the page ({saved}). "
+                                   "Content, image and link checks were skipped and are left out of the score.")
                     
                     # Save to history
                     seo_score = calculate_seo_score(metadata)
@@ -847,6 +977,7 @@ if analysis_mode == "Single URL" and (url_input or analyze_clicked):
                         "Date": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
                     }
                     st.session_state.analysis_history.append(history_entry)
+                    st.session_state.history_features.append(score_features(metadata))
                     
                     # SEO Score Card
                     score_color = "🟢" if seo_score >= 70 else "🟡" if seo_score >= 50 else "🔴"
@@ -859,12 +990,17 @@ if analysis_mode == "Single URL" and (url_input or analyze_clicked):
                     with col3:
                         st.metric("Status Code", metadata.get('status_code', 'N/A'))
                     with col4:
-                        text_content = metadata.get('text_content', '')
-                        word_count = len(text_content.split()) if text_content else 0
-                        st.metric("Word Count", f"{word_count:,}")
+                        text_stats = get_text_stats(metadata)
+                        if not_scanned(metadata, 'word_count'):
+                            st.metric("Word Count", "Not scanned")
+                        else:
+                            st.metric("Word Count", f"{text_stats['word_count']:,}")
                     with col5:
                         readability = metadata.get('readability_score', 0)
-                        st.metric("Readability", f"{readability:.1f}" if readability > 0 else "N/A")
+                        if not_scanned(metadata, 'readability_score'):
+                            st.metric("Readability", "Not scanned")
+                        else:
+                            st.metric("Readability", f"{readability:.1f}" if readability > 0 else "N/A")
                     
                     st.markdown("---")
                     
@@ -907,20 +1043,12 @@ if analysis_mode == "Single URL" and (url_input or analyze_clicked):
                             st.plotly_chart(fig, use_container_width=True)
                         
                         with col2:
-                            # SEO Factors Breakdown
-                            title_score = 15 if metadata.get('title') and 30 <= metadata.get('title_length', 0) <= 60 else (10 if metadata.get('title') else 0)
-                            desc_score = 15 if 120 <= metadata.get('meta_description_length', 0) <= 160 else (10 if metadata.get('meta_description_length', 0) > 0 else 0)
-                            headings_score = 15 if len(metadata.get('headings', {}).get('h1', [])) == 1 else (5 if len(metadata.get('headings', {}).get('h1', [])) > 0 else 0)
-                            images_score = min(10, int(10 * (metadata.get('images_with_alt', 0) / max(metadata.get('images_total', 1), 1))))
-                            mobile_score = 10 if metadata.get('is_mobile_friendly', False) else 0
-                            schema_score = 10 if metadata.get('has_schema', False) else 0
-                            links_score = min(5, metadata.get('internal_links_count', 0) // 5)
-                            content_score = 10 if len(metadata.get('text_content', '').split()) >= 300 else (7 if len(metadata.get('text_content', '').split()) >= 200 else (4 if len(metadata.get('text_content', '').split()) >= 100 else 0))
-                            
+                            # SEO Factors Breakdown, straight from the rule table the score comes from
+                            breakdown = score_breakdown(metadata)
                             factors_data = pd.DataFrame({
-                                'Factor': ['Title', 'Meta Desc', 'Headings', 'Images', 'Mobile', 'Schema', 'Links', 'Content'],
-                                'Score': [title_score, desc_score, headings_score, images_score, mobile_score, schema_score, links_score, content_score],
-                                'Max': [15, 15, 15, 10, 10, 10, 5, 10]
+                                'Factor': [rule.replace('_', ' ').title() for rule, _, _ in breakdown],
+                                'Score': [points for _, points, _ in breakdown],
+                                'Max': [max_points for _, _, max_points in breakdown]
                             })
                             
                             fig = go.Figure()
@@ -953,7 +1081,9 @@ if analysis_mode == "Single URL" and (url_input or analyze_clicked):
                         h2_count = len(headings.get('h2', []))
                         h3_count = len(headings.get('h3', []))
                         
-                        if h1_count > 0 or h2_count > 0 or h3_count > 0:
+                        if not_scanned(metadata, 'h1_count'):
+                            st.info(f"{NOT_SCANNED}: headings are in the page body")
+                        elif h1_count > 0 or h2_count > 0 or h3_count > 0:
                             headings_df = pd.DataFrame({
                                 'Level': ['H1', 'H2', 'H3'],
                                 'Count': [h1_count, h2_count, h3_count]
@@ -1001,213 +1131,227 @@ if analysis_mode == "Single URL" and (url_input or analyze_clicked):
                         h2_count = len(headings.get('h2', []))
                         h3_count = len(headings.get('h3', []))
                         
-                        col1, col2, col3 = st.columns(3)
-                        with col1:
-                            st.metric("H1 Tags", h1_count, "✅" if h1_count == 1 else "⚠️")
-                        with col2:
-                            st.metric("H2 Tags", h2_count)
-                        with col3:
-                            st.metric("H3 Tags", h3_count)
+                        if not_scanned(metadata, 'h1_count'):
+                            st.info(f"{NOT_SCANNED}: headings are in the page body")
+                        else:
+                            col1, col2, col3 = st.columns(3)
+                            with col1:
+                                st.metric("H1 Tags", h1_count, "✅" if h1_count == 1 else "⚠️")
+                            with col2:
+                                st.metric("H2 Tags", h2_count)
+                            with col3:
+                                st.metric("H3 Tags", h3_count)
                         
-                        if h1_count == 0:
-                            st.error("❌ No H1 tag found!")
-                        elif h1_count > 1:
-                            st.warning(f"⚠️ Multiple H1 tags found ({h1_count}). Recommended: 1 H1 tag per page.")
+                            if h1_count == 0:
+                                st.error("❌ No H1 tag found!")
+                            elif h1_count > 1:
+                                st.warning(f"⚠️ Multiple H1 tags found ({h1_count}). Recommended: 1 H1 tag per page.")
                         
-                        if headings.get('h1'):
-                            st.write("**H1 Tags:**")
-                            for h1 in headings.get('h1', []):
-                                st.write(f"- {h1}")
+                            if headings.get('h1'):
+                                st.write("**H1 Tags:**")
+                                for h1 in headings.get('h1', []):
+                                    st.write(f"- {h1}")
                     
                     with tab2:
                         st.header("📝 Content Analysis")
                         
-                        text_content = metadata.get('text_content', '')
-                        if text_content:
-                            total_words, most_common_words = analyze_keywords(text_content)
+                        if not_scanned(metadata, 'word_count'):
+                            st.info(f"{NOT_SCANNED}: the page text is not read, so there are no word counts, "
+                                    "content statistics or readability scores")
                         else:
-                            total_words = 0
-                            most_common_words = []
-                        
-                        col1, col2 = st.columns(2)
-                        with col1:
-                            st.metric("Total Words", f"{total_words:,}")
-                            st.metric("Characters", f"{len(text_content):,}")
-                        with col2:
-                            st.metric("Sentences", len(re.split(r'[.!?]+', text_content)) if text_content else 0)
-                            st.metric("Paragraphs", len(text_content.split('\n\n')) if text_content else 0)
+                            total_words, most_common_words = analyze_keywords(text_stats)
                         
-                        # Content Metrics Visualization
-                        st.subheader("Content Metrics")
-                        col1, col2 = st.columns(2)
-                        with col1:
-                            # Word count vs recommended
-                            content_metrics = pd.DataFrame({
-                                'Metric': ['Current', 'Recommended Min'],
-                                'Word Count': [total_words, 300]
-                            })
-                            fig = px.bar(content_metrics, x='Metric', y='Word Count',
-                                       title='Word Count vs Recommended',
-                                       color='Metric',
-                                       color_discrete_map={'Current': 'lightblue', 'Recommended Min': 'lightgray'})
-                            fig.update_layout(height=300)
-                            st.plotly_chart(fig, use_container_width=True)
+                            col1, col2 = st.columns(2)
+                            with col1:
+                                st.metric("Total Words", f"{total_words:,}")
+                                st.metric("Characters", f"{text_stats['char_count']:,}")
+                            with col2:
+                                st.metric("Sentences", text_stats['sentence_count'])
+                                st.metric("Paragraphs", text_stats['paragraph_count'])
                         
-                        with col2:
-                            # Readability Score Visualization
-                            readability = metadata.get('readability_score', 0)
-                            if readability > 0:
-                                readability_categories = ['Very Difficult', 'Difficult', 'Fairly Difficult', 
-                                                         'Standard', 'Fairly Easy', 'Easy', 'Very Easy']
-                                readability_ranges = [0, 30, 50, 60, 70, 80, 90, 100]
-                                readability_level = "Not Available"
-                                if readability >= 90:
-                                    readability_level = "Very Easy"
-                                elif readability >= 80:
-                                    readability_level = "Easy"
-                                elif readability >= 70:
-                                    readability_level = "Fairly Easy"
-                                elif readability >= 60:
-                                    readability_level = "Standard"
-                                elif readability >= 50:
-                                    readability_level = "Fairly Difficult"
-                                elif readability >= 30:
-                                    readability_level = "Difficult"
-                                else:
-                                    readability_level = "Very Difficult"
-                                
-                                fig = go.Figure(go.Indicator(
-                                    mode = "gauge+number",
-                                    value = readability,
-                                    domain = {'x': [0, 1], 'y': [0, 1]},
-                                    title = {'text': f"Readability<br>{readability_level}"},
-                                    gauge = {
-                                        'axis': {'range': [None, 100]},
-                                        'bar': {'color': "green" if readability >= 60 else "orange" if readability >= 30 else "red"},
-                                        'steps': [
-                                            {'range': [0, 30], 'color': "lightgray"},
-                                            {'range': [30, 60], 'color': "gray"}
-                                        ]
-                                    }
-                                ))
+                            # Content Metrics Visualization
+                            st.subheader("Content Metrics")
+                            col1, col2 = st.columns(2)
+                            with col1:
+                                # Word count vs recommended
+                                content_metrics = pd.DataFrame({
+                                    'Metric': ['Current', 'Recommended Min'],
+                                    'Word Count': [total_words, 300]
+                                })
+                                fig = px.bar(content_metrics, x='Metric', y='Word Count',
+                                           title='Word Count vs Recommended',
+                                           color='Metric',
+                                           color_discrete_map={'Current': 'lightblue', 'Recommended Min': 'lightgray'})
                                 fig.update_layout(height=300)
                                 st.plotly_chart(fig, use_container_width=True)
-                            else:
-                                st.info("Readability score not available")
                         
-                        # Content Statistics
-                        if text_content:
-                            sentences = re.split(r'[.!?]+', text_content)
-                            sentences = [s.strip() for s in sentences if s.strip()]
-                            avg_sentence_length = sum(len(s.split()) for s in sentences) / len(sentences) if sentences else 0
-                            avg_word_length = sum(len(word) for word in text_content.split()) / total_words if total_words > 0 else 0
-                            
-                            stats_data = pd.DataFrame({
-                                'Metric': ['Avg Sentence Length', 'Avg Word Length', 'Total Sentences', 'Total Paragraphs'],
-                                'Value': [avg_sentence_length, avg_word_length, len(sentences), len(text_content.split('\n\n'))]
-                            })
+                            with col2:
+                                # Readability Score Visualization
+                                readability = metadata.get('readability_score', 0)
+                                if readability > 0:
+                                    readability_categories = ['Very Difficult', 'Difficult', 'Fairly Difficult', 
+                                                             'Standard', 'Fairly Easy', 'Easy', 'Very Easy']
+                                    readability_ranges = [0, 30, 50, 60, 70, 80, 90, 100]
+                                    readability_level = "Not Available"
+                                    if readability >= 90:
+                                        readability_level = "Very Easy"
+                                    elif readability >= 80:
+                                        readability_level = "Easy"
+                                    elif readability >= 70:
+                                        readability_level = "Fairly Easy"
+                                    elif readability >= 60:
+                                        readability_level = "Standard"
+                                    elif readability >= 50:
+                                        readability_level = "Fairly Difficult"
+                                    elif readability >= 30:
+                                        readability_level = "Difficult"
+                                    else:
+                                        readability_level = "Very Difficult"
+                                
+                                    fig = go.Figure(go.Indicator(
+                                        mode = "gauge+number",
+                                        value = readability,
+                                        domain = {'x': [0, 1], 'y': [0, 1]},
+                                        title = {'text': f"Readability<br>{readability_level}"},
+                                        gauge = {
+                                            'axis': {'range': [None, 100]},
+                                            'bar': {'color': "green" if readability >= 60 else "orange" if readability >= 30 else "red"},
+                                            'steps': [
+                                                {'range': [0, 30], 'color': "lightgray"},
+                                                {'range': [30, 60], 'color': "gray"}
+                                            ]
+                                        }
+                                    ))
+                                    fig.update_layout(height=300)
+                                    st.plotly_chart(fig, use_container_width=True)
+                                else:
+                                    st.info("Readability score not available")
+                        
+                            # Grade-level readability indices
+                            readability_indices = metadata.get('readability', {})
+                            if readability_indices.get('flesch_kincaid_grade'):
+                                col1, col2, col3 = st.columns(3)
+                                with col1:
+                                    st.metric("Flesch-Kincaid Grade", f"{readability_indices['flesch_kincaid_grade']:.1f}")
+                                with col2:
+                                    st.metric("Gunning Fog", f"{readability_indices.get('gunning_fog', 0):.1f}")
+                                with col3:
+                                    smog = readability_indices.get('smog_index', 0)
+                                    st.metric("SMOG Index", f"{smog:.1f}" if smog else "N/A")
+                        
+                            # Content Statistics
+                            if total_words:
+                                stats_data = pd.DataFrame({
+                                    'Metric': ['Avg Sentence Length', 'Avg Word Length', 'Total Sentences', 'Total Paragraphs'],
+                                    'Value': [text_stats['avg_sentence_length'], text_stats['avg_word_length'],
+                                              text_stats['sentence_count'], text_stats['paragraph_count']]
+                                })
                             
-                            fig = px.bar(stats_data, x='Metric', y='Value',
-                                       title='Content Statistics',
-                                       color='Value',
-                                       color_continuous_scale='Viridis')
-                            st.plotly_chart(fig, use_container_width=True)
+                                fig = px.bar(stats_data, x='Metric', y='Value',
+                                           title='Content Statistics',
+                                           color='Value',
+                                           color_continuous_scale='Viridis')
+                                st.plotly_chart(fig, use_container_width=True)
                         
-                        # Most Common Words
-                        st.subheader("Most Common Words (Top 50)")
-                        stop_words = set(stopwords.words('english'))
-                        symbols_to_exclude = set(string.punctuation)
+                            # Most Common Words
+                            st.subheader("Most Common Words (Top 50)")
+                            stop_words = get_stop_words()
+                            symbols_to_exclude = set(string.punctuation)
                         
-                        filtered_words = [
-                            (word, count) for word, count in most_common_words
-                            if word.lower() not in stop_words 
-                            and not any(char in symbols_to_exclude for char in word)
-                            and len(word) > 1
-                        ]
+                            filtered_words = [
+                                (word, count) for word, count in most_common_words
+                                if word.lower() not in stop_words 
+                                and not any(char in symbols_to_exclude for char in word)
+                                and len(word) > 1
+                            ]
                         
-                        if filtered_words:
-                            words, counts = zip(*filtered_words[:50])
-                            most_common_df = pd.DataFrame({"Word": words, "Count": counts})
-                            st.dataframe(most_common_df, use_container_width=True)
+                            if filtered_words:
+                                words, counts = zip(*filtered_words[:50])
+                                most_common_df = pd.DataFrame({"Word": words, "Count": counts})
+                                st.dataframe(most_common_df, use_container_width=True)
                             
-                            col1, col2 = st.columns(2)
-                            with col1:
-                                fig = px.bar(most_common_df.head(20), x='Word', y='Count', 
-                                           title='Top 20 Most Common Words',
-                                           color='Count',
-                                           color_continuous_scale='Blues')
-                                st.plotly_chart(fig, use_container_width=True)
-                            with col2:
-                                fig = px.pie(most_common_df.head(10), values='Count', names='Word',
-                                           title='Top 10 Words Distribution')
-                                st.plotly_chart(fig, use_container_width=True)
+                                col1, col2 = st.columns(2)
+                                with col1:
+                                    fig = px.bar(most_common_df.head(20), x='Word', y='Count', 
+                                               title='Top 20 Most Common Words',
+                                               color='Count',
+                                               color_continuous_scale='Blues')
+                                    st.plotly_chart(fig, use_container_width=True)
+                                with col2:
+                                    fig = px.pie(most_common_df.head(10), values='Count', names='Word',
+                                               title='Top 10 Words Distribution')
+                                    st.plotly_chart(fig, use_container_width=True)
                     
                     with tab3:
                         st.header("🔗 Links & Images Analysis")
                         
-                        col1, col2 = st.columns(2)
-                        with col1:
-                            st.subheader("Images")
-                            images_total = metadata.get('images_total', 0)
-                            images_with_alt = metadata.get('images_with_alt', 0)
-                            images_without_alt = metadata.get('images_without_alt', 0)
-                            st.metric("Total Images", images_total)
-                            st.metric("With Alt Text", images_with_alt, 
-                                     delta=f"{images_with_alt/images_total*100:.1f}%" if images_total > 0 else "N/A")
-                            st.metric("Without Alt Text", images_without_alt)
+                        if not_scanned(metadata, 'images_total', 'internal_links_count'):
+                            st.info(f"{NOT_SCANNED}: images and links are in the page body "
+                                    "(the outline quick audit counts them)")
+                        else:
+                            col1, col2 = st.columns(2)
+                            with col1:
+                                st.subheader("Images")
+                                images_total = metadata.get('images_total', 0)
+                                images_with_alt = metadata.get('images_with_alt', 0)
+                                images_without_alt = metadata.get('images_without_alt', 0)
+                                st.metric("Total Images", images_total)
+                                st.metric("With Alt Text", images_with_alt, 
+                                         delta=f"{images_with_alt/images_total*100:.1f}%" if images_total > 0 else "N/A")
+                                st.metric("Without Alt Text", images_without_alt)
                             
-                            if images_total > 0:
-                                alt_ratio = images_with_alt / images_total
-                                if alt_ratio < 0.8:
-                                    st.warning("⚠️ Some images are missing alt text. This affects accessibility and SEO.")
+                                if images_total > 0:
+                                    alt_ratio = images_with_alt / images_total
+                                    if alt_ratio < 0.8:
+                                        st.warning("⚠️ Some images are missing alt text. This affects accessibility and SEO.")
                                 
-                                # Alt Text Coverage Visualization
-                                alt_data = pd.DataFrame({
-                                    'Status': ['With Alt Text', 'Without Alt Text'],
-                                    'Count': [images_with_alt, images_without_alt]
+                                    # Alt Text Coverage Visualization
+                                    alt_data = pd.DataFrame({
+                                        'Status': ['With Alt Text', 'Without Alt Text'],
+                                        'Count': [images_with_alt, images_without_alt]
+                                    })
+                                    fig = px.pie(alt_data, values='Count', names='Status',
+                                               title='Image Alt Text Coverage',
+                                               color='Status',
+                                               color_discrete_map={'With Alt Text': 'green', 'Without Alt Text': 'red'})
+                                    st.plotly_chart(fig, use_container_width=True)
+                        
+                            with col2:
+                                st.subheader("Links")
+                                internal_links = metadata.get('internal_links_count', 0)
+                                external_links = metadata.get('external_links_count', 0)
+                                st.metric("Internal Links", internal_links)
+                                st.metric("External Links", external_links)
+                            
+                                # Links visualization
+                                links_data = pd.DataFrame({
+                                    'Type': ['Internal', 'External'],
+                                    'Count': [internal_links, external_links]
                                 })
-                                fig = px.pie(alt_data, values='Count', names='Status',
-                                           title='Image Alt Text Coverage',
-                                           color='Status',
-                                           color_discrete_map={'With Alt Text': 'green', 'Without Alt Text': 'red'})
+                                fig = px.pie(links_data, values='Count', names='Type', 
+                                           title='Link Distribution')
                                 st.plotly_chart(fig, use_container_width=True)
-                        
-                        with col2:
-                            st.subheader("Links")
-                            internal_links = metadata.get('internal_links_count', 0)
-                            external_links = metadata.get('external_links_count', 0)
-                            st.metric("Internal Links", internal_links)
-                            st.metric("External Links", external_links)
                             
-                            # Links visualization
-                            links_data = pd.DataFrame({
-                                'Type': ['Internal', 'External'],
-                                'Count': [internal_links, external_links]
+                                # Links Bar Chart
+                                if internal_links > 0 or external_links > 0:
+                                    fig = px.bar(links_data, x='Type', y='Count',
+                                               title='Internal vs External Links',
+                                               color='Type',
+                                               color_discrete_map={'Internal': 'blue', 'External': 'orange'})
+                                    st.plotly_chart(fig, use_container_width=True)
+                        
+                            # Combined Visualization
+                            st.subheader("Links & Images Overview")
+                            combined_data = pd.DataFrame({
+                                'Category': ['Images with Alt', 'Images without Alt', 'Internal Links', 'External Links'],
+                                'Count': [images_with_alt, images_without_alt, internal_links, external_links]
                             })
-                            fig = px.pie(links_data, values='Count', names='Type', 
-                                       title='Link Distribution')
+                            fig = px.bar(combined_data, x='Category', y='Count',
+                                       title='Links and Images Summary',
+                                       color='Count',
+                                       color_continuous_scale='Viridis')
+                            fig.update_xaxes(tickangle=-45)
                             st.plotly_chart(fig, use_container_width=True)
-                            
-                            # Links Bar Chart
-                            if internal_links > 0 or external_links > 0:
-                                fig = px.bar(links_data, x='Type', y='Count',
-                                           title='Internal vs External Links',
-                                           color='Type',
-                                           color_discrete_map={'Internal': 'blue', 'External': 'orange'})
-                                st.plotly_chart(fig, use_container_width=True)
-                        
-                        # Combined Visualization
-                        st.subheader("Links & Images Overview")
-                        combined_data = pd.DataFrame({
-                            'Category': ['Images with Alt', 'Images without Alt', 'Internal Links', 'External Links'],
-                            'Count': [images_with_alt, images_without_alt, internal_links, external_links]
-                        })
-                        fig = px.bar(combined_data, x='Category', y='Count',
-                                   title='Links and Images Summary',
-                                   color='Count',
-                                   color_continuous_scale='Viridis')
-                        fig.update_xaxes(tickangle=-45)
-                        st.plotly_chart(fig, use_container_width=True)
                     
                     with tab4:
                         st.header("📈 Keyword Analysis")
@@ -1224,13 +1368,12 @@ if analysis_mode == "Single URL" and (url_input or analyze_clicked):
                             text_content = metadata.get('text_content', '')
                             if keywords_list and text_content:
                                 st.subheader("Keyword Density Analysis")
-                                total_words = len(text_content.split())
+                                total_words = text_stats['word_count']
                                 keyword_density_data = []
+                                keyword_counts = KeywordMatcher(keywords_list).count(text_content)
                                 
                                 for keyword in keywords_list:
-                                    keyword_lower = keyword.lower()
-                                    text_lower = text_content.lower()
-                                    keyword_count = text_lower.count(keyword_lower)
+                                    keyword_count = keyword_counts.get(keyword.lower(), 0)
                                     keyword_density = (keyword_count / total_words) * 100 if total_words > 0 else 0
                                     
                                     if keyword_density > 0:
@@ -1261,23 +1404,34 @@ if analysis_mode == "Single URL" and (url_input or analyze_clicked):
                                         )])
                                         fig.update_layout(title='Keyword Density Distribution')
                                         st.plotly_chart(fig, use_container_width=True)
+                        elif not_scanned(metadata, 'word_count'):
+                            st.info(f"No meta keywords found. Keywords from the page content: {NOT_SCANNED.lower()}")
                         else:
                             st.info("No meta keywords found. Analyzing content for top keywords...")
                             
                             # Extract keywords from content
-                            text_content = metadata.get('text_content', '')
-                            if text_content:
-                                top_keywords = extract_keywords_tfidf(text_content, top_n=20)
-                            else:
-                                top_keywords = []
+                            top_keywords = extract_keywords_tfidf(text_stats, top_n=20)
                             if top_keywords:
                                 st.subheader("Top Keywords from Content")
-                                keywords_df = pd.DataFrame(top_keywords, columns=['Keyword', 'Frequency'])
+                                st.caption(f"TF-IDF weighted against {document_index.document_count():,} analyzed pages")
+                                keywords_df = pd.DataFrame(top_keywords, columns=['Keyword', 'TF-IDF Score'])
                                 st.dataframe(keywords_df, use_container_width=True)
                                 
-                                fig = px.bar(keywords_df.head(15), x='Keyword', y='Frequency',
-                                           title='Top 15 Keywords by Frequency')
+                                fig = px.bar(keywords_df.head(15), x='Keyword', y='TF-IDF Score',
+                                           title='Top 15 Keywords by TF-IDF')
                                 st.plotly_chart(fig, use_container_width=True)
+                        
+                        # Multi-word phrases (2-4 words)
+                        top_page_phrases = metadata.get('top_phrases', [])
+                        if top_page_phrases:
+                            st.subheader("Top Phrases")
+                            phrases_df = pd.DataFrame(top_page_phrases, columns=['Phrase', 'Count'])
+                            phrases_df['Words'] = phrases_df['Phrase'].str.count(' ') + 1
+                            st.dataframe(phrases_df.head(25), use_container_width=True)
+                            
+                            fig = px.bar(phrases_df.head(15), x='Phrase', y='Count', color='Words',
+                                       title='Top 15 Phrases')
+                            st.plotly_chart(fig, use_container_width=True)
                     
                     with tab5:
                         st.header("🎯 Technical SEO")
@@ -1298,6 +1452,8 @@ if analysis_mode == "Single URL" and (url_input or analyze_clicked):
                                 1 if metadata.get('robots_meta') else 0
                             ]
                         })
+                        if not_scanned(metadata, 'has_schema'):
+                            tech_factors = tech_factors[tech_factors['Factor'] != 'Schema Markup']
                         
                         fig = px.bar(tech_factors, x='Factor', y='Status',
                                    title='Technical SEO Factors Status',
@@ -1322,7 +1478,9 @@ if analysis_mode == "Single URL" and (url_input or analyze_clicked):
                         # Schema Markup
                         st.subheader("Schema Markup")
                         has_schema = metadata.get('has_schema', False)
-                        if has_schema:
+                        if not_scanned(metadata, 'has_schema'):
+                            st.info(f"{NOT_SCANNED}: structured data may sit anywhere in the page body")
+                        elif has_schema:
                             schema_count = metadata.get('schema_count', 0)
                             st.success(f"✅ Schema markup found ({schema_count} schema(s))")
                             
@@ -1460,6 +1618,12 @@ if analysis_mode == "Single URL" and (url_input or analyze_clicked):
                             1 if large_imgs == 0 else 0,
                             1 if broken_ratio < 0.1 else 0,
                         ]
+                        perf_names = ['Fast Response', 'No Large Images', 'No Broken Links']
+                        perf_inputs = [(), ('large_images',), ('checked_links',)]
+                        perf_names, perf_factors = zip(*[
+                            (name, status) for name, status, inputs in zip(perf_names, perf_factors, perf_inputs)
+                            if not not_scanned(metadata, *inputs)
+                        ])
                         performance_score = sum(perf_factors)
                         
                         col1, col2 = st.columns(2)
@@ -1487,8 +1651,8 @@ if analysis_mode == "Single URL" and (url_input or analyze_clicked):
                         with col2:
                             # Performance Factors
                             perf_data = pd.DataFrame({
-                                'Factor': ['Fast Response', 'No Large Images', 'No Broken Links'],
-                                'Status': perf_factors
+                                'Factor': list(perf_names),
+                                'Status': list(perf_factors)
                             })
                             fig = px.bar(perf_data, x='Factor', y='Status',
                                        title='Performance Factors',
@@ -1515,9 +1679,15 @@ if analysis_mode == "Single URL" and (url_input or analyze_clicked):
                             st.subheader("Robots.txt")
                             if metadata.get('robots_txt_exists'):
                                 st.success("✅ robots.txt file found")
+                                if metadata.get('crawl_delay'):
+                                    st.info(f"🐢 Crawl-delay: {metadata['crawl_delay']:g}s: every request to this site is spaced "
+                                            "accordingly, image and link checks included, so with a long delay most "
+                                            "of them are left unchecked")
                                 if metadata.get('robots_txt_content'):
                                     with st.expander("View robots.txt content"):
                                         st.code(metadata.get('robots_txt_content', ''), language='text')
+                            elif known_flag(metadata, 'robots_txt_exists') is None:
+                                st.info("❔ robots.txt could not be checked (request failed)")
                             else:
                                 st.warning("⚠️ robots.txt file not found")
                             
@@ -1527,6 +1697,8 @@ if analysis_mode == "Single URL" and (url_input or analyze_clicked):
                                 st.success("✅ sitemap.xml found")
                             elif metadata.get('sitemap_in_robots'):
                                 st.info("ℹ️ Sitemap referenced in robots.txt")
+                            elif known_flag(metadata, 'sitemap_exists') is None:
+                                st.info("❔ sitemap.xml could not be checked (request failed)")
                             else:
                                 st.warning("⚠️ sitemap.xml not found")
                         
@@ -1564,17 +1736,30 @@ if analysis_mode == "Single URL" and (url_input or analyze_clicked):
                             fig.update_layout(height=250)
                             st.plotly_chart(fig, use_container_width=True)
                             
+                            # Connection reuse
+                            opened = metadata.get('connections_opened', 0)
+                            reused = metadata.get('connections_reused', 0)
+                            st.info(f"🔌 Connections: {opened} opened, {reused} reused (keep-alive)")
+                            
                             # Large images
                             large_imgs = metadata.get('large_images', 0)
-                            if large_imgs > 0:
+                            if not_scanned(metadata, 'large_images'):
+                                st.info(f"Image sizes: {NOT_SCANNED.lower()}")
+                            elif large_imgs > 0:
                                 st.warning(f"⚠️ {large_imgs} large images detected (>500KB)")
                             else:
                                 st.success("✅ No large images detected")
+                            if metadata.get('unprobed_images', 0):
+                                st.caption(f"⏳ {metadata['unprobed_images']} image(s) were not checked (not in time "
+                                           "under the site's rate limit or Crawl-delay, or their site is failing); "
+                                           "there may be more large images")
                             
                             # Broken links
                             broken = metadata.get('broken_links', 0)
                             checked = metadata.get('checked_links', 0)
-                            if checked > 0:
+                            if not_scanned(metadata, 'checked_links'):
+                                st.info(f"Broken links: {NOT_SCANNED.lower()}")
+                            elif checked > 0:
                                 if broken > 0:
                                     st.warning(f"⚠️ {broken} broken links found (out of {checked} checked)")
                                     # Broken links visualization
@@ -1589,10 +1774,15 @@ if analysis_mode == "Single URL" and (url_input or analyze_clicked):
                                     st.plotly_chart(fig, use_container_width=True)
                                 else:
                                     st.success(f"✅ No broken links found (checked {checked} links)")
+                            if metadata.get('unchecked_links', 0):
+                                st.caption(f"⏳ {metadata['unchecked_links']} sampled link(s) were not checked "
+                                           "(not in time, or their site is failing)")
                             
                             # Readability
                             readability = metadata.get('readability_score', 0)
-                            if readability > 0:
+                            if not_scanned(metadata, 'readability_score'):
+                                st.info(f"Readability: {NOT_SCANNED.lower()}")
+                            elif readability > 0:
                                 if readability >= 60:
                                     st.success(f"✅ Good readability: {readability:.1f}")
                                 elif readability >= 30:
@@ -1621,7 +1811,9 @@ if analysis_mode == "Single URL" and (url_input or analyze_clicked):
                         # Schema Markup
                         st.subheader("Schema Markup")
                         has_schema = metadata.get('has_schema', False)
-                        if has_schema:
+                        if not_scanned(metadata, 'has_schema'):
+                            st.info(f"{NOT_SCANNED}: structured data may sit anywhere in the page body")
+                        elif has_schema:
                             schema_count = metadata.get('schema_count', 0)
                             st.success(f"✅ Schema markup found ({schema_count} schema(s))")
                         else:
@@ -1668,7 +1860,6 @@ if analysis_mode == "Single URL" and (url_input or analyze_clicked):
                         
                         # Safe access to all metadata fields
                         headings = metadata.get('headings', {})
-                        text_content = metadata.get('text_content', '')
                         title = metadata.get('title') or "N/A"
                         meta_desc = metadata.get('meta_description') or "N/A"
                         meta_keywords = metadata.get('meta_keywords') or "N/A"
@@ -1682,9 +1873,9 @@ if analysis_mode == "Single URL" and (url_input or analyze_clicked):
                                 "Total Images", "Images with Alt", "Images without Alt", "Large Images",
                                 "Internal Links", "External Links", "Broken Links",
                                 "Mobile Friendly", "HTTPS", "Schema Markup", "Canonical URL",
-                                "Robots.txt", "Sitemap", "Readability Score", "Page Language",
+                                "Robots.txt", "Sitemap", "Readability Score", "Reading Grade (Flesch-Kincaid)", "Page Language",
                                 "Response Time", "Status Code", "Content Length",
-                                "Word Count", "SEO Score"
+                                "Connections Opened/Reused", "Word Count", "SEO Score"
                             ],
                             "Value": [
                                 metadata.get('url', 'N/A'),
@@ -1707,18 +1898,25 @@ if analysis_mode == "Single URL" and (url_input or analyze_clicked):
                                 "Yes" if metadata.get('is_https', False) else "No",
                                 "Yes" if metadata.get('has_schema', False) else "No",
                                 canonical_url,
-                                "Yes" if metadata.get('robots_txt_exists', False) else "No",
-                                "Yes" if metadata.get('sitemap_exists', False) else "No",
+                                "Unknown" if known_flag(metadata, 'robots_txt_exists') is None else "Yes" if metadata.get('robots_txt_exists') else "No",
+                                "Unknown" if known_flag(metadata, 'sitemap_exists') is None else "Yes" if metadata.get('sitemap_exists') else "No",
                                 f"{metadata.get('readability_score', 0):.1f}" if metadata.get('readability_score', 0) > 0 else "N/A",
+                                f"{metadata.get('readability', {}).get('flesch_kincaid_grade', 0):.1f}" if metadata.get('readability', {}).get('flesch_kincaid_grade') else "N/A",
                                 metadata.get('page_language', 'N/A'),
                                 f"{metadata.get('response_time', 0):.2f}s",
                                 metadata.get('status_code', 'N/A'),
                                 f"{metadata.get('content_length', 0):,} bytes",
-                                f"{len(text_content.split()):,}" if text_content else "0",
+                                f"{metadata.get('connections_opened', 0)}/{metadata.get('connections_reused', 0)}",
+                                f"{text_stats['word_count']:,}",
                                 f"{seo_score}/100"
                             ]
                         }
                         
+                        report_data["Value"] = [
+                            "Not scanned" if not_scanned(metadata, *REPORT_INPUTS.get(metric, ())) else value
+                            for metric, value in zip(report_data["Metric"], report_data["Value"])
+                        ]
+                        
                         report_df = pd.DataFrame(report_data)
                         st.dataframe(report_df, use_container_width=True, hide_index=True)
                         
@@ -1733,7 +1931,9 @@ if analysis_mode == "Single URL" and (url_input or analyze_clicked):
                                 mime="text/csv"
                             )
                         with col2:
-                            json_data = json.dumps(metadata, indent=2, default=str)
+                            # The raw phrase sketch is internal (bulk merging); top_phrases is the readable part
+                            report_data = {key: value for key, value in metadata.items() if key != 'phrase_sketch'}
+                            json_data = json.dumps(report_data, indent=2, default=str)
                             st.download_button(
                                 label="📥 Download Report as JSON",
                                 data=json_data,
@@ -0,0 +1,346 @@
+"""
+
+Parity check and benchmark for the HTML feature extraction used by get_metadata.
+
+Usage:
+    python benchmark-parsing.py [page.html ...]
+
+Every fixture page (a generated corpus of e-commerce style pages plus any
+HTML files passed on the command line) is run through the legacy multi-scan
+parse and through html_extract.extract_features with every installed parser
+backend. The script fails if the html.parser backend differs from the legacy
+parse on any page, or a faster backend differs on a generated page. Faster
+backends repair broken markup their own way, so their differences on the edge
+cases and on pages from the command line are listed but allowed. It then
+reports the time each implementation takes and pages/second per backend.
+
+Next to each time it reports the tracemalloc peak of the same extraction,
+parsing included: the legacy parse strips script/style/nav/header/footer
+from its tree with decompose() before get_text, while extract_features
+reads the text off its single non-mutating walk. Times come from untraced
+runs; each peak is taken in a separate traced run, since tracing slows the
+code it measures several-fold.
+
+"""
+import gc
+import random
+import sys
+import time
+import tracemalloc
+from urllib.parse import urljoin, urlparse
+
+from bs4 import BeautifulSoup
+
+from html_extract import available_backends, extract_features
+from urlnorm import normalize_url
+
+FIXTURE_URL = "https://shop.example.com/category/widgets?page=2"
+
+EDGE_CASES = [
+    "<html><head><title> Spaced <b>title</b>\n</title></head><body><p>x</p></body></html>",
+    "<html lang='de'><head><meta name='viewport'><meta property='og:title' content='OG'>"
+    "<meta name='twitter:card' content='summary'><meta name='Description' content='Hi'>"
+    "<link rel='alternate canonical' href='/c'></head><body><header><meta name='viewport'>"
+    "<h1>In <i>header</i></h1><a href='/h'>h</a></header><h1></h1><h2>  a  <span> b </span></h2>"
+    "<template><p>hidden</p></template><ruby>漢<rt>kan</rt></ruby><!-- comment -->"
+    "<script type='application/ld+json'>{}</script><style>p{}</style>"
+    "<img src='a.png' alt=''><img alt='x'><a href=''>empty</a><a href='HTTP://SHOP.EXAMPLE.COM:443/x#f'>x</a>"
+    "<footer><nav><p>deep</p></nav>after</footer><p>tail &amp; text</p></body></html>",
+    "<title>unclosed <h1>heading <p>para <nav>nav text",
+    "<svg><title>svg title</title></svg><title>second</title><h3>x</h3>",
+    "<html><body><a href='http://[bad'>bad</a><img src='http://[bad'></body></html>",
+    "<header><title>in header</title></header><h1>x</h1>",
+    "<title>a<nav>b<i>c</i></nav>d</title><h1>t<script>s</script></h1>",
+    "",
+]
+
+WORDS = ("widget gadget premium steel compact wireless outdoor garden kitchen smart "
+         "durable portable classic modern deluxe ergonomic").split()
+
+
+def make_page(rng, products):
+    """Generate a large e-commerce style listing page"""
+    def sentence(n):
+        return ' '.join(rng.choice(WORDS) for _ in range(n)).capitalize() + '.'
+
+    parts = [
+        "<!DOCTYPE html><html lang='en'><head><meta charset='utf-8'>",
+        f"<title>{sentence(6)} | Shop</title>",
+        f"<meta name='description' content='{sentence(20)}'>",
+        "<meta name='viewport' content='width=device-width, initial-scale=1'>",
+        "<meta property='og:title' content='Widgets'><meta property='og:type' content='website'>",
+        "<meta name='twitter:card' content='summary_large_image'>",
+        "<link rel='canonical' href='https://shop.example.com/category/widgets'>",
+        "<script type='application/ld+json'>{\"@type\": \"ItemList\"}</script>",
+        "<style>" + ".c{color:red}" * 200 + "</style>",
+        "<script>" + "var x = 1;" * 500 + "</script></head><body>",
+        "<header><nav><ul>",
+    ]
+    for i in range(60):
+        parts.append(f"<li><a href='/category/{rng.choice(WORDS)}-{i}'>{rng.choice(WORDS)}</a></li>")
+    parts.append("</ul></nav></header><main><h1>Widgets</h1>")
+    for i in range(products):
+        parts.append(
+            f"<div class='product'><h3>{sentence(4)}</h3>"
+            f"<a href='/product/{i}?utm_source=list&color={rng.choice(WORDS)}'>"
+            f"<img src='/img/p{i}.jpg' {'alt=' + repr(sentence(3)) if i % 3 else ''}></a>"
+            f"<p>{sentence(25)} {sentence(15)}</p><span>&pound;{rng.randint(5, 500)}.99</span></div>"
+        )
+        if i % 25 == 0:
+            parts.append(f"<h2>{sentence(3)}</h2><p>{sentence(40)}</p>")
+    parts.append("<footer>")
+    for i in range(40):
+        parts.append(f"<a href='https://partner{i}.example.org/'>{sentence(2)}</a>")
+    parts.append("</footer></main></body></html>")
+    return ''.join(parts).encode('utf-8')
+
+
+def load_corpus(paths):
+    rng = random.Random(42)
+    corpus = [(f"edge case {i}", html.encode('utf-8')) for i, html in enumerate(EDGE_CASES)]
+    corpus += [(f"generated {n} products", make_page(rng, n)) for n in (50, 500, 2000, 5000)]
+    for path in paths:
+        with open(path, 'rb') as f:
+            corpus.append((path, f.read()))
+    return corpus
+
+
+def legacy_extract_features(url, content):
+    """Reference implementation: the multi-scan parse get_metadata used before the single-pass extractor"""
+    soup = BeautifulSoup(content, 'html.parser')
+    
+    # Basic metadata
+    title_tag = soup.find("title")
+    meta_tags = soup.find_all("meta")
+    
+    # Extract all meta information
+    meta_info = {}
+    for meta in meta_tags:
+        if meta is None:
+            continue
+        try:
+            name = (meta.get('name', '') if hasattr(meta, 'get') else '').lower() or (meta.get('property', '') if hasattr(meta, 'get') else '').lower()
+            content = meta.get('content', '') if hasattr(meta, 'get') else ''
+            if name and content:
+                meta_info[name] = content
+        except (AttributeError, TypeError):
+            continue
+    
+    # Open Graph tags
+    og_tags = {}
+    for meta in meta_tags:
+        if meta is None or not hasattr(meta, 'get'):
+            continue
+        try:
+            property_attr = meta.get('property', '')
+            if property_attr.startswith('og:'):
+                og_tags[property_attr] = meta.get('content', '')
+        except (AttributeError, TypeError):
+            continue
+    
+    # Headings analysis
+    headings = {
+        'h1': [h.get_text(strip=True) for h in soup.find_all('h1')],
+        'h2': [h.get_text(strip=True) for h in soup.find_all('h2')],
+        'h3': [h.get_text(strip=True) for h in soup.find_all('h3')],
+    }
+    
+    # Images analysis
+    images = soup.find_all('img')
+    images_with_alt = sum(1 for img in images if img and hasattr(img, 'get') and img.get('alt'))
+    images_without_alt = len(images) - images_with_alt
+    
+    # Links analysis
+    links = soup.find_all('a', href=True)
+    internal_links = []
+    external_links = []
+    base_url = f"{urlparse(url).scheme}://{urlparse(url).netloc}"
+    page_netloc = urlparse(normalize_url(url)).netloc
+    link_targets = {}
+    
+    for link in links:
+        if link is None or not hasattr(link, 'get'):
+            continue
+        try:
+            href = link.get('href', '')
+            if href:
+                target = urljoin(base_url, href)
+                absolute_url = normalize_url(target)
+                link_targets.setdefault(absolute_url, target)
+                if urlparse(absolute_url).netloc == page_netloc:
+                    internal_links.append(absolute_url)
+                else:
+                    external_links.append(absolute_url)
+        except (AttributeError, TypeError, ValueError):
+            continue
+    
+    # Schema markup detection
+    schema_scripts = soup.find_all('script', type='application/ld+json')
+    has_schema = len(schema_scripts) > 0
+    
+    # Canonical URL
+    canonical = soup.find('link', rel='canonical')
+    canonical_url = None
+    if canonical and hasattr(canonical, 'get'):
+        try:
+            canonical_url = canonical.get('href')
+        except (AttributeError, TypeError):
+            canonical_url = None
+    
+    # Robots meta
+    robots_meta = meta_info.get('robots', '')
+    
+    # Get text content
+    for script in soup(["script", "style", "nav", "header", "footer"]):
+        script.decompose()
+    text_content = soup.get_text(separator=' ', strip=True)
+    
+    # Viewport meta (mobile-friendly check)
+    viewport = soup.find('meta', attrs={'name': 'viewport'})
+    is_mobile_friendly = viewport is not None
+    
+    # Twitter Card tags
+    twitter_tags = {}
+    for meta in meta_tags:
+        if meta is None or not hasattr(meta, 'get'):
+            continue
+        try:
+            name = meta.get('name', '')
+            if name.startswith('twitter:'):
+                twitter_tags[name] = meta.get('content', '')
+        except (AttributeError, TypeError):
+            continue
+    
+    # Language detection
+    html_lang = soup.find('html', attrs={'lang': True})
+    page_language = None
+    if html_lang and hasattr(html_lang, 'get'):
+        try:
+            page_language = html_lang.get('lang')
+        except (AttributeError, TypeError):
+            page_language = None
+    
+    # SSL/HTTPS check
+    is_https = urlparse(url).scheme == 'https'
+    
+    # Image URLs for the weight probe
+    image_urls = []
+    for img in images:
+        if img is None or not hasattr(img, 'get'):
+            continue
+        try:
+            src = img.get('src', '')
+            if src:
+                image_urls.append(urljoin(base_url, src))
+        except (AttributeError, TypeError, ValueError):
+            continue
+    
+    # Broken links sample: first 10 unique links
+    sample_links = [link_targets[link] for link in list(set(internal_links + external_links))[:10]]
+    
+    features = {
+        "title": title_tag.text.strip() if title_tag else None,
+        "title_length": len(title_tag.text.strip()) if title_tag else 0,
+        "meta_description": meta_info.get('description', ''),
+        "meta_description_length": len(meta_info.get('description', '')),
+        "meta_keywords": meta_info.get('keywords', ''),
+        "og_tags": og_tags,
+        "twitter_tags": twitter_tags,
+        "headings": headings,
+        "images_total": len(images),
+        "images_with_alt": images_with_alt,
+        "images_without_alt": images_without_alt,
+        "internal_links_count": len(set(internal_links)),
+        "external_links_count": len(set(external_links)),
+        "has_schema": has_schema,
+        "schema_count": len(schema_scripts),
+        "canonical_url": canonical_url,
+        "robots_meta": robots_meta,
+        "is_mobile_friendly": is_mobile_friendly,
+        "is_https": is_https,
+        "page_language": page_language,
+        "text_content": text_content,
+    }
+    return features, image_urls, sample_links
+
+
+def diff_features(expected, actual):
+    lines = []
+    for key in expected[0]:
+        if expected[0][key] != actual[0].get(key):
+            lines.append(f"  {key}: {expected[0][key]!r:.120} != {actual[0].get(key)!r:.120}")
+    if expected[1:] != actual[1:]:
+        lines.append("  image URLs / sample links differ")
+    return lines
+
+
+def check_parity(corpus):
+    failures = 0
+    for name, content in corpus:
+        expected = legacy_extract_features(FIXTURE_URL, content)
+        for backend in available_backends():
+            actual = extract_features(FIXTURE_URL, content, backend=backend)
+            if expected == actual:
+                continue
+            strict = backend == 'html.parser' or name.startswith('generated')
+            failures += strict
+            print(f"{'MISMATCH' if strict else 'differs'}: {name} [{backend}]")
+            for line in diff_features(expected, actual):
+                print(line)
+    return failures
+
+
+def best_time(fn, content, repeat, **kwargs):
+    best = float('inf')
+    for _ in range(repeat):
+        # Collector pauses on the large trees otherwise dominate the run-to-run noise
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            fn(FIXTURE_URL, content, **kwargs)
+            best = min(best, time.perf_counter() - start)
+        finally:
+            gc.enable()
+    return best
+
+
+def peak_memory(fn, content, **kwargs):
+    """tracemalloc peak of one run of fn, in its own traced run so no timing pays for the tracing"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn(FIXTURE_URL, content, **kwargs)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def benchmark(corpus, repeat=3):
+    backends = available_backends()
+    large = [(name, content) for name, content in corpus if len(content) >= 100_000]
+    print(f"{'page':<24}{'size':>10}{'legacy':>12}{'peak':>10}" + ''.join(f"{b:>32}" for b in backends))
+    totals = dict.fromkeys(backends, 0.0)
+    for name, content in large:
+        legacy = best_time(legacy_extract_features, content, repeat)
+        legacy_peak = peak_memory(legacy_extract_features, content)
+        row = f"{name:<24}{len(content) / 1024:>8.0f}KB{legacy * 1000:>10.1f}ms{legacy_peak / 1024:>8.0f}KB"
+        for backend in backends:
+            elapsed = best_time(extract_features, content, repeat, backend=backend)
+            peak = peak_memory(extract_features, content, backend=backend)
+            totals[backend] += elapsed
+            row += f"{elapsed * 1000:>8.1f}ms{legacy / elapsed:>5.1f}x{peak / 1024:>8.0f}KB{legacy_peak / peak:>5.1f}x"
+        print(row)
+    if large:
+        print("pages/second over the large pages: " + ', '.join(
+            f"{backend} {len(large) / totals[backend]:.1f}" for backend in backends))
+
+
+if __name__ == '__main__':
+    corpus = load_corpus(sys.argv[1:])
+    failures = check_parity(corpus)
+    print(f"Parity: {failures} required match(es) failed over {len(corpus)} pages "
+          f"and backends {', '.join(available_backends())}")
+    if failures:
+        sys.exit(1)
+    benchmark(corpus)
@@ -0,0 +1,402 @@
+"""
+
+Parity check and benchmark for the rule-driven SEO scorer.
+
+Usage:
+    python benchmark-scoring.py [rows]
+
+Random metadata records are run through the if-chain scorer and
+recommendations that scoring.SEO_RULE_TABLE replaced, through
+scoring.calculate_seo_score / page_recommendations, and, as a feature
+table, through scoring.score_frame. The script fails unless all of them
+agree on every record, with the default weights and with a set of
+fractional weights. It then times score_frame over a table of random
+features (1,000,000 rows by default), which is what rescoring all stored
+pages after a weight change costs, and single-page evaluation with and
+without the rule cache.
+
+"""
+import random
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from caches import rule_cache
+from scoring import (SCORE_FEATURES, SCORE_WEIGHTS, calculate_seo_score, feature_frame, page_recommendations,
+                     score_frame)
+from text_stats import get_text_stats
+
+PARITY_RECORDS = 20000
+
+
+def legacy_seo_score(metadata, weights=None):
+    """The if-chain scorer the rule table replaced"""
+    if not metadata or not isinstance(metadata, dict):
+        return 0
+    w = weights or SCORE_WEIGHTS
+
+    score = 0
+    max_score = w["max_score"]
+
+    # Title
+    if metadata.get('title'):
+        title_len = metadata.get('title_length', 0)
+        if 30 <= title_len <= 60:
+            score += w["title_ideal"]
+        elif 20 <= title_len < 30 or 60 < title_len <= 70:
+            score += w["title_ok"]
+        elif title_len > 0:
+            score += w["title_present"]
+
+    # Meta Description
+    desc_len = metadata.get('meta_description_length', 0)
+    if 120 <= desc_len <= 160:
+        score += w["description_ideal"]
+    elif 100 <= desc_len < 120 or 160 < desc_len <= 180:
+        score += w["description_ok"]
+    elif desc_len > 0:
+        score += w["description_present"]
+
+    # Headings
+    headings = metadata.get('headings', {})
+    h1_count = len(headings.get('h1', []))
+    if h1_count == 1:
+        score += w["single_h1"]
+    elif h1_count > 1:
+        score += w["multiple_h1"]
+    if len(headings.get('h2', [])) > 0:
+        score += w["has_h2"]
+
+    # Images with Alt
+    images_total = metadata.get('images_total', 0)
+    if images_total > 0:
+        images_with_alt = metadata.get('images_with_alt', 0)
+        alt_ratio = images_with_alt / images_total
+        score += int(w["image_alt"] * alt_ratio)
+
+    # Mobile Friendly
+    if metadata.get('is_mobile_friendly', False):
+        score += w["mobile_friendly"]
+
+    # Schema Markup
+    if metadata.get('has_schema', False):
+        score += w["schema"]
+
+    # Canonical URL
+    if metadata.get('canonical_url'):
+        score += w["canonical"]
+
+    # Internal Links
+    internal_links = metadata.get('internal_links_count', 0)
+    if internal_links > 0:
+        score += min(w["internal_links_cap"], internal_links // w["internal_links_per_point"])
+
+    # Content Length
+    word_count = get_text_stats(metadata)['word_count']
+    if word_count >= 300:
+        score += w["content_300"]
+    elif word_count >= 200:
+        score += w["content_200"]
+    elif word_count >= 100:
+        score += w["content_100"]
+
+    return min(score, max_score)
+
+
+
+def legacy_recommendations(metadata):
+    """The if-chain recommendations the rule table replaced"""
+    if metadata is None or not isinstance(metadata, dict):
+        return [], []
+    
+    recommendations = []
+    priority = []
+    
+    # Title recommendations
+    if not metadata.get('title'):
+        recommendations.append({
+            "category": "Critical",
+            "issue": "Missing Title Tag",
+            "recommendation": "Add a descriptive title tag (30-60 characters) that includes your primary keyword.",
+            "impact": "High"
+        })
+        priority.append("Critical")
+    else:
+        title_length = metadata.get('title_length', 0)
+        if title_length < 30:
+            recommendations.append({
+                "category": "Important",
+                "issue": "Title Too Short",
+                "recommendation": f"Expand your title tag from {title_length} to 30-60 characters for better SEO.",
+                "impact": "Medium"
+            })
+            priority.append("Important")
+        elif title_length > 60:
+            recommendations.append({
+                "category": "Important",
+                "issue": "Title Too Long",
+                "recommendation": f"Shorten your title tag from {title_length} to 30-60 characters to avoid truncation.",
+                "impact": "Medium"
+            })
+            priority.append("Important")
+    
+    # Meta description recommendations
+    if not metadata.get('meta_description'):
+        recommendations.append({
+            "category": "Critical",
+            "issue": "Missing Meta Description",
+            "recommendation": "Add a compelling meta description (120-160 characters) to improve click-through rates.",
+            "impact": "High"
+        })
+        priority.append("Critical")
+    else:
+        desc_length = metadata.get('meta_description_length', 0)
+        if desc_length < 120:
+            recommendations.append({
+                "category": "Important",
+                "issue": "Meta Description Too Short",
+                "recommendation": f"Expand your meta description from {desc_length} to 120-160 characters.",
+                "impact": "Medium"
+            })
+            priority.append("Important")
+    
+    # H1 recommendations
+    headings = metadata.get('headings', {})
+    h1_count = len(headings.get('h1', []))
+    if h1_count == 0:
+        recommendations.append({
+            "category": "Critical",
+            "issue": "No H1 Tag",
+            "recommendation": "Add exactly one H1 tag with your primary keyword to improve SEO structure.",
+            "impact": "High"
+        })
+        priority.append("Critical")
+    elif h1_count > 1:
+        recommendations.append({
+            "category": "Important",
+            "issue": "Multiple H1 Tags",
+            "recommendation": f"Reduce H1 tags from {h1_count} to 1. Use H2-H6 for subheadings.",
+            "impact": "Medium"
+        })
+        priority.append("Important")
+    
+    # Image alt text recommendations
+    images_total = metadata.get('images_total', 0)
+    if images_total > 0:
+        images_with_alt = metadata.get('images_with_alt', 0)
+        alt_ratio = images_with_alt / images_total
+        if alt_ratio < 0.8:
+            recommendations.append({
+                "category": "Important",
+                "issue": "Missing Alt Text on Images",
+                "recommendation": f"Add alt text to {metadata.get('images_without_alt', 0)} images for better accessibility and SEO.",
+                "impact": "Medium"
+            })
+            priority.append("Important")
+    
+    # Mobile friendliness
+    if not metadata.get('is_mobile_friendly', False):
+        recommendations.append({
+            "category": "Critical",
+            "issue": "Not Mobile-Friendly",
+            "recommendation": "Add a viewport meta tag to make your site mobile-responsive.",
+            "impact": "High"
+        })
+        priority.append("Critical")
+    
+    # HTTPS
+    if not metadata.get('is_https', False):
+        recommendations.append({
+            "category": "Critical",
+            "issue": "Not Using HTTPS",
+            "recommendation": "Migrate to HTTPS to improve security and SEO rankings.",
+            "impact": "High"
+        })
+        priority.append("Critical")
+    
+    # Schema markup
+    if not metadata.get('has_schema', False):
+        recommendations.append({
+            "category": "Recommended",
+            "issue": "No Schema Markup",
+            "recommendation": "Add structured data (JSON-LD) to help search engines understand your content.",
+            "impact": "Low"
+        })
+        priority.append("Recommended")
+    
+    # Canonical URL
+    if not metadata.get('canonical_url'):
+        recommendations.append({
+            "category": "Recommended",
+            "issue": "No Canonical URL",
+            "recommendation": "Add a canonical URL to prevent duplicate content issues.",
+            "impact": "Low"
+        })
+        priority.append("Recommended")
+    
+    # Content length
+    word_count = get_text_stats(metadata)['word_count']
+    if word_count < 300:
+        recommendations.append({
+            "category": "Important",
+            "issue": "Low Content Length",
+            "recommendation": f"Increase content from {word_count} to at least 300 words for better SEO.",
+            "impact": "Medium"
+        })
+        priority.append("Important")
+    
+    # Robots.txt
+    if not metadata.get('robots_txt_exists', False):
+        recommendations.append({
+            "category": "Recommended",
+            "issue": "No robots.txt File",
+            "recommendation": "Create a robots.txt file to guide search engine crawlers.",
+            "impact": "Low"
+        })
+        priority.append("Recommended")
+    
+    # Sitemap
+    if not metadata.get('sitemap_exists', False):
+        recommendations.append({
+            "category": "Recommended",
+            "issue": "No Sitemap.xml",
+            "recommendation": "Create a sitemap.xml file to help search engines index your pages.",
+            "impact": "Low"
+        })
+        priority.append("Recommended")
+    
+    # Broken links
+    checked_links = metadata.get('checked_links', 0)
+    if checked_links > 0:
+        broken_links = metadata.get('broken_links', 0)
+        broken_ratio = broken_links / checked_links
+        if broken_ratio > 0.1:
+            recommendations.append({
+                "category": "Important",
+                "issue": "Broken Links Detected",
+                "recommendation": f"Fix {broken_links} broken links found in sample check.",
+                "impact": "Medium"
+            })
+            priority.append("Important")
+    
+    # Large images
+    large_images = metadata.get('large_images', 0)
+    if large_images > 0:
+        recommendations.append({
+            "category": "Recommended",
+            "issue": "Large Images Detected",
+            "recommendation": f"Optimize {large_images} large images (>500KB) to improve page speed.",
+            "impact": "Low"
+        })
+        priority.append("Recommended")
+    
+    # Open Graph tags
+    if not metadata.get('og_tags'):
+        recommendations.append({
+            "category": "Recommended",
+            "issue": "No Open Graph Tags",
+            "recommendation": "Add Open Graph tags to improve social media sharing appearance.",
+            "impact": "Low"
+        })
+        priority.append("Recommended")
+    
+    # Readability
+    readability_score = metadata.get('readability_score', 0)
+    if readability_score > 0 and readability_score < 30:
+        recommendations.append({
+            "category": "Recommended",
+            "issue": "Low Readability Score",
+            "recommendation": f"Improve content readability (current: {readability_score:.1f}). Use simpler language and shorter sentences.",
+            "impact": "Low"
+        })
+        priority.append("Recommended")
+    
+    return recommendations, priority
+
+
+
+def random_metadata(rng):
+    images_total = rng.choice([0, 0, 1, 3, 7, 10, 13])
+    images_with_alt = rng.randint(0, images_total)
+    checked_links = rng.choice([0, 10])
+    title_length = rng.randint(0, 90)
+    description_length = rng.choice([0, rng.randint(1, 200)])
+    return {
+        "title": "T" * title_length,
+        "title_length": title_length,
+        "meta_description": "D" * description_length,
+        "meta_description_length": description_length,
+        "headings": {"h1": ["h1"] * rng.randint(0, 3), "h2": ["h2"] * rng.randint(0, 2)},
+        "images_total": images_total,
+        "images_with_alt": images_with_alt,
+        "images_without_alt": images_total - images_with_alt,
+        "is_mobile_friendly": rng.random() < 0.5,
+        "is_https": rng.random() < 0.5,
+        "has_schema": rng.random() < 0.5,
+        "canonical_url": rng.choice(["", "https://example.com/"]),
+        "internal_links_count": rng.randint(0, 60),
+        "text_stats": {"word_count": rng.randint(0, 400)},
+        "robots_txt_exists": rng.random() < 0.5,
+        "sitemap_exists": rng.random() < 0.5,
+        "checked_links": checked_links,
+        "broken_links": rng.randint(0, checked_links),
+        "large_images": rng.choice([0, 0, 2]),
+        "og_tags": rng.choice([{}, {"og:title": "OG"}]),
+        "readability_score": rng.choice([0, rng.uniform(-20, 100)]),
+    }
+
+
+def check_parity(records):
+    """Number of records where the rule table disagrees with the if-chains, over both weight sets"""
+    frame = feature_frame(records)
+    fractional = dict(SCORE_WEIGHTS, title_ideal=12.5, image_alt=7.5, content_200=6.5)
+    failures = 0
+    for weights in (SCORE_WEIGHTS, fractional):
+        vectorized = score_frame(frame, weights).tolist()
+        for metadata, score in zip(records, vectorized):
+            expected = legacy_seo_score(metadata, weights)
+            if calculate_seo_score(metadata, weights) != expected or score != expected:
+                failures += 1
+    for metadata in records:
+        if page_recommendations(metadata) != legacy_recommendations(metadata)[0]:
+            failures += 1
+    return failures
+
+
+def benchmark(rows, records):
+    generator = np.random.default_rng(0)
+    frame = pd.DataFrame({name: generator.integers(0, 400, rows) for name in SCORE_FEATURES})
+    start = time.perf_counter()
+    score_frame(frame)
+    elapsed = time.perf_counter() - start
+    print(f"score_frame: {rows:,} rows in {elapsed:.3f}s ({rows / elapsed:,.0f} rows/s)")
+
+    sample = records[:2000]
+    start = time.perf_counter()
+    for metadata in sample:
+        legacy_seo_score(metadata)
+        legacy_recommendations(metadata)
+    legacy = time.perf_counter() - start
+    rule_cache.clear()
+    start = time.perf_counter()
+    for metadata in sample:
+        page_recommendations(metadata)
+    uncached = time.perf_counter() - start
+    start = time.perf_counter()
+    for metadata in sample:
+        page_recommendations(metadata)
+    cached = time.perf_counter() - start
+    print(f"single page: if-chains {legacy / len(sample) * 1e6:.0f}us, rule table {uncached / len(sample) * 1e6:.0f}us, "
+          f"cached {cached / len(sample) * 1e6:.0f}us")
+
+
+if __name__ == '__main__':
+    rng = random.Random(0)
+    records = [random_metadata(rng) for _ in range(PARITY_RECORDS)]
+    failures = check_parity(records)
+    print(f"Parity: {failures} mismatch(es) over {len(records)} records")
+    if failures:
+        sys.exit(1)
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000, records)
@@ -0,0 +1,421 @@
+"""Caches shared by the analysis modes.
+
+The cache instances live here rather than in app.py because Streamlit
+re-executes the app script on every interaction, while imported modules
+persist for the life of the process.
+"""
+import asyncio
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after ``ttl`` seconds"""
+
+    def __init__(self, ttl, max_entries=10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, ttl=None):
+        """Store value for ``ttl`` seconds (the cache's ttl by default)"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class AsyncTTLCache:
+    """TTL cache for coroutine results; concurrent misses on one key share a single load.
+
+    get_or_load must be awaited on the fetch engine loop, which owns the
+    in-flight table. ``ttl_for(value)``, if given, returns a loaded value's
+    own TTL (e.g. shorter for a failed lookup), or None for the default.
+    """
+
+    def __init__(self, ttl, max_entries=10000, ttl_for=None):
+        self._store = TTLCache(ttl, max_entries)
+        self._ttl_for = ttl_for
+        self._inflight = {}
+        self._joined = 0
+
+    @property
+    def hits(self):
+        # Waiting on another caller's in-flight load counts as a hit
+        return self._store.hits + self._joined
+
+    @property
+    def misses(self):
+        return self._store.misses - self._joined
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    async def get_or_load(self, key, loader):
+        """Return the cached value for key, or await ``loader()`` once for all concurrent callers"""
+        value, _ = await self.get_or_load_shared(key, loader)
+        return value
+
+    async def get_or_load_shared(self, key, loader):
+        """get_or_load returning (value, shared): shared is False only for the caller whose loader ran"""
+        value = self._store.get(key)
+        if value is not None:
+            return value, True
+        task = self._inflight.get(key)
+        shared = task is not None
+        if task is None:
+            task = asyncio.ensure_future(loader())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+        else:
+            self._joined += 1
+        # Shield so a cancelled waiter does not cancel the load for the others
+        return await asyncio.shield(task), shared
+
+    def _finish(self, key, task):
+        self._inflight.pop(key, None)
+        if not task.cancelled() and task.exception() is None and task.result() is not None:
+            value = task.result()
+            self._store.set(key, value, self._ttl_for(value) if self._ttl_for else None)
+
+    def clear(self):
+        self._store.clear()
+
+    def __len__(self):
+        return len(self._store)
+
+
+def approx_size(value):
+    """Rough in-memory footprint of a cached value, in bytes"""
+    if isinstance(value, (str, bytes, bytearray)):
+        return len(value) + 50
+    if isinstance(value, dict):
+        return 64 + sum(approx_size(k) + approx_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set)):
+        return 56 + sum(approx_size(v) for v in value)
+    if isinstance(value, _Compressed):
+        return len(value.blob) + 50
+    return 32
+
+
+class _Compressed:
+    __slots__ = ('blob',)
+
+    def __init__(self, value):
+        self.blob = zlib.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def load(self):
+        return pickle.loads(zlib.decompress(self.blob))
+
+
+class MemoryCache:
+    """Thread-safe LRU cache of dicts bounded by an approximate memory budget.
+
+    Top-level fields larger than ``compress_min_bytes`` (page text, link
+    lists) are kept zlib-compressed and expanded again on ``get``.
+    """
+
+    def __init__(self, max_bytes, ttl=None, compress_min_bytes=None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.compress_min_bytes = compress_min_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.current_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and entry[0] < time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            stored = entry[2]
+        return {k: v.load() if isinstance(v, _Compressed) else v for k, v in stored.items()}
+
+    def set(self, key, value):
+        stored = {}
+        for field, field_value in value.items():
+            if self.compress_min_bytes is not None and approx_size(field_value) >= self.compress_min_bytes:
+                field_value = _Compressed(field_value)
+            stored[field] = field_value
+        size = approx_size(stored)
+        if size > self.max_bytes:
+            return
+        expires = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (expires, size, stored)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self.current_bytes -= size
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+
+class SQLiteCache:
+    """Persistent LRU cache stored in a local SQLite file.
+
+    Values are pickled and zlib-compressed. The file uses WAL journaling so
+    several app processes on the same host can share it; every process keeps
+    one connection per thread. Storage errors are treated as cache misses so
+    a broken cache file never breaks an analysis.
+
+    The entry count and stored bytes live in a one-row ``<table>_meta``
+    table kept up to date by triggers, in the same transaction as each
+    write, so neither stats nor the budget check scan the table. Row
+    metadata comes before the value BLOB, so the LRU scan of an eviction
+    never reads a value's overflow pages.
+    """
+
+    def __init__(self, path, table, ttl, max_bytes, max_entries):
+        self.path = path
+        self.table = table
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                self._create_schema(conn)
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            self._local.conn = conn
+        return conn
+
+    def _create_schema(self, conn):
+        table = self.table
+        columns = [row[1] for row in conn.execute(f'PRAGMA table_info({table})')]
+        if columns and columns[-1] != 'value':
+            # Files written before the meta table put the BLOB first; start those over
+            conn.execute(f'DROP TABLE {table}')
+            conn.execute(f'DROP TABLE IF EXISTS {table}_meta')
+        conn.execute(
+            f'CREATE TABLE IF NOT EXISTS {table} ('
+            'key TEXT PRIMARY KEY, size INTEGER NOT NULL, expires REAL NOT NULL, '
+            'last_access REAL NOT NULL, value BLOB NOT NULL)'
+        )
+        conn.execute(f'CREATE INDEX IF NOT EXISTS {table}_lru ON {table} (last_access)')
+        conn.execute(
+            f'CREATE TABLE IF NOT EXISTS {table}_meta ('
+            'id INTEGER PRIMARY KEY CHECK (id = 0), entries INTEGER NOT NULL, bytes INTEGER NOT NULL)'
+        )
+        conn.execute(
+            f'INSERT OR IGNORE INTO {table}_meta SELECT 0, COUNT(*), COALESCE(SUM(size), 0) FROM {table}'
+        )
+        conn.execute(
+            f'CREATE TRIGGER IF NOT EXISTS {table}_added AFTER INSERT ON {table} BEGIN '
+            f'UPDATE {table}_meta SET entries = entries + 1, bytes = bytes + new.size; END'
+        )
+        conn.execute(
+            f'CREATE TRIGGER IF NOT EXISTS {table}_resized AFTER UPDATE OF size ON {table} BEGIN '
+            f'UPDATE {table}_meta SET bytes = bytes + new.size - old.size; END'
+        )
+        conn.execute(
+            f'CREATE TRIGGER IF NOT EXISTS {table}_removed AFTER DELETE ON {table} BEGIN '
+            f'UPDATE {table}_meta SET entries = entries - 1, bytes = bytes - old.size; END'
+        )
+
+    def _totals(self, conn):
+        return conn.execute(f'SELECT entries, bytes FROM {self.table}_meta').fetchone()
+
+    def get(self, key, default=None):
+        try:
+            conn = self._connect()
+            row = conn.execute(f'SELECT value, expires FROM {self.table} WHERE key = ?', (key,)).fetchone()
+            now = time.time()
+            if row is None or row[1] < now:
+                if row is not None:
+                    conn.execute(f'DELETE FROM {self.table} WHERE key = ?', (key,))
+                self.misses += 1
+                return default
+            conn.execute(f'UPDATE {self.table} SET last_access = ? WHERE key = ?', (now, key))
+            value = pickle.loads(zlib.decompress(row[0]))
+        except (sqlite3.Error, pickle.UnpicklingError, zlib.error, EOFError):
+            self.misses += 1
+            return default
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        try:
+            blob = zlib.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+            conn = self._connect()
+            now = time.time()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                # An upsert rather than INSERT OR REPLACE, whose implicit delete fires no trigger
+                conn.execute(
+                    f'INSERT INTO {self.table} (key, size, expires, last_access, value) VALUES (?, ?, ?, ?, ?) '
+                    'ON CONFLICT (key) DO UPDATE SET size = excluded.size, expires = excluded.expires, '
+                    'last_access = excluded.last_access, value = excluded.value',
+                    (key, len(blob), now + self.ttl, now, blob),
+                )
+                count, total = self._totals(conn)
+                if count > self.max_entries or total > self.max_bytes:
+                    self._evict(conn, now)
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+        except (sqlite3.Error, pickle.PicklingError, TypeError, AttributeError):
+            pass
+
+    def _evict(self, conn, now):
+        """Drop expired entries, then least recently used ones until the table is within budget"""
+        conn.execute(f'DELETE FROM {self.table} WHERE expires < ?', (now,))
+        count, total = self._totals(conn)
+        stale = []
+        for key, size in conn.execute(f'SELECT key, size FROM {self.table} ORDER BY last_access'):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            stale.append((key,))
+            count -= 1
+            total -= size
+        conn.executemany(f'DELETE FROM {self.table} WHERE key = ?', stale)
+
+    def stats(self):
+        """Entry count and stored (compressed) bytes"""
+        try:
+            count, total = self._totals(self._connect())
+        except sqlite3.Error:
+            count, total = 0, 0
+        return {"entries": count, "bytes": total, "hits": self.hits, "misses": self.misses}
+
+    def clear(self):
+        try:
+            self._connect().execute(f'DELETE FROM {self.table}')
+        except sqlite3.Error:
+            pass
+
+
+# robots.txt / sitemap results per site. A lookup that failed (timeout, connection
+# error, 5xx, open circuit breaker) is retried after SITE_INFO_FAILED_TTL instead
+SITE_INFO_TTL = 3600
+SITE_INFO_FAILED_TTL = 60
+site_info_cache = AsyncTTLCache(
+    ttl=SITE_INFO_TTL,
+    ttl_for=lambda info: SITE_INFO_FAILED_TTL if info.get('lookup_failed') else None,
+)
+
+# HEAD status of every link checked, shared across pages and runs; pages checking
+# the same link at the same time (nav, footer) share one request. A request that
+# got no response (status 0: timeout, connection error) is retried after LINK_FAILED_TTL
+LINK_STATUS_TTL = 3600
+LINK_FAILED_TTL = 60
+LINK_STATUS_MAX_ENTRIES = 50000
+link_status_cache = AsyncTTLCache(
+    ttl=LINK_STATUS_TTL,
+    max_entries=LINK_STATUS_MAX_ENTRIES,
+    ttl_for=lambda status: LINK_FAILED_TTL if status == 0 else None,
+)
+
+# Finished metadata dicts for get_metadata, bounded by memory rather than entry count
+METADATA_CACHE_TTL = 3600
+METADATA_CACHE_MAX_BYTES = 64 * 1024 * 1024
+METADATA_CACHE_COMPRESS_MIN_BYTES = 16 * 1024
+metadata_cache = MemoryCache(
+    max_bytes=METADATA_CACHE_MAX_BYTES,
+    ttl=METADATA_CACHE_TTL,
+    compress_min_bytes=METADATA_CACHE_COMPRESS_MIN_BYTES,
+)
+
+# Score and recommendations per distinct set of rule inputs (see scoring.evaluate_page)
+RULE_CACHE_TTL = 24 * 3600
+RULE_CACHE_MAX_ENTRIES = 50000
+rule_cache = TTLCache(ttl=RULE_CACHE_TTL, max_entries=RULE_CACHE_MAX_ENTRIES)
+
+# Two persistent tiers, shared by app processes on this host and kept across restarts:
+# raw page fetches keyed by URL, and derived analyses keyed by content hash + analyzer version
+CACHE_DB_PATH = os.environ.get(
+    'SEO_CACHE_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.seo_cache.sqlite3'),
+)
+# Same freshness as the memory tier, so a re-analysis sees page changes within the hour
+RAW_CACHE_TTL = 3600
+RAW_CACHE_MAX_BYTES = 512 * 1024 * 1024
+RAW_CACHE_MAX_ENTRIES = 20000
+DERIVED_CACHE_TTL = 7 * 24 * 3600
+DERIVED_CACHE_MAX_BYTES = 256 * 1024 * 1024
+DERIVED_CACHE_MAX_ENTRIES = 50000
+raw_store = SQLiteCache(
+    CACHE_DB_PATH,
+    table='raw_pages',
+    ttl=RAW_CACHE_TTL,
+    max_bytes=RAW_CACHE_MAX_BYTES,
+    max_entries=RAW_CACHE_MAX_ENTRIES,
+)
+derived_store = SQLiteCache(
+    CACHE_DB_PATH,
+    table='derived_analysis',
+    ttl=DERIVED_CACHE_TTL,
+    max_bytes=DERIVED_CACHE_MAX_BYTES,
+    max_entries=DERIVED_CACHE_MAX_ENTRIES,
+)
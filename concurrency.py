@@ -0,0 +1,142 @@
+"""Adaptive concurrency limit for bulk analysis (additive increase, multiplicative decrease).
+
+The controller gates how many pages are analyzed at once. After every
+round of completions it compares what it observed with what it expects
+from a healthy run:
+
+* the median request time of fetched pages against a baseline, the lowest
+  round median of the last BASELINE_ROUNDS rounds, so one early fast round
+  does not hold the limit down for the rest of the run,
+* the share of requests that failed from overload (timeouts, connection
+  errors, 429 and 5xx responses),
+* how full the parse queue is, i.e. whether the CPU-bound stage keeps up.
+
+If any of them says the run is pushing too hard, the limit is cut by
+DECREASE_FACTOR; otherwise it grows by INCREASE_STEP, always within the
+configured bounds.
+"""
+import asyncio
+import statistics
+import time
+from collections import deque
+
+# Bounds and starting point of the limit (pages in flight)
+MIN_CONCURRENCY = 4
+MAX_CONCURRENCY = 200
+INITIAL_CONCURRENCY = 20
+INCREASE_STEP = 4
+DECREASE_FACTOR = 0.7
+# Round median latency above this multiple of the baseline counts as congestion
+LATENCY_TOLERANCE = 1.5
+# Rounds whose lowest median is the latency baseline
+BASELINE_ROUNDS = 5
+# Share of overload errors in a round that triggers a decrease
+MAX_ERROR_RATE = 0.1
+# CPU load reading (parse queue fill) at which the run backs off
+MAX_CPU_UTILIZATION = 1.0
+# Fewest completions a round is judged on
+MIN_ROUND = 4
+# Window used for the throughput figure (seconds)
+THROUGHPUT_WINDOW = 10
+
+
+class ConcurrencyController:
+    """AIMD limit on in-flight work: acquire/release around each page.
+
+    ``record`` is called with every finished page. ``cpu_load`` is an
+    optional callable returning how busy the CPU-bound stage is (0-1 and
+    beyond), e.g. how full the parse queue is. The load average is not used:
+    a parse pool sized to the cores keeps it near 1.0 whenever it is busy,
+    healthy or not. ``limit``, ``in_flight``, ``throughput()`` and
+    ``history`` may be read from other threads for display.
+    """
+
+    def __init__(self, min_limit=MIN_CONCURRENCY, max_limit=MAX_CONCURRENCY, initial=INITIAL_CONCURRENCY,
+                 cpu_load=None):
+        self.min_limit = min_limit
+        self.max_limit = max(min_limit, max_limit)
+        self.limit = min(max(initial, self.min_limit), self.max_limit)
+        self.cpu_load = cpu_load
+        self.in_flight = 0
+        self.completed = 0
+        self.errors = 0
+        self.started = time.monotonic()
+        # (seconds since start, limit, pages/s) after every adjustment
+        self.history = [(0.0, self.limit, 0.0)]
+        self._condition = None
+        self._latencies = []
+        self._round_completed = 0
+        self._round_errors = 0
+        self._round_medians = deque(maxlen=BASELINE_ROUNDS)
+        self._finished = deque()
+
+    async def acquire(self):
+        """Wait until the limit allows one more page in flight"""
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+
+    async def release(self):
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify()
+
+    def throughput(self):
+        """Pages finished per second over the last THROUGHPUT_WINDOW seconds"""
+        now = time.monotonic()
+        recent = sum(1 for finished in list(self._finished) if finished >= now - THROUGHPUT_WINDOW)
+        span = min(THROUGHPUT_WINDOW, now - self.started)
+        return recent / span if span > 0 else 0.0
+
+    def record(self, latency=None, overloaded=False):
+        """Count a finished page: its latency and whether it failed from overload.
+
+        latency should be the page request's own time, without waits for the
+        host's rate limit or Crawl-delay; None leaves it out (e.g. cache hits).
+        """
+        self.completed += 1
+        self._round_completed += 1
+        now = time.monotonic()
+        self._finished.append(now)
+        while self._finished[0] < now - THROUGHPUT_WINDOW:
+            self._finished.popleft()
+        if overloaded:
+            self.errors += 1
+            self._round_errors += 1
+        if latency is not None:
+            self._latencies.append(latency)
+        # A round is half a limit's worth of completions, so the limit adapts about twice per round trip of the window
+        if self._round_completed >= max(MIN_ROUND, self.limit // 2):
+            self._adjust()
+
+    def _congested(self):
+        if self._round_errors / self._round_completed > MAX_ERROR_RATE:
+            return True
+        if self.cpu_load is not None and self.cpu_load() >= MAX_CPU_UTILIZATION:
+            return True
+        if self._latencies:
+            median = statistics.median(self._latencies)
+            baseline = min(self._round_medians, default=median)
+            self._round_medians.append(median)
+            if median > baseline * LATENCY_TOLERANCE:
+                return True
+        return False
+
+    def _adjust(self):
+        previous = self.limit
+        if self._congested():
+            self.limit = max(self.min_limit, int(self.limit * DECREASE_FACTOR))
+        else:
+            self.limit = min(self.max_limit, self.limit + INCREASE_STEP)
+        self._latencies = []
+        self._round_completed = 0
+        self._round_errors = 0
+        self.history.append((time.monotonic() - self.started, self.limit, self.throughput()))
+        if self.limit > previous and self._condition is not None:
+            asyncio.ensure_future(self._wake())
+
+    async def _wake(self):
+        async with self._condition:
+            self._condition.notify_all()
@@ -0,0 +1,456 @@
+"""Single-pass extraction of on-page SEO features from HTML.
+
+The feature logic lives in FeatureCollector; each parser backend only turns
+its own document tree into start/text/end events. The backend is picked by
+PARSER_BACKEND (or the SEO_PARSER_BACKEND environment variable):
+
+- ``html.parser``: BeautifulSoup with the standard library parser, the reference
+- ``lxml``: libxml2 through lxml
+- ``selectolax``: the lexbor HTML5 parser through selectolax
+
+All three give the same features for well-formed pages. On broken markup
+each parser repairs the tree its own way, so results can differ there.
+"""
+import codecs
+import os
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlparse
+
+from bs4 import BeautifulSoup, CData, NavigableString, Tag
+from bs4.dammit import EncodingDetector, UnicodeDammit
+
+from urlnorm import normalize_url
+
+try:
+    from lxml import etree
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    SELECTOLAX_AVAILABLE = False
+
+PARSER_BACKEND = os.environ.get('SEO_PARSER_BACKEND', 'html.parser')
+
+# Subtrees left out of the page text (code and nav/header/footer boilerplate)
+EXCLUDED_TEXT_TAGS = frozenset(['script', 'style', 'nav', 'header', 'footer'])
+# Elements whose strings BeautifulSoup never counts as text, even in titles and headings
+NON_TEXT_TAGS = frozenset(['script', 'style', 'template', 'rt', 'rp'])
+HEADING_TAGS = ('h1', 'h2', 'h3')
+# Elements BeautifulSoup closes as soon as they open
+VOID_TAGS = frozenset([
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'keygen', 'link', 'menuitem', 'meta',
+    'param', 'source', 'track', 'wbr', 'basefont', 'bgsound', 'command', 'frame', 'image', 'isindex',
+    'nextid', 'spacer',
+])
+# Whitespace BeautifulSoup collapses in whitespace-only strings
+ASCII_SPACES = '\x20\x0a\x09\x0c\x0d'
+# String types BeautifulSoup's get_text() treats as document text
+TEXT_STRING_TYPES = (NavigableString, CData)
+# Decoders for a byte order mark, which they also consume
+BOM_CODECS = {'utf-8': 'utf-8-sig', 'utf-16le': 'utf-16', 'utf-16be': 'utf-16', 'utf-32le': 'utf-32', 'utf-32be': 'utf-32'}
+
+
+def _has_token(value, token):
+    """Match a (possibly multi-valued) attribute such as rel against one token"""
+    if isinstance(value, str):
+        return token in value.split()
+    return value is not None and token in value
+
+
+class FeatureCollector:
+    """Collects every feature get_metadata reports from start/end/text events.
+
+    A parser backend walks the document once and calls ``start(tag, attrs)``,
+    ``text(data)`` and ``end(tag)`` in document order; ``result()`` then
+    returns ``(features, image_urls, sample_links)``.
+    """
+
+    def __init__(self, url):
+        self.url = url
+        parsed = urlparse(url)
+        self.base_url = f"{parsed.scheme}://{parsed.netloc}"
+        self.page_netloc = urlparse(normalize_url(url)).netloc
+        self.is_https = parsed.scheme == 'https'
+
+        self.title_parts = None
+        self.meta_info = {}
+        self.og_tags = {}
+        self.twitter_tags = {}
+        self.headings = {tag: [] for tag in HEADING_TAGS}
+        self.images_total = 0
+        self.images_with_alt = 0
+        self.image_urls = []
+        self.internal_links = []
+        self.external_links = []
+        self.schema_count = 0
+        self.canonical_url = None
+        self.has_canonical = False
+        self.is_mobile_friendly = False
+        self.page_language = None
+        self.has_language = False
+        self.text_parts = []
+        # Resolved links by href; pages repeat the same navigation links many times
+        self._resolved = {}
+        # First link as written on the page (made absolute) for each normalized URL
+        self._link_targets = {}
+
+        # Open elements: (tag, capture list or None)
+        self._stack = []
+        # Capture lists of the open title/heading elements
+        self._captures = []
+        self._excluded_depth = 0
+        self._non_text_depth = 0
+
+    def start(self, tag, attrs):
+        capture = None
+        if tag == 'title' and self.title_parts is None:
+            capture = self.title_parts = []
+        elif tag in self.headings:
+            capture = []
+            self.headings[tag].append(capture)
+        if capture is not None:
+            self._captures.append(capture)
+        self._stack.append((tag, capture))
+        if tag in EXCLUDED_TEXT_TAGS:
+            self._excluded_depth += 1
+        if tag in NON_TEXT_TAGS:
+            self._non_text_depth += 1
+
+        try:
+            if tag == 'meta':
+                self._meta(attrs)
+            elif tag == 'a':
+                self._link(attrs)
+            elif tag == 'img':
+                self._image(attrs)
+            elif tag == 'script':
+                if attrs.get('type') == 'application/ld+json':
+                    self.schema_count += 1
+            elif tag == 'link':
+                if not self.has_canonical and _has_token(attrs.get('rel'), 'canonical'):
+                    self.has_canonical = True
+                    self.canonical_url = attrs.get('href')
+            elif tag == 'html':
+                if not self.has_language and attrs.get('lang') is not None and not self._excluded_depth:
+                    self.has_language = True
+                    self.page_language = attrs.get('lang')
+        except (AttributeError, TypeError, ValueError):
+            pass
+
+    def end(self, tag):
+        tag, capture = self._stack.pop()
+        if capture is not None:
+            # Elements nest, so the closing capture is always the innermost one
+            self._captures.pop()
+        if tag in EXCLUDED_TEXT_TAGS:
+            self._excluded_depth -= 1
+        if tag in NON_TEXT_TAGS:
+            self._non_text_depth -= 1
+
+    @property
+    def capturing(self):
+        """True inside a title or heading whose text is being recorded"""
+        return bool(self._captures)
+
+    def text(self, data):
+        if self._non_text_depth:
+            return
+        if self._captures and not data.strip(ASCII_SPACES):
+            # BeautifulSoup collapses whitespace-only strings to one character
+            data = '\n' if '\n' in data else ' '
+        for capture in self._captures:
+            # Like the page text, the title leaves out script/style/nav/header/footer content
+            if capture is self.title_parts and self._excluded_depth:
+                continue
+            capture.append(data)
+        if not self._excluded_depth:
+            stripped = data.strip()
+            if stripped:
+                self.text_parts.append(stripped)
+
+    def _meta(self, attrs):
+        name = attrs.get('name', '')
+        prop = attrs.get('property', '')
+        content = attrs.get('content', '')
+        key = name.lower() or prop.lower()
+        if key and content:
+            self.meta_info[key] = content
+        if prop.startswith('og:'):
+            self.og_tags[prop] = content
+        if name.startswith('twitter:'):
+            self.twitter_tags[name] = content
+        if name == 'viewport' and not self._excluded_depth:
+            self.is_mobile_friendly = True
+
+    def _link(self, attrs):
+        href = attrs.get('href')
+        if href:
+            resolved = self._resolved.get(href)
+            if resolved is None:
+                target = urljoin(self.base_url, href)
+                absolute_url = normalize_url(target)
+                self._link_targets.setdefault(absolute_url, target)
+                resolved = self._resolved[href] = (absolute_url, urlparse(absolute_url).netloc == self.page_netloc)
+            absolute_url, internal = resolved
+            if internal:
+                self.internal_links.append(absolute_url)
+            else:
+                self.external_links.append(absolute_url)
+
+    def _image(self, attrs):
+        self.images_total += 1
+        if attrs.get('alt'):
+            self.images_with_alt += 1
+        src = attrs.get('src', '')
+        if src:
+            self.image_urls.append(urljoin(self.base_url, src))
+
+    def result(self):
+        title = ''.join(self.title_parts).strip() if self.title_parts is not None else None
+        headings = {
+            tag: [''.join(part.strip() for part in parts) for parts in captured]
+            for tag, captured in self.headings.items()
+        }
+        description = self.meta_info.get('description', '')
+        # Broken links sample: first 10 unique links. Normalized URLs only pick the sample; the
+        # checks go to the links as written, which the server may not answer the same way
+        sample_links = [self._link_targets[link] for link in list(set(self.internal_links + self.external_links))[:10]]
+        features = {
+            "title": title,
+            "title_length": len(title) if title is not None else 0,
+            "meta_description": description,
+            "meta_description_length": len(description),
+            "meta_keywords": self.meta_info.get('keywords', ''),
+            "og_tags": self.og_tags,
+            "twitter_tags": self.twitter_tags,
+            "headings": headings,
+            "images_total": self.images_total,
+            "images_with_alt": self.images_with_alt,
+            "images_without_alt": self.images_total - self.images_with_alt,
+            "internal_links_count": len(set(self.internal_links)),
+            "external_links_count": len(set(self.external_links)),
+            "has_schema": self.schema_count > 0,
+            "schema_count": self.schema_count,
+            "canonical_url": self.canonical_url,
+            "robots_meta": self.meta_info.get('robots', ''),
+            "is_mobile_friendly": self.is_mobile_friendly,
+            "is_https": self.is_https,
+            "page_language": self.page_language,
+            "text_content": ' '.join(self.text_parts),
+        }
+        return features, self.image_urls, sample_links
+
+
+def walk_soup(soup, collector):
+    """Feed a parsed BeautifulSoup tree to a collector in document order, without recursion"""
+    stack = [(soup, iter(soup.contents))]
+    while stack:
+        parent, children = stack[-1]
+        child = next(children, None)
+        if child is None:
+            stack.pop()
+            if parent is not soup:
+                collector.end(parent.name)
+        elif isinstance(child, Tag):
+            collector.start(child.name, child.attrs)
+            stack.append((child, iter(child.contents)))
+        elif type(child) in TEXT_STRING_TYPES:
+            collector.text(str(child))
+
+
+def walk_lxml(root, collector):
+    """Feed an lxml element tree to a collector; comments only contribute their tail text"""
+    collector.start(root.tag, dict(root.attrib))
+    if root.text:
+        collector.text(root.text)
+    stack = [(root, iter(root))]
+    while stack:
+        parent, children = stack[-1]
+        child = next(children, None)
+        if child is None:
+            stack.pop()
+            collector.end(parent.tag)
+            if stack and parent.tail:
+                collector.text(parent.tail)
+        elif isinstance(child.tag, str):
+            collector.start(child.tag, dict(child.attrib))
+            if child.text:
+                collector.text(child.text)
+            stack.append((child, iter(child)))
+        elif child.tail:
+            collector.text(child.tail)
+
+
+def walk_lexbor(root, collector):
+    """Feed a selectolax/lexbor node tree to a collector, following child/next links"""
+    node = root
+    open_elements = []
+    while node is not None:
+        tag = node.tag
+        if tag == '-text':
+            collector.text(node.text_content)
+        elif not tag.startswith(('-', '!')):
+            # Valueless attributes come back as None; BeautifulSoup reports them as ''
+            collector.start(tag, {key: value or '' for key, value in node.attributes.items()})
+            child = node.child
+            if child is not None:
+                open_elements.append(node)
+                node = child
+                continue
+            collector.end(tag)
+        while open_elements and node.next is None:
+            node = open_elements.pop()
+            collector.end(node.tag)
+        node = node.next if open_elements else None
+
+
+class StreamingScanner(HTMLParser):
+    """Incremental tokenizer that feeds a FeatureCollector without building a tree.
+
+    Used by the quick audit: ``feed_bytes`` takes the response body chunk by
+    chunk and ``done`` turns True once ``</head>`` (or ``<body>``) is reached.
+    Tokenizing is CPU work, so callers on an event loop should feed from a
+    worker thread. The body is decoded like the full analysis decodes it: a
+    byte order mark, then a ``<meta charset>`` in the first chunk, then the
+    HTTP charset.
+    With ``scan_body`` the scan goes on through the body for headings, images
+    and links, but body text other than headings is skipped. Open elements
+    follow the html.parser backend's rules: void elements close at once and an
+    end tag closes everything up to the matching open element.
+    """
+
+    def __init__(self, collector, scan_body=False):
+        super().__init__(convert_charrefs=True)
+        self.collector = collector
+        self.scan_body = scan_body
+        self.in_head = True
+        self.done = False
+        self._open = []
+        self._data = []
+        self._decoder = None
+
+    def feed_bytes(self, chunk, charset=None):
+        if self._decoder is None:
+            self._decoder = self._new_decoder(chunk, charset)
+        if not self.done:
+            self.feed(self._decoder.decode(chunk))
+        return self.done
+
+    @staticmethod
+    def _new_decoder(chunk, charset):
+        _, bom = EncodingDetector.strip_byte_order_mark(chunk)
+        for encoding in (BOM_CODECS.get(bom), EncodingDetector.find_declared_encoding(chunk, is_html=True), charset):
+            if encoding:
+                try:
+                    return codecs.getincrementaldecoder(encoding)(errors='replace')
+                except LookupError:
+                    continue
+        return codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+    def _flush(self):
+        if self._data:
+            self.collector.text(''.join(self._data))
+            self._data = []
+
+    def _end_head(self):
+        self.in_head = False
+        if not self.scan_body:
+            self.done = True
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        self._flush()
+        if tag == 'body' and self.in_head:
+            self._end_head()
+            if self.done:
+                return
+        self.collector.start(tag, {name: value or '' for name, value in attrs})
+        if tag in VOID_TAGS:
+            self.collector.end(tag)
+        else:
+            self._open.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        if self.done:
+            return
+        self._flush()
+        self.collector.start(tag, {name: value or '' for name, value in attrs})
+        self.collector.end(tag)
+
+    def handle_endtag(self, tag):
+        if self.done or tag not in self._open:
+            return
+        self._flush()
+        while self._open:
+            name = self._open.pop()
+            self.collector.end(name)
+            if name == tag:
+                break
+        if tag == 'head' and self.in_head:
+            self._end_head()
+
+    def handle_data(self, data):
+        # Past the head only heading text is kept
+        if not self.done and (self.in_head or self.collector.capturing):
+            self._data.append(data)
+
+    def handle_comment(self, data):
+        self._flush()
+
+    def handle_decl(self, decl):
+        self._flush()
+
+    def handle_pi(self, data):
+        self._flush()
+
+    def result(self):
+        if not self.done:
+            self.close()
+        self._flush()
+        while self._open:
+            self.collector.end(self._open.pop())
+        features, image_urls, sample_links = self.collector.result()
+        # Body text is never scanned, so there is no page text to report
+        features['text_content'] = ''
+        return features, image_urls, sample_links
+
+
+def decode_html(content):
+    """Decode page bytes the way BeautifulSoup does, so every backend sees the same text"""
+    if isinstance(content, str):
+        return content
+    return UnicodeDammit(content, is_html=True).unicode_markup or ''
+
+
+def available_backends():
+    """Parser backends usable in this environment, reference first"""
+    backends = ['html.parser']
+    if LXML_AVAILABLE:
+        backends.append('lxml')
+    if SELECTOLAX_AVAILABLE:
+        backends.append('selectolax')
+    return backends
+
+
+def extract_features(url, content, backend=None):
+    """Parse HTML once and collect all on-page features in a single traversal"""
+    backend = backend or PARSER_BACKEND
+    if backend not in available_backends():
+        raise ValueError(f"Parser backend {backend!r} is not available (installed: {', '.join(available_backends())})")
+    collector = FeatureCollector(url)
+    if backend == 'lxml':
+        markup = decode_html(content)
+        if markup.strip():
+            root = etree.fromstring(markup.encode('utf-8'), etree.HTMLParser(encoding='utf-8'))
+            if root is not None:
+                walk_lxml(root, collector)
+    elif backend == 'selectolax':
+        walk_lexbor(LexborHTMLParser(decode_html(content)).root, collector)
+    else:
+        walk_soup(BeautifulSoup(content, 'html.parser'), collector)
+    return collector.result()
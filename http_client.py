@@ -0,0 +1,710 @@
+"""Process-wide asyncio fetch engine used by every analysis mode.
+
+All HTTP traffic runs on one background event loop that owns a single
+keep-alive aiohttp session. Synchronous callers (the Streamlit script and
+its cached functions) submit coroutines with ``run_sync`` and consume async
+generators with ``iter_sync``.
+"""
+import asyncio
+import atexit
+import contextlib
+import contextvars
+import inspect
+import queue
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import aiohttp
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+}
+
+# Total open connections, and keep-alive connections per host
+CONNECTION_LIMIT = 200
+DEFAULT_POOL_SIZE = 10
+# Per-host overrides, e.g. {'www.example.com': 20}
+HOST_POOL_SIZES = {}
+KEEPALIVE_TIMEOUT = 30
+
+# Politeness: sustained requests per second and burst per host. A robots.txt
+# Crawl-delay (capped at MAX_CRAWL_DELAY seconds) slows a host down further.
+HOST_REQUEST_RATE = 10.0
+HOST_REQUEST_BURST = 20
+# Per-host overrides, e.g. {'www.example.com': 2.0}
+HOST_REQUEST_RATES = {}
+MAX_CRAWL_DELAY = 10
+# How often a scheduler with every host busy looks for a free one (seconds)
+HOST_POLL_INTERVAL = 0.05
+
+# Retries of connection failures and of 429/503 responses: exponential backoff
+# with full jitter, unless the server sends a Retry-After. A Retry-After longer
+# than MAX_RETRY_AFTER is not waited for; the response is returned as is.
+RETRY_ATTEMPTS = 3
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 10
+RETRY_STATUSES = {429, 503}
+MAX_RETRY_AFTER = 30
+
+# Circuit breaker: after BREAKER_FAILURES consecutive failed requests to a host
+# (connection errors, timeouts, 429 and 5xx) further requests fail at once for
+# BREAKER_COOLDOWN seconds, then a single probe request decides whether to close it
+BREAKER_FAILURES = 5
+BREAKER_COOLDOWN = 30
+
+# Image weight probing: simultaneous HEADs per host, per-request timeout
+# and an overall deadline for the whole batch (seconds)
+IMAGE_PROBE_PER_HOST = 6
+IMAGE_PROBE_TIMEOUT = 5
+IMAGE_PROBE_DEADLINE = 10
+
+# Read size for streamed bodies
+STREAM_CHUNK_SIZE = 16 * 1024
+
+_loop = None
+_loop_lock = threading.Lock()
+_session = None
+_host_slots = {}
+_host_buckets = {}
+_host_breakers = {}
+_current_stats = contextvars.ContextVar('connection_stats', default=None)
+_current_retries = contextvars.ContextVar('retry_stats', default=None)
+
+
+class ConnectionStats:
+    """Counts requests sent and TCP connections opened during an analysis"""
+
+    def __init__(self):
+        self.requests = 0
+        self.opened = 0
+        self._lock = threading.Lock()
+
+    def record(self, requests=0, opened=0):
+        with self._lock:
+            self.requests += requests
+            self.opened += opened
+
+    @property
+    def reused(self):
+        return max(0, self.requests - self.opened)
+
+    def as_dict(self):
+        return {
+            "requests": self.requests,
+            "connections_opened": self.opened,
+            "connections_reused": self.reused,
+        }
+
+
+# Totals for the lifetime of the process
+GLOBAL_STATS = ConnectionStats()
+
+
+def _record(requests=0, opened=0):
+    GLOBAL_STATS.record(requests, opened)
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(requests, opened)
+
+
+class RetryStats:
+    """Counts retried requests, circuit breakers tripped and requests failed fast during an analysis"""
+
+    def __init__(self):
+        self.retries = 0
+        self.breaker_trips = 0
+        self.failed_fast = 0
+
+    def as_dict(self):
+        return {
+            "retries": self.retries,
+            "breaker_trips": self.breaker_trips,
+            "failed_fast": self.failed_fast,
+        }
+
+
+def _record_retry(retries=0, breaker_trips=0, failed_fast=0):
+    stats = _current_retries.get()
+    if stats is not None:
+        stats.retries += retries
+        stats.breaker_trips += breaker_trips
+        stats.failed_fast += failed_fast
+
+
+class CircuitOpenError(aiohttp.ClientError):
+    """A request was refused without being sent because its host's circuit breaker is open"""
+
+    def __init__(self, host, retry_in):
+        super().__init__(f"Circuit breaker open for {host}: failing fast for another {retry_in:.0f}s")
+        self.host = host
+        self.retry_in = retry_in
+
+
+class FetchResult:
+    """Status, headers, body and timing of a completed request"""
+
+    def __init__(self, url, status, headers, body, elapsed, charset=None, complete=True, response=None):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.elapsed = elapsed
+        self.charset = charset
+        # False when a streamed read stopped before the end of the body
+        self.complete = complete
+        # What raise_for_status needs from the aiohttp response
+        self.reason = response.reason if response is not None else None
+        self._request_info = response.request_info if response is not None else None
+        self._history = response.history if response is not None else ()
+
+    def raise_for_status(self):
+        if self.status >= 400:
+            raise aiohttp.ClientResponseError(
+                self._request_info, self._history, status=self.status, message=self.reason or '', headers=self.headers
+            )
+
+    @property
+    def content_length(self):
+        """Declared body size from Content-Length, or None"""
+        try:
+            return int(self.headers['content-length'])
+        except (KeyError, ValueError):
+            return None
+
+    @property
+    def text(self):
+        return self.body.decode(self.charset or 'utf-8', errors='replace')
+
+
+async def _on_connection_create_end(session, context, params):
+    _record(requests=1, opened=1)
+
+
+async def _on_connection_reuse(session, context, params):
+    _record(requests=1)
+
+
+def _run_loop(loop):
+    asyncio.set_event_loop(loop)
+    loop.run_forever()
+
+
+def get_loop():
+    """Return the background event loop, starting it on first use"""
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=_run_loop, args=(loop,), name='fetch-engine', daemon=True).start()
+                _loop = loop
+    return _loop
+
+
+def run_sync(coro, timeout=None):
+    """Run a coroutine on the fetch engine loop and wait for its result"""
+    return asyncio.run_coroutine_threadsafe(coro, get_loop()).result(timeout)
+
+
+_END_OF_STREAM = object()
+
+
+def iter_sync(agen, timeout=None):
+    """Iterate an async generator on the fetch engine loop from synchronous code.
+
+    Items are handed over as soon as they are produced. Closing the
+    iterator early cancels the generator; its exceptions are re-raised here.
+    """
+    items = queue.Queue()
+
+    async def pump():
+        try:
+            async for item in agen:
+                items.put(item)
+        finally:
+            items.put(_END_OF_STREAM)
+
+    future = asyncio.run_coroutine_threadsafe(pump(), get_loop())
+    try:
+        while True:
+            item = items.get(timeout=timeout)
+            if item is _END_OF_STREAM:
+                break
+            yield item
+        future.result()
+    finally:
+        future.cancel()
+
+
+def get_session():
+    """Return the shared keep-alive session (must be called on the engine loop)"""
+    global _session
+    if _session is None or _session.closed:
+        trace = aiohttp.TraceConfig()
+        trace.on_connection_create_end.append(_on_connection_create_end)
+        trace.on_connection_reuseconn.append(_on_connection_reuse)
+        connector = aiohttp.TCPConnector(
+            limit=CONNECTION_LIMIT,
+            limit_per_host=0,
+            keepalive_timeout=KEEPALIVE_TIMEOUT,
+        )
+        _session = aiohttp.ClientSession(connector=connector, headers=DEFAULT_HEADERS, trace_configs=[trace])
+    return _session
+
+
+class TokenBucket:
+    """Request rate limit of one host (engine loop only).
+
+    Each request takes a token as it arrives, letting the balance go
+    negative, and sleeps until that token would have been refilled, so
+    waiting requests go out at the bucket's rate in arrival order.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def set_rate(self, rate, burst):
+        self._refill()
+        self.rate = rate
+        self.burst = burst
+        self.tokens = min(self.tokens, burst)
+
+    def delay(self):
+        """Seconds until a request would go out without waiting (0 if one can go now)"""
+        self._refill()
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+    async def acquire(self):
+        self._refill()
+        self.tokens -= 1
+        if self.tokens < 0:
+            try:
+                await asyncio.sleep(-self.tokens / self.rate)
+            except asyncio.CancelledError:
+                # Gave up before its turn (e.g. a probe past its deadline): later arrivals need not wait for it
+                self.tokens += 1
+                raise
+
+    def hold(self, seconds):
+        """Let no request out for ``seconds`` (e.g. a Retry-After), on top of those already waiting"""
+        self._refill()
+        self.tokens = min(self.tokens, 0) - seconds * self.rate
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker of one host (engine loop only).
+
+    Closed, requests go through. After BREAKER_FAILURES failures in a row
+    it opens and ``allow`` refuses everything for BREAKER_COOLDOWN seconds.
+    It then lets one probe request through (half-open): a success closes
+    the breaker, a failure opens it for another cooldown. A probe that never
+    reports back (cancelled) is replaced after a cooldown.
+    """
+
+    def __init__(self):
+        self.failures = 0
+        self.opened_at = None
+        self.probe_started = None
+        self.trips = 0
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        return 'half-open' if self.probe_started is not None else 'open'
+
+    def retry_in(self):
+        """Seconds until the next probe may go out"""
+        return max(0.0, self.opened_at + BREAKER_COOLDOWN - time.monotonic()) if self.opened_at is not None else 0.0
+
+    def allow(self):
+        if self.opened_at is None:
+            return True
+        now = time.monotonic()
+        if now - self.opened_at < BREAKER_COOLDOWN:
+            return False
+        if self.probe_started is not None and now - self.probe_started < BREAKER_COOLDOWN:
+            return False
+        self.probe_started = now
+        return True
+
+    def success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.probe_started = None
+
+    def failure(self):
+        """Count a failed request; True when it opened the breaker"""
+        self.failures += 1
+        if self.probe_started is not None or (self.opened_at is None and self.failures >= BREAKER_FAILURES):
+            self.opened_at = time.monotonic()
+            self.probe_started = None
+            self.trips += 1
+            return True
+        return False
+
+
+def host_of(url):
+    return urlparse(url).netloc.lower()
+
+
+def _host_slot(host):
+    slot = _host_slots.get(host)
+    if slot is None:
+        slot = asyncio.Semaphore(HOST_POOL_SIZES.get(host, DEFAULT_POOL_SIZE))
+        _host_slots[host] = slot
+    return slot
+
+
+def _host_bucket(host):
+    bucket = _host_buckets.get(host)
+    if bucket is None:
+        bucket = TokenBucket(HOST_REQUEST_RATES.get(host, HOST_REQUEST_RATE), HOST_REQUEST_BURST)
+        _host_buckets[host] = bucket
+    return bucket
+
+
+def _host_breaker(host):
+    breaker = _host_breakers.get(host)
+    if breaker is None:
+        breaker = CircuitBreaker()
+        _host_breakers[host] = breaker
+    return breaker
+
+
+def breaker_states():
+    """{host: (state, trips)} of every host whose breaker has tripped at least once"""
+    return {host: (breaker.state, breaker.trips) for host, breaker in list(_host_breakers.items()) if breaker.trips}
+
+
+def backoff_delay(attempt):
+    """Seconds to wait before retry number ``attempt`` (from 0): exponential, with full jitter"""
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+
+
+def retry_after(headers):
+    """Seconds asked for by a Retry-After header (delta-seconds or HTTP date), or None"""
+    value = headers.get('retry-after')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def _is_failure_status(status):
+    return status == 429 or status >= 500
+
+
+@contextlib.asynccontextmanager
+async def _host_turn(url, admit=None):
+    """Wait for a free connection slot on the URL's host, then for its rate limit.
+
+    ``admit()`` runs once both are held, right before the request goes out,
+    and may raise to call the request off (e.g. its circuit breaker opened
+    while it waited).
+    """
+    host = host_of(url)
+    async with _host_slot(host):
+        await _host_bucket(host).acquire()
+        if admit is not None:
+            admit()
+        yield
+
+
+def set_crawl_delay(url, delay):
+    """Space requests to the URL's host at least ``delay`` seconds apart (robots.txt Crawl-delay)"""
+    delay = min(delay, MAX_CRAWL_DELAY)
+    if delay > 0:
+        _host_bucket(host_of(url)).set_rate(1 / delay, 1)
+
+
+class HostRoundRobin:
+    """Hands out URLs one host at a time, in turn, skipping hosts that cannot take a request yet.
+
+    A host is skipped while all its connection slots are busy or its rate
+    limit would make a request wait, so slow or rate-limited hosts do not
+    hold up the others. Use on the engine loop.
+    """
+
+    def __init__(self, urls):
+        self._queues = {}
+        for url in urls:
+            try:
+                host = host_of(url)
+            except ValueError:
+                # Unparsable (e.g. "http://[bad"): still handed out, so fetching it reports the error
+                host = ''
+            self._queues.setdefault(host, []).append(url)
+        for pending in self._queues.values():
+            pending.reverse()
+
+    def __len__(self):
+        return sum(map(len, self._queues.values()))
+
+    async def next(self):
+        """The next URL to start, waiting until some host is ready"""
+        while True:
+            wait = None
+            for host in list(self._queues):
+                pending = self._queues.pop(host)
+                # Back of the rotation, whether or not it gets a turn now
+                if pending:
+                    self._queues[host] = pending
+                delay = HOST_POLL_INTERVAL if _host_slot(host).locked() else _host_bucket(host).delay()
+                if delay == 0:
+                    url = pending.pop()
+                    if not pending:
+                        del self._queues[host]
+                    return url
+                wait = delay if wait is None else min(wait, delay)
+            await asyncio.sleep(wait)
+
+
+def track_retries():
+    """Start counting retries and breaker trips for the current task and return the counter"""
+    stats = RetryStats()
+    _current_retries.set(stats)
+    return stats
+
+
+async def _send(url, attempt, retries, raise_for_status, probe=False):
+    """Run ``attempt(admit)`` (one request, returning a FetchResult) behind the host's circuit breaker.
+
+    The breaker is checked on arrival and again by ``admit``, which attempt
+    passes to ``_host_turn``: a request that waited for its host's rate limit
+    while the breaker opened is then refused instead of sent.
+
+    Connection failures and RETRY_STATUSES responses are retried up to
+    ``retries`` times. Timeouts are not: another full timeout would cost
+    more than the breaker saves. A probe is refused while the breaker is
+    not closed but its outcome is not counted, so link and image checks
+    cannot open (or take the half-open probe of) a breaker.
+    """
+    host = host_of(url)
+    breaker = _host_breaker(host)
+    tries = 0
+
+    def refuse():
+        _record_retry(failed_fast=1)
+        return CircuitOpenError(host, breaker.retry_in())
+
+    def admit():
+        if probe:
+            allowed = breaker.state == 'closed'
+        else:
+            # Opened (or re-opened) since this attempt was let in: it may still be the next half-open probe
+            allowed = breaker.opened_at is None or breaker.opened_at == admitted_at or breaker.allow()
+        if not allowed:
+            raise refuse()
+
+    while True:
+        allowed = breaker.state == 'closed' if probe else breaker.allow()
+        if not allowed:
+            raise refuse()
+        admitted_at = breaker.opened_at
+        # The last allowed attempt, or one whose failure just opened the breaker
+        final = tries >= retries
+        try:
+            result = await attempt(admit)
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+            if not probe and breaker.failure():
+                _record_retry(breaker_trips=1)
+                final = True
+            if final or not isinstance(e, aiohttp.ClientConnectorError):
+                raise
+            delay = backoff_delay(tries)
+        else:
+            if not probe:
+                if not _is_failure_status(result.status):
+                    breaker.success()
+                elif breaker.failure():
+                    _record_retry(breaker_trips=1)
+                    final = True
+            delay = retry_after(result.headers) if result.status in RETRY_STATUSES else None
+            if final or result.status not in RETRY_STATUSES or (delay or 0) > MAX_RETRY_AFTER:
+                if raise_for_status:
+                    result.raise_for_status()
+                return result
+            if delay is None:
+                delay = backoff_delay(tries)
+            else:
+                # The server asked the whole host to wait, not just this request
+                _host_bucket(host).hold(delay)
+        tries += 1
+        _record_retry(retries=1)
+        await asyncio.sleep(delay)
+
+
+def track_connections():
+    """Start counting connections for the current task and return the counter"""
+    stats = ConnectionStats()
+    _current_stats.set(stats)
+    return stats
+
+
+async def fetch(url, method='GET', timeout=15, raise_for_status=False, retries=RETRY_ATTEMPTS, probe=False):
+    """Send a request through the shared session and return a FetchResult.
+
+    Requests go through the host's circuit breaker; failures are retried
+    per the RETRY_* settings, at most ``retries`` times. ``probe`` marks
+    audit requests (link/image HEADs) that must not move the breaker.
+    """
+    async def attempt(admit):
+        async with _host_turn(url, admit):
+            start = time.monotonic()
+            async with get_session().request(
+                method, url,
+                timeout=aiohttp.ClientTimeout(total=timeout),
+                allow_redirects=True,
+            ) as response:
+                body = await response.read() if method != 'HEAD' else b''
+                return FetchResult(
+                    url=str(response.url),
+                    status=response.status,
+                    headers={key.lower(): value for key, value in response.headers.items()},
+                    body=body,
+                    elapsed=time.monotonic() - start,
+                    charset=response.charset,
+                    response=response,
+                )
+
+    return await _send(url, attempt, retries, raise_for_status, probe)
+
+
+async def fetch_stream(url, consume, timeout=15, chunk_size=STREAM_CHUNK_SIZE, raise_for_status=False,
+                       retries=RETRY_ATTEMPTS):
+    """GET a URL and hand the body to ``consume(chunk, charset)`` as it arrives.
+
+    consume may be a coroutine function, e.g. one that processes the chunk
+    in a worker thread; the next chunk is read once it has returned.
+    Reading stops as soon as consume returns True; the connection is then
+    dropped instead of draining the rest of the body. The returned
+    FetchResult holds only the bytes actually read. Error responses
+    (status 400 and up) are not read at all. Breaker and retries as in fetch.
+    """
+    async def attempt(admit):
+        async with _host_turn(url, admit):
+            start = time.monotonic()
+            async with get_session().get(
+                url,
+                # Uncompressed, so the bytes read match what came over the wire and Content-Length
+                headers={'Accept-Encoding': 'identity'},
+                timeout=aiohttp.ClientTimeout(total=timeout),
+                allow_redirects=True,
+            ) as response:
+                chunks = []
+                complete = True
+                if response.status < 400:
+                    async for chunk in response.content.iter_chunked(chunk_size):
+                        chunks.append(chunk)
+                        stop = consume(chunk, response.charset)
+                        if inspect.isawaitable(stop):
+                            stop = await stop
+                        if stop:
+                            complete = response.content.at_eof()
+                            break
+                else:
+                    complete = False
+                if not complete:
+                    response.close()
+                return FetchResult(
+                    url=str(response.url),
+                    status=response.status,
+                    headers={key.lower(): value for key, value in response.headers.items()},
+                    body=b''.join(chunks),
+                    elapsed=time.monotonic() - start,
+                    charset=response.charset,
+                    complete=complete,
+                    response=response,
+                )
+
+    return await _send(url, attempt, retries, raise_for_status)
+
+
+async def head_status(url, timeout=5):
+    """Return the HEAD status code of a URL, or None if the request failed (a probe: not retried)"""
+    try:
+        return (await fetch(url, method='HEAD', timeout=timeout, retries=0, probe=True)).status
+    except Exception:
+        return None
+
+
+async def probe_image_sizes(image_urls, per_host=IMAGE_PROBE_PER_HOST,
+                            timeout=IMAGE_PROBE_TIMEOUT, deadline=IMAGE_PROBE_DEADLINE):
+    """HEAD images concurrently and return (sizes in KB, number of probes cut short or refused).
+
+    Sizes keep the input order but leave out every image without a size:
+    a failed probe, one cut short, or a response without a usable
+    Content-Length. So they do not line up with ``image_urls``.
+
+    At most ``per_host`` requests run against one host at a time, and probes
+    still pending once ``deadline`` seconds have passed are cancelled; they
+    are counted with the probes an open circuit breaker refused. Probes wait
+    for the host's rate limit, so a Crawl-delay leaves most of a large page's
+    images unprobed.
+    """
+    if not image_urls:
+        return [], 0
+    host_limits = {}
+    refused = 0
+
+    async def probe(url):
+        nonlocal refused
+        host = urlparse(url).netloc.lower()
+        if host not in host_limits:
+            host_limits[host] = asyncio.Semaphore(per_host)
+        async with host_limits[host]:
+            try:
+                response = await fetch(url, method='HEAD', timeout=timeout, retries=0, probe=True)
+            except CircuitOpenError:
+                refused += 1
+                return None
+            except Exception:
+                return None
+        if 'content-length' in response.headers:
+            try:
+                return int(response.headers['content-length']) / 1024
+            except ValueError:
+                return None
+        return None
+
+    tasks = [asyncio.ensure_future(probe(url)) for url in image_urls]
+    done, pending = await asyncio.wait(tasks, timeout=deadline)
+    for task in pending:
+        task.cancel()
+    return [task.result() for task in tasks if task in done and task.result() is not None], len(pending) + refused
+
+
+async def _close_session():
+    if _session is not None and not _session.closed:
+        await _session.close()
+
+
+@atexit.register
+def _shutdown():
+    if _loop is not None and _loop.is_running():
+        try:
+            run_sync(_close_session(), timeout=5)
+        except Exception:
+            pass
@@ -0,0 +1,87 @@
+"""Counting many keywords in a text in one pass (Aho-Corasick automaton)."""
+from collections import deque
+
+
+def _is_word_char(char):
+    return char.isalnum() or char == '_'
+
+
+class KeywordMatcher:
+    """Case-insensitive whole-word counter for a fixed set of keywords and phrases.
+
+    Build it once and call ``count`` on as many texts as needed; each call is
+    a single pass over the text no matter how many keywords there are. A
+    match only counts when it is not part of a longer word ("art" does not
+    match inside "start"), and repeated matches of one keyword never overlap,
+    like ``str.count``.
+    """
+
+    def __init__(self, keywords):
+        self.keywords = []
+        for keyword in keywords:
+            keyword = keyword.strip().lower()
+            if keyword and keyword not in self.keywords:
+                self.keywords.append(keyword)
+
+        # Trie transitions, failure links and the keywords ending at each state
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        for index, keyword in enumerate(self.keywords):
+            state = 0
+            for char in keyword:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                state = next_state
+            self._output[state].append(index)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+        # Whole-word checks only apply where the keyword itself starts/ends with a word character
+        self._bounded = [(_is_word_char(k[0]), _is_word_char(k[-1])) for k in self.keywords]
+
+    def count(self, text):
+        """Return {keyword (lower-cased): whole-word occurrences in text}"""
+        counts = dict.fromkeys(self.keywords, 0)
+        if not self.keywords or not text:
+            return counts
+        text = text.lower()
+        goto, fail, output = self._goto, self._fail, self._output
+        keywords, bounded = self.keywords, self._bounded
+        last_end = [0] * len(keywords)
+        text_length = len(text)
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if not output[state]:
+                continue
+            end = position + 1
+            for index in output[state]:
+                start = end - len(keywords[index])
+                if start < last_end[index]:
+                    continue
+                check_start, check_end = bounded[index]
+                if check_start and start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                if check_end and end < text_length and _is_word_char(text[end]):
+                    continue
+                counts[keywords[index]] += 1
+                last_end[index] = end
+        return counts
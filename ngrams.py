@@ -0,0 +1,86 @@
+"""Streaming 2-4 word phrase counts with a fixed memory ceiling."""
+import heapq
+import string
+
+# Phrase lengths counted, in words
+NGRAM_SIZES = (2, 3, 4)
+# Counters a sketch may hold before it is trimmed back to half
+PHRASE_SKETCH_MAX_ENTRIES = 5000
+# Phrases kept per page in the analysis results
+PHRASES_PER_PAGE = 50
+
+_EDGE_PUNCTUATION = string.punctuation + '“”‘’«»…–—'
+_SENTENCE_END = ('.', '!', '?')
+
+
+class HeavyHitters:
+    """Misra-Gries heavy-hitters sketch holding at most ``max_entries`` counters.
+
+    When the table fills up, the count of the median counter is subtracted
+    from every counter and those that reach zero are dropped, so memory stays
+    bounded however long the stream is. Stored counts never exceed the true
+    counts and fall short by at most ``error``. Sketches can be merged,
+    which is how bulk runs build site-wide totals from per-page sketches.
+    """
+
+    def __init__(self, max_entries=PHRASE_SKETCH_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.counts = {}
+        self.error = 0
+
+    def add(self, item, count=1):
+        self.counts[item] = self.counts.get(item, 0) + count
+        if len(self.counts) > self.max_entries:
+            self._trim()
+
+    def update(self, items):
+        for item, count in items:
+            self.add(item, count)
+
+    def merge(self, state):
+        """Add in another sketch given as its ``as_dict()``; the error bounds add up"""
+        self.error += state["error"]
+        self.update(state["counts"].items())
+
+    def as_dict(self):
+        return {"counts": dict(self.counts), "error": self.error}
+
+    def _trim(self):
+        threshold = heapq.nlargest(self.max_entries // 2 + 1, self.counts.values())[-1]
+        self.error += threshold
+        self.counts = {item: count - threshold for item, count in self.counts.items() if count > threshold}
+
+    def top(self, n):
+        """The n largest counters as (item, count) pairs, ties in first-seen order"""
+        return heapq.nlargest(n, self.counts.items(), key=lambda entry: entry[1])
+
+
+def iter_ngrams(tokens, sizes=NGRAM_SIZES, stop_words=frozenset()):
+    """Yield lower-case n-grams of whitespace tokens, not crossing sentence ends or non-word tokens.
+
+    Phrases that start or end with a stop word are skipped.
+    """
+    longest = max(sizes)
+    window = []
+    for token in tokens:
+        word = token.strip(_EDGE_PUNCTUATION).lower()
+        if not word.isalpha():
+            window = []
+            continue
+        window.append(word)
+        if len(window) > longest:
+            del window[0]
+        if word not in stop_words:
+            for size in sizes:
+                if len(window) >= size and window[-size] not in stop_words:
+                    yield ' '.join(window[-size:])
+        if token.endswith(_SENTENCE_END):
+            window = []
+
+
+def phrase_sketch(tokens, stop_words=frozenset(), max_entries=PHRASE_SKETCH_MAX_ENTRIES):
+    """Bounded phrase counts of a token stream"""
+    sketch = HeavyHitters(max_entries)
+    for phrase in iter_ngrams(tokens, stop_words=stop_words):
+        sketch.add(phrase)
+    return sketch
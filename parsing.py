@@ -0,0 +1,139 @@
+"""Page parsing (the CPU-bound half of an analysis) and the process pool bulk runs parse in.
+
+parse_page lives here rather than in app.py so that worker processes can
+import it without executing the Streamlit script.
+"""
+import asyncio
+import atexit
+import multiprocessing
+import os
+import sys
+import types
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from html_extract import extract_features
+from ngrams import PHRASES_PER_PAGE, phrase_sketch
+from readability import readability_scores
+from text_stats import TextStats
+from tfidf import get_stop_words
+
+# Parser processes, and fetched pages allowed to wait for one
+PARSE_WORKERS = os.cpu_count() or 1
+PARSE_QUEUE_SIZE = 2 * PARSE_WORKERS
+
+
+def parse_page(url, content):
+    """Extract on-page SEO features from the HTML of a fetched page"""
+    features, image_urls, sample_links = extract_features(url, content)
+    text_stats = TextStats(features['text_content'])
+    features["text_stats"] = text_stats.as_dict()
+
+    # Readability over the whole text
+    features["readability"] = readability_scores(text_stats.frequencies, text_stats.sentence_count)
+    features["readability_score"] = features["readability"]["flesch_reading_ease"]
+
+    # Frequent 2-4 word phrases; the whole sketch too, so bulk runs can merge site-wide counts
+    phrases = phrase_sketch(text_stats.tokens, get_stop_words())
+    features["top_phrases"] = [[phrase, count] for phrase, count in phrases.top(PHRASES_PER_PAGE)]
+    features["phrase_sketch"] = phrases.as_dict()
+    return features, image_urls, sample_links
+
+
+async def parse_in_thread(url, content):
+    """parse_page in a worker thread, off the event loop (single-page analyses)"""
+    return await asyncio.to_thread(parse_page, url, content)
+
+
+class ParseStage:
+    """CPU stage of the bulk pipeline: parse_page in a pool of worker processes.
+
+    Fetched pages reach the pool through a bounded queue drained by one
+    feeder task per worker. When the parsers fall behind the queue fills
+    up and ``parse`` blocks, so the fetch tasks that called it stop pulling
+    more pages and at most ``queue_size`` bodies sit in memory waiting.
+    Everything but the pool itself runs on the fetch engine loop; the pool
+    is started on first use.
+    """
+
+    def __init__(self, workers=PARSE_WORKERS, queue_size=PARSE_QUEUE_SIZE):
+        self.workers = workers
+        self.queue_size = queue_size
+        self._pool = None
+        self._loop = None
+        self._queue = None
+        self._feeders = []
+
+    def _new_pool(self):
+        # spawn: the engine loop and Streamlit threads make fork unsafe, and it is all Windows has
+        pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+        # A spawned worker re-runs the parent's __main__, which under Streamlit is app.py itself.
+        # Start every worker now, while __main__ is an empty module, so none of them runs the script.
+        main = sys.modules['__main__']
+        sys.modules['__main__'] = types.ModuleType('__main__')
+        try:
+            for _ in range(self.workers):
+                pool.submit(os.getpid)
+        finally:
+            sys.modules['__main__'] = main
+        return pool
+
+    def _start(self):
+        if self._queue is None:
+            self._loop = asyncio.get_running_loop()
+            self._pool = self._new_pool()
+            self._queue = asyncio.Queue(self.queue_size)
+            self._feeders = [asyncio.ensure_future(self._feed()) for _ in range(self.workers)]
+
+    async def _feed(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            url, content, result = await self._queue.get()
+            if result.cancelled():
+                continue
+            pool = self._pool
+            try:
+                parsed = await loop.run_in_executor(pool, parse_page, url, content)
+            except BrokenProcessPool as e:
+                # A worker died (e.g. out of memory): fail this page and carry on with a fresh pool
+                if self._pool is pool:
+                    pool.shutdown(wait=False)
+                    self._pool = self._new_pool()
+                if not result.done():
+                    result.set_exception(e)
+            except Exception as e:
+                if not result.done():
+                    result.set_exception(e)
+            else:
+                if not result.done():
+                    result.set_result(parsed)
+
+    async def parse(self, url, content):
+        """parse_page(url, content) in the pool, waiting for queue space first"""
+        self._start()
+        result = asyncio.get_running_loop().create_future()
+        await self._queue.put((url, content, result))
+        return await result
+
+    def queued(self):
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def _stop_feeders(self):
+        for feeder in self._feeders:
+            feeder.cancel()
+        await asyncio.gather(*self._feeders, return_exceptions=True)
+
+    def shutdown(self):
+        """Stop the feeder tasks and the worker processes"""
+        if self._queue is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._stop_feeders(), self._loop).result(timeout=5)
+        except Exception:
+            pass
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+# Shared by every bulk run; lives here so it persists across Streamlit reruns
+parse_stage = ParseStage()
+atexit.register(parse_stage.shutdown)
@@ -0,0 +1,201 @@
+"""Declarative rule tables, compiled once and evaluated over whole columns of page features.
+
+A rule is a list of tiers tried in order, like an if/elif chain: the first
+tier whose conditions all hold decides the rule's score points and its
+recommendation, either of which may be absent. Conditions are plain
+(feature, operator, value) triples, so a table can be read, extended or
+re-weighted without touching this module. Scores are evaluated for all
+pages of a batch at once with NumPy; one page's points and recommendations
+come from a plain-Python pass over the same compiled tiers. A page whose
+value for any of a rule's features is unknown (None, or NaN in a batch)
+is left out of that rule: it neither scores nor recommends.
+"""
+import math
+import operator
+import string
+
+import numpy as np
+
+OPERATORS = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+}
+
+
+class Tier:
+    """One compiled branch of a rule"""
+
+    def __init__(self, when=(), points=None, scale=None, per=None, recommend=None):
+        for feature, op, value in when:
+            if op not in OPERATORS:
+                raise ValueError(f"Unknown operator {op!r} in condition on {feature!r}")
+        self.conditions = [(feature, OPERATORS[op], value) for feature, op, value in when]
+        # Weight name; scaled by a 0-1 feature, or one point per `per` = (feature, weight name) up to it
+        self.points = points
+        self.scale = scale
+        self.per = per
+        self.recommend = recommend
+
+    def features(self):
+        names = {feature for feature, _, _ in self.conditions}
+        if self.recommend:
+            # Features the recommendation text is formatted with
+            names.update(
+                field for _, field, _, _ in string.Formatter().parse(self.recommend["recommendation"]) if field
+            )
+        if self.scale:
+            names.add(self.scale)
+        if self.per:
+            names.add(self.per[0])
+        return names
+
+    def mask(self, columns, rows):
+        mask = np.ones(rows, dtype=bool)
+        for feature, compare, value in self.conditions:
+            mask &= compare(columns[feature], value)
+        return mask
+
+    def holds(self, values):
+        return all(compare(values[feature], value) for feature, compare, value in self.conditions)
+
+    def points_for(self, values, weights):
+        """Points of one page (the scalar counterpart of score)"""
+        if self.points is None:
+            return 0
+        points = weights[self.points]
+        if self.scale:
+            return math.floor(points * values[self.scale])
+        if self.per:
+            feature, per_point = self.per
+            return min(points, values[feature] // weights[per_point])
+        return points
+
+    def score(self, columns, weights):
+        if self.points is None:
+            return 0
+        points = weights[self.points]
+        if self.scale:
+            return np.floor(points * columns[self.scale])
+        if self.per:
+            feature, per_point = self.per
+            return np.minimum(points, columns[feature] // weights[per_point])
+        return points
+
+
+class RuleResults:
+    """Scores of a batch of pages, in total and per rule"""
+
+    def __init__(self, scores, points):
+        self.scores = scores
+        # Points of every rule that can score, by rule name, one array each
+        self.points = points
+
+
+class RuleSet:
+    """A compiled rule table.
+
+    ``rules`` is a list of (name, tiers) pairs, each tier a dict of Tier
+    arguments. ``ratios`` maps derived feature names to (numerator,
+    denominator) feature pairs; a ratio is 0 where its denominator is 0.
+    """
+
+    def __init__(self, rules, ratios=None):
+        self.rules = [(name, [Tier(**tier) for tier in tiers]) for name, tiers in rules]
+        self.ratios = ratios or {}
+        # Input features of each rule, ratios expanded to the two they are computed from
+        self._inputs = []
+        for _, tiers in self.rules:
+            names = set().union(*(tier.features() for tier in tiers))
+            for name in names & set(self.ratios):
+                names |= set(self.ratios[name])
+            self._inputs.append(names - set(self.ratios))
+        # Rules that can add points, the only ones a score-only evaluation runs
+        self.scoring_rules = [
+            position for position, (_, tiers) in enumerate(self.rules)
+            if any(tier.points is not None for tier in tiers)
+        ]
+
+    def max_points(self, weights):
+        """Most points each rule that can score may give, by rule name"""
+        return {
+            self.rules[position][0]: max(weights[tier.points] for tier in self.rules[position][1] if tier.points is not None)
+            for position in self.scoring_rules
+        }
+
+    def evaluate_one(self, features, weights):
+        """(points by rule, recommendations) of one page's feature dict, without NumPy.
+
+        Runs the same compiled tiers as evaluate with plain Python
+        arithmetic, which is much cheaper than a batch of one. Every rule
+        that can score has an entry, 0 when no scoring tier matched.
+        """
+        values = dict(features)
+        for name, (numerator, denominator) in self.ratios.items():
+            if values[numerator] is None or values[denominator] is None:
+                values[name] = None
+            else:
+                values[name] = values[numerator] / values[denominator] if values[denominator] > 0 else 0.0
+        points = {self.rules[position][0]: 0 for position in self.scoring_rules}
+        recommendations = []
+        for (name, tiers), inputs in zip(self.rules, self._inputs):
+            if any(values[feature] is None for feature in inputs):
+                continue
+            for tier in tiers:
+                if tier.holds(values):
+                    if tier.points is not None:
+                        points[name] = tier.points_for(values, weights)
+                    if tier.recommend is not None:
+                        recommendation = dict(tier.recommend)
+                        recommendation["recommendation"] = recommendation["recommendation"].format(**values)
+                        recommendations.append(recommendation)
+                    break
+        return points, recommendations
+
+    def _columns(self, frame, positions):
+        names = set()
+        for position in positions:
+            for tier in self.rules[position][1]:
+                names |= tier.features()
+        ratios = {name: self.ratios[name] for name in names if name in self.ratios}
+        for numerator, denominator in ratios.values():
+            names |= {numerator, denominator}
+        columns = {name: np.asarray(frame[name]) for name in names - set(ratios)}
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for name, (numerator, denominator) in ratios.items():
+                columns[name] = np.where(
+                    columns[denominator] > 0, columns[numerator] / columns[denominator], 0.0
+                )
+        return columns
+
+    def _known(self, columns, position, rows):
+        """Pages with every input of a rule present; only float columns can hold NaN"""
+        known = np.ones(rows, dtype=bool)
+        for name in self._inputs[position]:
+            if columns[name].dtype.kind == 'f':
+                known &= ~np.isnan(columns[name])
+        return known
+
+    def evaluate(self, frame, weights):
+        """Score a DataFrame (or dict of arrays) of features with the rules that carry points.
+
+        Scores are the unclamped float sums of the matched tiers' points,
+        added in rule order. Recommendations are per page: see evaluate_one.
+        """
+        columns = self._columns(frame, self.scoring_rules)
+        rows = len(frame[next(iter(frame.keys()))])
+        scores = np.zeros(rows)
+        points = {}
+        for position in self.scoring_rules:
+            name, tiers = self.rules[position]
+            conditions = [tier.mask(columns, rows) for tier in tiers]
+            points[name] = np.where(
+                self._known(columns, position, rows),
+                np.select(conditions, [tier.score(columns, weights) for tier in tiers], 0),
+                0,
+            )
+            scores += points[name]
+        return RuleResults(scores, points)
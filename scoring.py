@@ -0,0 +1,352 @@
+"""SEO score and recommendations, both driven by one declarative rule table.
+
+SEO_RULE_TABLE holds every threshold once, with the points each outcome
+scores (named entries of SCORE_WEIGHTS, overridable per call) and the
+recommendation it triggers. The table is compiled at import; score_frame
+evaluates it for any number of stored pages in one vectorized pass (e.g.
+to rescore them after a weight change without refetching or re-parsing),
+and evaluate_page does one page, cached on the page's rule inputs.
+"""
+import numpy as np
+import pandas as pd
+
+from caches import rule_cache
+from rules import RuleSet
+from text_stats import get_text_stats
+
+SCORE_WEIGHTS = {
+    # Title: 30-60 characters, 20-70 characters, any
+    "title_ideal": 15,
+    "title_ok": 10,
+    "title_present": 5,
+    # Meta description: 120-160 characters, 100-180 characters, any
+    "description_ideal": 15,
+    "description_ok": 10,
+    "description_present": 5,
+    # Headings: exactly one H1, several H1s, at least one H2
+    "single_h1": 15,
+    "multiple_h1": 5,
+    "has_h2": 5,
+    # Share of images with alt text, scaled to this many points
+    "image_alt": 10,
+    "mobile_friendly": 10,
+    "schema": 10,
+    "canonical": 5,
+    # One point per this many internal links, up to the cap
+    "internal_links_cap": 5,
+    "internal_links_per_point": 5,
+    # Content: 300+, 200+, 100+ words
+    "content_300": 10,
+    "content_200": 7,
+    "content_100": 4,
+    "max_score": 100,
+}
+
+# Recommendations shared by several tiers of a rule
+TITLE_TOO_SHORT = {
+    "category": "Important",
+    "issue": "Title Too Short",
+    "recommendation": "Expand your title tag from {title_length} to 30-60 characters for better SEO.",
+    "impact": "Medium",
+}
+TITLE_TOO_LONG = {
+    "category": "Important",
+    "issue": "Title Too Long",
+    "recommendation": "Shorten your title tag from {title_length} to 30-60 characters to avoid truncation.",
+    "impact": "Medium",
+}
+DESCRIPTION_TOO_SHORT = {
+    "category": "Important",
+    "issue": "Meta Description Too Short",
+    "recommendation": "Expand your meta description from {meta_description_length} to 120-160 characters.",
+    "impact": "Medium",
+}
+LOW_CONTENT = {
+    "category": "Important",
+    "issue": "Low Content Length",
+    "recommendation": "Increase content from {word_count} to at least 300 words for better SEO.",
+    "impact": "Medium",
+}
+
+# Score contributions and recommendations of a page. Each rule's tiers are
+# tried in order and the first whose conditions all hold applies; points
+# name an entry of SCORE_WEIGHTS.
+SEO_RULE_TABLE = [
+    ("title", [
+        {"when": [("has_title", "==", False)], "recommend": {
+            "category": "Critical",
+            "issue": "Missing Title Tag",
+            "recommendation": "Add a descriptive title tag (30-60 characters) that includes your primary keyword.",
+            "impact": "High"}},
+        {"when": [("title_length", ">=", 30), ("title_length", "<=", 60)], "points": "title_ideal"},
+        {"when": [("title_length", ">=", 20), ("title_length", "<", 30)], "points": "title_ok", "recommend": TITLE_TOO_SHORT},
+        {"when": [("title_length", ">", 60), ("title_length", "<=", 70)], "points": "title_ok", "recommend": TITLE_TOO_LONG},
+        {"when": [("title_length", ">", 0), ("title_length", "<", 30)], "points": "title_present", "recommend": TITLE_TOO_SHORT},
+        {"when": [("title_length", ">", 70)], "points": "title_present", "recommend": TITLE_TOO_LONG},
+        {"recommend": TITLE_TOO_SHORT},
+    ]),
+    ("meta_description", [
+        {"when": [("has_meta_description", "==", False)], "recommend": {
+            "category": "Critical",
+            "issue": "Missing Meta Description",
+            "recommendation": "Add a compelling meta description (120-160 characters) to improve click-through rates.",
+            "impact": "High"}},
+        {"when": [("meta_description_length", ">=", 120), ("meta_description_length", "<=", 160)],
+         "points": "description_ideal"},
+        {"when": [("meta_description_length", ">=", 100), ("meta_description_length", "<", 120)],
+         "points": "description_ok", "recommend": DESCRIPTION_TOO_SHORT},
+        {"when": [("meta_description_length", ">", 160), ("meta_description_length", "<=", 180)],
+         "points": "description_ok"},
+        {"when": [("meta_description_length", ">", 0), ("meta_description_length", "<", 120)],
+         "points": "description_present", "recommend": DESCRIPTION_TOO_SHORT},
+        {"when": [("meta_description_length", ">", 180)], "points": "description_present"},
+        {"recommend": DESCRIPTION_TOO_SHORT},
+    ]),
+    ("h1", [
+        {"when": [("h1_count", "==", 1)], "points": "single_h1"},
+        {"when": [("h1_count", ">", 1)], "points": "multiple_h1", "recommend": {
+            "category": "Important",
+            "issue": "Multiple H1 Tags",
+            "recommendation": "Reduce H1 tags from {h1_count} to 1. Use H2-H6 for subheadings.",
+            "impact": "Medium"}},
+        {"recommend": {
+            "category": "Critical",
+            "issue": "No H1 Tag",
+            "recommendation": "Add exactly one H1 tag with your primary keyword to improve SEO structure.",
+            "impact": "High"}},
+    ]),
+    ("h2", [
+        {"when": [("h2_count", ">", 0)], "points": "has_h2"},
+    ]),
+    ("image_alt", [
+        {"when": [("images_total", ">", 0), ("alt_ratio", "<", 0.8)], "points": "image_alt", "scale": "alt_ratio",
+         "recommend": {
+             "category": "Important",
+             "issue": "Missing Alt Text on Images",
+             "recommendation": "Add alt text to {images_without_alt} images for better accessibility and SEO.",
+             "impact": "Medium"}},
+        {"when": [("images_total", ">", 0)], "points": "image_alt", "scale": "alt_ratio"},
+    ]),
+    ("mobile_friendly", [
+        {"when": [("is_mobile_friendly", "==", True)], "points": "mobile_friendly"},
+        {"recommend": {
+            "category": "Critical",
+            "issue": "Not Mobile-Friendly",
+            "recommendation": "Add a viewport meta tag to make your site mobile-responsive.",
+            "impact": "High"}},
+    ]),
+    ("https", [
+        {"when": [("is_https", "==", False)], "recommend": {
+            "category": "Critical",
+            "issue": "Not Using HTTPS",
+            "recommendation": "Migrate to HTTPS to improve security and SEO rankings.",
+            "impact": "High"}},
+    ]),
+    ("schema", [
+        {"when": [("has_schema", "==", True)], "points": "schema"},
+        {"recommend": {
+            "category": "Recommended",
+            "issue": "No Schema Markup",
+            "recommendation": "Add structured data (JSON-LD) to help search engines understand your content.",
+            "impact": "Low"}},
+    ]),
+    ("canonical", [
+        {"when": [("has_canonical", "==", True)], "points": "canonical"},
+        {"recommend": {
+            "category": "Recommended",
+            "issue": "No Canonical URL",
+            "recommendation": "Add a canonical URL to prevent duplicate content issues.",
+            "impact": "Low"}},
+    ]),
+    ("internal_links", [
+        {"when": [("internal_links_count", ">", 0)], "points": "internal_links_cap",
+         "per": ("internal_links_count", "internal_links_per_point")},
+    ]),
+    ("content_length", [
+        {"when": [("word_count", ">=", 300)], "points": "content_300"},
+        {"when": [("word_count", ">=", 200)], "points": "content_200", "recommend": LOW_CONTENT},
+        {"when": [("word_count", ">=", 100)], "points": "content_100", "recommend": LOW_CONTENT},
+        {"recommend": LOW_CONTENT},
+    ]),
+    ("robots_txt", [
+        {"when": [("robots_txt_exists", "==", False)], "recommend": {
+            "category": "Recommended",
+            "issue": "No robots.txt File",
+            "recommendation": "Create a robots.txt file to guide search engine crawlers.",
+            "impact": "Low"}},
+    ]),
+    ("sitemap", [
+        {"when": [("sitemap_exists", "==", False)], "recommend": {
+            "category": "Recommended",
+            "issue": "No Sitemap.xml",
+            "recommendation": "Create a sitemap.xml file to help search engines index your pages.",
+            "impact": "Low"}},
+    ]),
+    ("broken_links", [
+        {"when": [("checked_links", ">", 0), ("broken_ratio", ">", 0.1)], "recommend": {
+            "category": "Important",
+            "issue": "Broken Links Detected",
+            "recommendation": "Fix {broken_links} broken links found in sample check.",
+            "impact": "Medium"}},
+    ]),
+    ("large_images", [
+        {"when": [("large_images", ">", 0)], "recommend": {
+            "category": "Recommended",
+            "issue": "Large Images Detected",
+            "recommendation": "Optimize {large_images} large images (>500KB) to improve page speed.",
+            "impact": "Low"}},
+    ]),
+    ("open_graph", [
+        {"when": [("has_og_tags", "==", False)], "recommend": {
+            "category": "Recommended",
+            "issue": "No Open Graph Tags",
+            "recommendation": "Add Open Graph tags to improve social media sharing appearance.",
+            "impact": "Low"}},
+    ]),
+    ("readability", [
+        {"when": [("readability_score", ">", 0), ("readability_score", "<", 30)], "recommend": {
+            "category": "Recommended",
+            "issue": "Low Readability Score",
+            "recommendation": "Improve content readability (current: {readability_score:.1f}). "
+                              "Use simpler language and shorter sentences.",
+            "impact": "Low"}},
+    ]),
+]
+
+SEO_RULES = RuleSet(SEO_RULE_TABLE, ratios={
+    "alt_ratio": ("images_with_alt", "images_total"),
+    "broken_ratio": ("broken_links", "checked_links"),
+})
+
+# Columns the rule table reads, as produced by score_features
+SCORE_FEATURES = [
+    "has_title", "title_length", "has_meta_description", "meta_description_length", "h1_count", "h2_count",
+    "images_total", "images_with_alt", "images_without_alt", "is_mobile_friendly", "is_https", "has_schema",
+    "has_canonical", "internal_links_count", "word_count", "robots_txt_exists", "sitemap_exists",
+    "checked_links", "broken_links", "large_images", "has_og_tags", "readability_score",
+]
+
+
+def known_flag(metadata, name):
+    """A yes/no feature as a bool, or None when it was looked up and the lookup failed (stored as None)"""
+    if name in metadata and metadata[name] is None:
+        return None
+    return bool(metadata.get(name, False))
+
+
+def score_features(metadata):
+    """The flat rule inputs of one metadata dict (one row for score_frame).
+
+    Inputs listed in the record's ``unscanned`` (features a quick audit did
+    not read) are None, which leaves their rules out of the score and the
+    recommendations; so is robots.txt or sitemap.xml when its lookup failed.
+    """
+    headings = metadata.get('headings', {})
+    features = {
+        "has_title": bool(metadata.get('title')),
+        "title_length": metadata.get('title_length', 0),
+        "has_meta_description": bool(metadata.get('meta_description')),
+        "meta_description_length": metadata.get('meta_description_length', 0),
+        "h1_count": len(headings.get('h1', [])),
+        "h2_count": len(headings.get('h2', [])),
+        "images_total": metadata.get('images_total', 0),
+        "images_with_alt": metadata.get('images_with_alt', 0),
+        "images_without_alt": metadata.get('images_without_alt', 0),
+        "is_mobile_friendly": bool(metadata.get('is_mobile_friendly', False)),
+        "is_https": bool(metadata.get('is_https', False)),
+        "has_schema": bool(metadata.get('has_schema', False)),
+        "has_canonical": bool(metadata.get('canonical_url')),
+        "internal_links_count": metadata.get('internal_links_count', 0),
+        "word_count": get_text_stats(metadata)['word_count'],
+        "robots_txt_exists": known_flag(metadata, 'robots_txt_exists'),
+        "sitemap_exists": known_flag(metadata, 'sitemap_exists'),
+        "checked_links": metadata.get('checked_links', 0),
+        "broken_links": metadata.get('broken_links', 0),
+        "large_images": metadata.get('large_images', 0),
+        "has_og_tags": bool(metadata.get('og_tags')),
+        "readability_score": metadata.get('readability_score', 0),
+    }
+    for name in metadata.get('unscanned', ()):
+        features[name] = None
+    return features
+
+
+# Column types of a feature frame; set explicitly so an empty frame is not all object columns.
+# Numbers are floats so an unscanned input (None) becomes NaN.
+SCORE_FEATURE_TYPES = {
+    name: bool if name.startswith(("has_", "is_")) or name.endswith("_exists") else float
+    for name in SCORE_FEATURES
+}
+
+
+def features_to_frame(rows):
+    """DataFrame of score_features rows (e.g. saved with a history entry), typed for score_frame"""
+    return pd.DataFrame(rows, columns=SCORE_FEATURES).astype(SCORE_FEATURE_TYPES)
+
+
+def feature_frame(records):
+    """DataFrame of rule inputs for a list of metadata dicts, one row each"""
+    return features_to_frame([score_features(metadata) for metadata in records])
+
+
+def _final_scores(scores, weights):
+    """Clamp summed points to max_score; int64 when all weights are integers (as the scalar scores then are)"""
+    scores = np.minimum(scores, weights["max_score"])
+    if all(isinstance(points, int) for points in weights.values()):
+        return scores.astype(np.int64)
+    return scores
+
+
+def score_frame(frame, weights=None):
+    """SEO scores of a table of rule inputs, in row order.
+
+    frame is a pandas DataFrame (or anything with the SCORE_FEATURES
+    columns, such as a dict of arrays or a pyarrow Table converted with
+    to_pandas). Only the rules that carry points are evaluated.
+    """
+    w = weights or SCORE_WEIGHTS
+    return _final_scores(SEO_RULES.evaluate(frame, w).scores, w)
+
+
+def _evaluate_page(metadata, weights):
+    """(score, recommendations, points by rule) of one page, cached on its rule inputs"""
+    w = weights or SCORE_WEIGHTS
+    features = score_features(metadata)
+    key = (tuple(features.values()), tuple(w.items()) if weights else None)
+    cached = rule_cache.get(key)
+    if cached is None:
+        points, recommendations = SEO_RULES.evaluate_one(features, w)
+        cached = (min(sum(points.values()), w["max_score"]), recommendations, points)
+        rule_cache.set(key, cached)
+    return cached
+
+
+def evaluate_page(metadata, weights=None):
+    """(score, recommendations) of one page.
+
+    Results are cached on the page's rule inputs, so re-rendering or
+    re-analyzing unchanged content skips evaluation altogether.
+    """
+    score, recommendations, _ = _evaluate_page(metadata, weights)
+    return score, [dict(recommendation) for recommendation in recommendations]
+
+
+def score_breakdown(metadata, weights=None):
+    """(rule, points, most points possible) for every rule that can score, in rule table order"""
+    w = weights or SCORE_WEIGHTS
+    points = _evaluate_page(metadata, weights)[2]
+    return [(rule, points[rule], max_points) for rule, max_points in SEO_RULES.max_points(w).items()]
+
+
+def calculate_seo_score(metadata, weights=None):
+    """Calculate overall SEO score based on various factors"""
+    if not metadata or not isinstance(metadata, dict):
+        return 0
+    return evaluate_page(metadata, weights)[0]
+
+
+def page_recommendations(metadata):
+    """Actionable recommendations for one page, in rule table order"""
+    if metadata is None or not isinstance(metadata, dict):
+        return []
+    return evaluate_page(metadata)[1]
@@ -0,0 +1,50 @@
+"""Requests queued behind a Crawl-delay must fail fast once the host's circuit breaker opens.
+
+Starts a local server that answers every GET with a 500, spaces requests to
+it 0.2s apart (as a robots.txt Crawl-delay would) and fetches a dozen pages
+at once. The first BREAKER_FAILURES requests go out and open the breaker;
+the rest are still waiting for their rate-limit token at that point and
+must be refused instead of sent. Run with ``python test-circuit_breaker.py``.
+"""
+import asyncio
+
+from aiohttp import web
+
+import http_client
+
+URLS = 12
+
+
+async def main():
+    hits = []
+
+    async def failing(request):
+        hits.append(request.path)
+        return web.Response(status=500)
+
+    app = web.Application()
+    app.router.add_get('/{page}', failing)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    base = f'http://127.0.0.1:{port}'
+    http_client.set_crawl_delay(base, 0.2)
+
+    stats = http_client.track_retries()
+    results = await asyncio.gather(
+        *(http_client.fetch(f'{base}/page-{i}', retries=0) for i in range(URLS)),
+        return_exceptions=True,
+    )
+    await runner.cleanup()
+
+    refused = [r for r in results if isinstance(r, http_client.CircuitOpenError)]
+    print(f"sent: {len(hits)}  refused: {len(refused)}  failed fast: {stats.failed_fast}")
+    assert len(hits) == http_client.BREAKER_FAILURES, hits
+    assert len(refused) == URLS - http_client.BREAKER_FAILURES, results
+    assert stats.failed_fast == len(refused)
+    assert stats.breaker_trips == 1
+
+
+http_client.run_sync(main(), timeout=30)
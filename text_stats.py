@@ -0,0 +1,56 @@
+"""Word, sentence and frequency statistics of a page's text, computed once per page."""
+import re
+from collections import Counter
+
+SENTENCE_END = re.compile(r'[.!?]+')
+
+
+class TextStats:
+    """Tokenizes a text once and derives every count the report shows from those tokens.
+
+    ``as_dict()`` gives the plain-dict form stored in the metadata (and so in
+    the caches); consumers read that dict rather than re-splitting the text.
+    """
+
+    def __init__(self, text):
+        text = text or ''
+        self.tokens = text.split()
+        self.word_count = len(self.tokens)
+        self.char_count = len(text)
+        # Words per sentence, sentences being the non-blank pieces between . ! ?
+        self.sentence_lengths = [
+            length for length in (len(piece.split()) for piece in SENTENCE_END.split(text)) if length
+        ]
+        self.sentence_count = len(self.sentence_lengths)
+        self.paragraph_count = text.count('\n\n') + 1 if text else 0
+        self.avg_sentence_length = sum(self.sentence_lengths) / self.sentence_count if self.sentence_count else 0
+        self.avg_word_length = sum(map(len, self.tokens)) / self.word_count if self.word_count else 0
+        # Case-sensitive token counts in first-seen order
+        self.frequencies = Counter(self.tokens)
+
+    def as_dict(self):
+        return {
+            "word_count": self.word_count,
+            "char_count": self.char_count,
+            "sentence_count": self.sentence_count,
+            "paragraph_count": self.paragraph_count,
+            "avg_sentence_length": self.avg_sentence_length,
+            "avg_word_length": self.avg_word_length,
+            "frequencies": dict(self.frequencies),
+        }
+
+
+def lowercase_frequencies(frequencies):
+    """Merge a case-sensitive frequency table into lower-case counts, keeping first-seen order"""
+    merged = Counter()
+    for word, count in frequencies.items():
+        merged[word.lower()] += count
+    return merged
+
+
+def get_text_stats(metadata):
+    """TextStats dict of a metadata record (computed on the spot for records cached without one)"""
+    text_stats = metadata.get('text_stats')
+    if text_stats is None:
+        text_stats = TextStats(metadata.get('text_content', '')).as_dict()
+    return text_stats
@@ -0,0 +1,185 @@
+"""TF-IDF keyword scoring against a persistent document-frequency index.
+
+Every analyzed page adds its terms to a document-frequency table kept in
+the local cache database, so IDF weights keep improving as more pages are
+analyzed. Scoring is done for a whole batch of pages at once on flat
+NumPy arrays in CSR layout (row offsets, term ids, counts).
+"""
+import sqlite3
+import threading
+import time
+
+import numpy as np
+from nltk.corpus import stopwords
+
+from caches import CACHE_DB_PATH
+from text_stats import lowercase_frequencies
+
+# Indexed pages at which the index is halved: the newest half of the pages is
+# kept and every document frequency is halved, so the ratios IDF depends on
+# stay about the same while terms seen on a single page age out
+MAX_INDEXED_DOCUMENTS = 20000
+
+_stop_words = None
+
+
+def get_stop_words():
+    """English stop words, loaded from NLTK once per process (empty if the corpus is missing)"""
+    global _stop_words
+    if _stop_words is None:
+        try:
+            _stop_words = frozenset(stopwords.words('english'))
+        except LookupError:
+            # Not retried: the lookup is slow and the corpus does not appear mid-run
+            _stop_words = frozenset()
+    return _stop_words
+
+
+def candidate_terms(frequencies):
+    """Lower-case keyword candidates of a TextStats frequency table: alphabetic, 3+ letters, no stop words"""
+    stop_words = get_stop_words()
+    return {
+        word: count for word, count in lowercase_frequencies(frequencies).items()
+        if len(word) > 2 and word.isalpha() and word not in stop_words
+    }
+
+
+class DocumentFrequencyIndex:
+    """Number of analyzed pages containing each term, stored in SQLite.
+
+    Pages are identified by a content key (the body hash), so re-analyzing
+    an unchanged page does not count it twice. Once more than
+    ``max_documents`` pages are indexed the index is halved (see
+    MAX_INDEXED_DOCUMENTS), which bounds both tables. Like SQLiteCache,
+    storage errors are swallowed: the index then simply stops growing.
+    """
+
+    def __init__(self, path, table='doc_frequency', max_documents=MAX_INDEXED_DOCUMENTS):
+        self.path = path
+        self.table = table
+        self.max_documents = max_documents
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(f'CREATE TABLE IF NOT EXISTS {self.table}_terms (term TEXT PRIMARY KEY, df INTEGER NOT NULL)')
+            conn.execute(f'CREATE TABLE IF NOT EXISTS {self.table}_docs (doc_key TEXT PRIMARY KEY, added REAL NOT NULL)')
+            self._local.conn = conn
+        return conn
+
+    def add_document(self, doc_key, terms):
+        """Count one page's distinct terms; returns False if the page was already indexed"""
+        try:
+            conn = self._connect()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                added = conn.execute(
+                    f'INSERT OR IGNORE INTO {self.table}_docs (doc_key, added) VALUES (?, ?)', (doc_key, time.time())
+                ).rowcount
+                if added:
+                    conn.executemany(
+                        f'INSERT INTO {self.table}_terms (term, df) VALUES (?, 1) '
+                        'ON CONFLICT(term) DO UPDATE SET df = df + 1',
+                        ((term,) for term in terms),
+                    )
+                    self._age_out(conn)
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+        except sqlite3.Error:
+            return False
+        return bool(added)
+
+    def _age_out(self, conn):
+        """Halve the index once it holds more than max_documents pages"""
+        count = conn.execute(f'SELECT COUNT(*) FROM {self.table}_docs').fetchone()[0]
+        if count <= self.max_documents:
+            return
+        conn.execute(
+            f'DELETE FROM {self.table}_docs WHERE doc_key IN '
+            f'(SELECT doc_key FROM {self.table}_docs ORDER BY added LIMIT ?)',
+            (count - count // 2,),
+        )
+        conn.execute(f'UPDATE {self.table}_terms SET df = df / 2')
+        conn.execute(f'DELETE FROM {self.table}_terms WHERE df = 0')
+
+    def document_count(self):
+        try:
+            return self._connect().execute(f'SELECT COUNT(*) FROM {self.table}_docs').fetchone()[0]
+        except sqlite3.Error:
+            return 0
+
+    def document_frequencies(self, terms):
+        """Array of document frequencies for terms, in order (0 for unseen terms)"""
+        found = {}
+        try:
+            conn = self._connect()
+            # Stay below SQLite's bound-parameter limit
+            for start in range(0, len(terms), 900):
+                chunk = terms[start:start + 900]
+                placeholders = ','.join('?' * len(chunk))
+                found.update(conn.execute(
+                    f'SELECT term, df FROM {self.table}_terms WHERE term IN ({placeholders})', chunk
+                ))
+        except sqlite3.Error:
+            pass
+        return np.fromiter((found.get(term, 0) for term in terms), dtype=np.float64, count=len(terms))
+
+    def idf(self, terms):
+        """Smoothed inverse document frequency, log((1 + N) / (1 + df)) + 1, for each term"""
+        document_count = self.document_count()
+        return np.log((1 + document_count) / (1 + self.document_frequencies(terms))) + 1
+
+    def clear(self):
+        try:
+            conn = self._connect()
+            conn.execute(f'DELETE FROM {self.table}_terms')
+            conn.execute(f'DELETE FROM {self.table}_docs')
+        except sqlite3.Error:
+            pass
+
+
+def top_tfidf_terms(term_tables, word_counts, index, top_n=20):
+    """Top TF-IDF terms of many pages in one vectorized pass.
+
+    term_tables holds one {term: count} dict per page (see candidate_terms)
+    and word_counts the pages' total word counts. Returns one list of
+    (term, score) pairs per page, best first; ties keep first-seen order.
+    """
+    indptr = [0]
+    all_terms = []
+    counts = []
+    for table in term_tables:
+        all_terms.extend(table)
+        counts.extend(table.values())
+        indptr.append(len(all_terms))
+    if not all_terms:
+        return [[] for _ in term_tables]
+
+    terms = list(dict.fromkeys(all_terms))
+    term_index = {term: term_id for term_id, term in enumerate(terms)}
+    term_ids = np.fromiter(map(term_index.__getitem__, all_terms), dtype=np.intp, count=len(all_terms))
+    idf = index.idf(terms)
+    indptr = np.asarray(indptr)
+    rows = np.repeat(np.arange(len(term_tables)), np.diff(indptr))
+    lengths = np.maximum(np.asarray(word_counts, dtype=np.float64), 1)[rows]
+    scores = np.asarray(counts, dtype=np.float64) / lengths * idf[term_ids]
+
+    # Sort entries by page, then by descending score, and keep each page's first top_n
+    order = np.lexsort((-scores, rows))
+    rank = np.arange(len(order)) - indptr[rows[order]]
+    kept = order[rank < top_n]
+    bounds = np.cumsum(np.minimum(np.diff(indptr), top_n))[:-1]
+    return [
+        [(terms[term_id], score) for term_id, score in zip(term_ids[entries].tolist(), scores[entries].tolist())]
+        for entries in np.split(kept, bounds)
+    ]
+
+
+# Shared by every analysis mode; lives in the same database file as the analysis cache
+document_index = DocumentFrequencyIndex(CACHE_DB_PATH)
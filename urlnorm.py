@@ -0,0 +1,107 @@
+"""Canonical URL normalization for cache keys, bulk dedup and link sets."""
+import re
+import string
+from urllib.parse import quote, unquote, urlsplit, urlunsplit
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+# How to treat a trailing slash on non-root paths: 'strip', 'add' or 'keep'
+TRAILING_SLASH_POLICY = 'strip'
+
+# Query parameters that only track campaigns/clicks and never change the page
+TRACKING_PARAMS = {
+    'gclid', 'gclsrc', 'dclid', 'fbclid', 'msclkid', 'yclid', 'igshid', 'twclid',
+    'mc_cid', 'mc_eid', '_ga', '_gl', '_hsenc', '_hsmi', 'mkt_tok', 'oly_anon_id', 'oly_enc_id',
+}
+TRACKING_PREFIXES = ('utm_',)
+
+_UNRESERVED = frozenset(string.ascii_letters + string.digits + '-._~')
+_PERCENT_ESCAPE = re.compile(r'%([0-9A-Fa-f]{2})')
+_PATH_SAFE = "/:@!$&'()*+,;=-._~%"
+_QUERY_SAFE = "/?:@!$'()*+,;-._~%"
+
+
+def _unescape_unreserved(match):
+    char = chr(int(match.group(1), 16))
+    return char if char in _UNRESERVED else '%' + match.group(1).upper()
+
+
+def _normalize_escapes(part, safe):
+    """Decode escaped unreserved characters, upper-case other escapes, escape raw unsafe characters"""
+    return quote(_PERCENT_ESCAPE.sub(_unescape_unreserved, part), safe=safe)
+
+
+def _remove_dot_segments(path):
+    output = []
+    for segment in path.split('/'):
+        if segment == '..':
+            if len(output) > 1:
+                output.pop()
+        elif segment != '.':
+            output.append(segment)
+    if path.endswith(('/.', '/..')):
+        output.append('')
+    return '/'.join(output)
+
+
+def is_tracking_param(name):
+    name = unquote(name).lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def normalize_url(url, trailing_slash=None):
+    """Return a canonical form of url.
+
+    Lower-cases scheme and host, drops default ports, fragments and tracking
+    parameters, sorts the remaining query parameters, resolves dot segments,
+    normalizes percent-encoding and applies the trailing slash policy. URLs
+    that cannot be parsed are returned stripped but otherwise unchanged.
+    """
+    url = url.strip()
+    try:
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        host = parts.hostname or ''
+        port = parts.port
+    except ValueError:
+        return url
+    if not scheme or not host:
+        return url
+
+    host = host.rstrip('.')
+    if not host.isascii():
+        try:
+            host = host.encode('idna').decode('ascii')
+        except UnicodeError:
+            pass
+    if ':' in host:
+        host = f'[{host}]'
+    netloc = host
+    if port is not None and port != DEFAULT_PORTS.get(scheme):
+        netloc = f'{host}:{port}'
+    if parts.username is not None:
+        userinfo = parts.username
+        if parts.password is not None:
+            userinfo += ':' + parts.password
+        netloc = f'{userinfo}@{netloc}'
+
+    path = _remove_dot_segments(_normalize_escapes(parts.path, _PATH_SAFE)) or '/'
+    policy = trailing_slash or TRAILING_SLASH_POLICY
+    if path != '/':
+        if policy == 'strip':
+            path = path.rstrip('/') or '/'
+        elif policy == 'add' and not path.endswith('/'):
+            path += '/'
+
+    params = []
+    for pair in parts.query.split('&'):
+        if not pair:
+            continue
+        name, sep, value = pair.partition('=')
+        if is_tracking_param(name):
+            continue
+        params.append(_normalize_escapes(name, _QUERY_SAFE) + sep + _normalize_escapes(value, _QUERY_SAFE))
+    params.sort(key=lambda p: p.partition('=')[0])
+    query = '&'.join(params)
+
+    return urlunsplit((scheme, netloc, path, query, ''))